@@ -17,6 +17,9 @@ TICKERS = [
 # Configuración del Motor de Backtest
 BACKTEST_CAPITAL_INICIAL = 1000.0
 BACKTEST_TAMANO_POSICION_PCT = 0.5
+BACKTEST_JIT = True  # Compilar el kernel del backtest con numba (si está instalado)
+BACKTEST_CHECKPOINTS = True  # Retomar cada ticker desde su último estado simulado
+BACKTEST_CHECKPOINT_DIR = "./data/cache/checkpoints"
 
 # Parámetros para el RSI
 RSI_PARAMS = {
@@ -40,14 +43,157 @@ SMA_PERIODS = {
     "long": 200
 }
 
+# Indicadores incrementales: se persisten por ticker (columnas + estado RSI/SMA)
+# y cada ciclo solo calcula las filas nuevas.
+INDICATORS_INCREMENTAL = True
+INDICATOR_CACHE_DIR = "./data/cache/indicators"
+INDICATORS_PARITY_CHECK = False  # Comparar cada ciclo contra el cálculo completo (diagnóstico)
+# Motor de indicadores: "native" (kernels NumPy/numba de src.native_indicators, una sola pasada)
+# o "pandas_ta" (se importa solo si se elige). Ambos dan los mismos valores.
+INDICATORS_ENGINE = "native"
+INDICATORS_JIT = True  # Compilar los kernels de indicadores con numba (si está instalado)
+
+# Procesos para indicadores + backtest en cada ciclo (None = todos los núcleos, 1 = serial para depurar)
+PIPELINE_WORKERS = None
+
+# Caché en memoria del daemon: DataFrame + indicadores por ticker entre ciclos, invalidado
+# si el caché en disco cambia y con desalojo LRU al superar el presupuesto de memoria.
+HOT_CACHE_ENABLED = True
+HOT_CACHE_MAX_MB = 512
+
+# Métricas por etapa y por ticker (tiempos de reloj/CPU, hits de caché, descargas).
+# Se reescriben en cada ciclo en formato Prometheus (textfile collector de node_exporter).
+METRICS_ENABLED = True
+METRICS_PATH = "./data/metrics/nerv.prom"
+
+# Perfilado de un ciclo: crear el archivo PROFILE_TRIGGER_FILE (p. ej. `touch data/profile_next_cycle`)
+# y el siguiente ciclo se perfila y el archivo se borra. PROFILER: "cprofile" o "pyinstrument".
+PROFILE_TRIGGER_FILE = "./data/profile_next_cycle"
+PROFILER = "cprofile"
+PROFILE_OUTPUT_DIR = "./data/metrics/profiles"
+
 # Ruta donde se guardará el informe final
 REPORT_PATH = "./data/informe_nerv_backtest.md"
+# Memoria para las secciones ya renderizadas del informe (fila y detalle de cada ticker). Entre
+# ciclos del daemon solo se renderizan los tickers cuyo resultado cambió. 0 desactiva el caché.
+REPORT_CACHE_MAX_MB = 64
 
 # Directorio para cachear datos históricos
 CACHE_DIR = "./data/cache"
 
+# Backend del caché: "columnar" (binario por columna, append-only) o "csv" (formato histórico).
+# Los CSV existentes se migran automáticamente la primera vez que se lee cada ticker.
+CACHE_BACKEND = "columnar"
+
+# Descarga por lotes (varios tickers por petición a yfinance)
+DOWNLOAD_CHUNK_SIZE = 25          # Tickers por petición
+DOWNLOAD_CHUNK_PAUSE_SECONDS = 2  # Pausa entre bloques para no gatillar el rate limit
+DOWNLOAD_MAX_RETRIES = 3          # Reintentos por bloque ante errores
+DOWNLOAD_BACKOFF_SECONDS = 5      # Espera base del backoff exponencial (5s, 10s, 20s...)
+
+# Modo intradía: intervalos adicionales escaneados en cada ciclo (p. ej. ["1h", "15m"]).
+# Caché por (ticker, intervalo) particionado por mes, con retención móvil por intervalo
+# (Yahoo entrega como máximo ~730 días de barras 1h, 60 días de 5m-30m y 7 días de 1m).
+INTRADAY_INTERVALS = []
+INTRADAY_CACHE_DIR = "./data/cache/intraday"
+INTRADAY_RETENTION_DAYS = {"1h": 730, "30m": 60, "15m": 60, "5m": 60, "1m": 7}
+INTRADAY_RETENTION_DEFAULT_DAYS = 30
+INTRADAY_ANALYSIS_BARS = 2000  # Barras más recientes que se cargan para indicadores y backtest
+
+# Modo de descarga: "batch" (yf.download multi-ticker) o "async" (endpoint chart con asyncio)
+FETCH_MODE = "batch"
+QUOTE_API_URL = "https://query1.finance.yahoo.com"
+FETCH_CONCURRENCY = 8          # Peticiones simultáneas como máximo
+FETCH_TIMEOUT_SECONDS = 15     # Timeout por petición
+FETCH_MAX_RETRIES = 4          # Reintentos ante 429/5xx/timeouts
+FETCH_BACKOFF_SECONDS = 1.0    # Base del backoff exponencial con jitter
+FETCH_RATE_PER_SECOND = 4.0    # Token bucket compartido por todos los tickers
+FETCH_RATE_BURST = 8
+
+# Planificador por calendario de mercado (reemplaza la espera fija de 1 hora).
+# Un ciclo diario corre tras cada cierre de sesión; los intervalos intradía, al cerrar cada barra.
+SCHEDULER_ENABLED = True  # False = comportamiento anterior (un ciclo por hora)
+SCHEDULER_STATE_PATH = "./data/scheduler_state.json"
+SCHEDULER_CLOSE_DELAY_MINUTES = 30   # Espera tras el cierre para que Yahoo publique la barra final
+SCHEDULER_BAR_DELAY_SECONDS = 120    # Espera tras el cierre de cada barra intradía
+SCHEDULER_RETRY_SECONDS = 900        # Reintento si un ciclo falla
+SCHEDULER_MAX_SLEEP_SECONDS = 21600  # Revisar al menos cada 6 horas
+
+# Calendario de mercado (reglas de feriados de NYSE en src/market_calendar.py). MARKET_CALENDAR_PATH
+# puede apuntar a un CSV `date,type,close` con excepciones: feriados (holiday) o cierres anticipados
+# (early_close) extra, o días que las reglas cierran pero tienen sesión (session).
+MARKET_TIMEZONE = "America/New_York"
+MARKET_OPEN_TIME = "09:30"
+MARKET_CLOSE_TIME = "16:00"
+MARKET_CALENDAR_PATH = None
+
 # Ruta para el reporte de señales diarias
 SIGNAL_REPORT_PATH = "./data/senales_nerv_hoy.md"
 
 # Log histórico de señales en formato JSON (para integración web)
-SIGNALS_JSON_LOG = "./data/nerv_signals_log.json"
\ No newline at end of file
+SIGNALS_JSON_LOG = "./data/nerv_signals_log.json"
+
+# Log histórico de señales indexado (SQLite). El JSON anterior se regenera desde aquí.
+SIGNALS_DB_PATH = "./data/nerv_signals.db"
+SIGNALS_JSON_EXPORT_LIMIT = 1000  # Entradas exportadas al JSON web (None = todas)
+
+# Servicio HTTP de consultas para la integración web (lo levanta el daemon, índices en memoria)
+# GET /health, /summary, /signals/latest, /signals?ticker=&offset=&limit=,
+#     /backtests?sort=&order=&offset=&limit=, /tickers/{T}, /tickers/{T}/trades?offset=&limit=
+QUERY_SERVICE_ENABLED = False
+QUERY_SERVICE_HOST = "127.0.0.1"
+QUERY_SERVICE_PORT = 8787
+QUERY_PAGE_SIZE = 50
+QUERY_MAX_PAGE_SIZE = 500
+QUERY_SIGNAL_LOG_LIMIT = 5000  # Señales del log histórico que se mantienen en memoria
+QUERY_RESPONSE_CACHE_SIZE = 1024  # Respuestas serializadas que se reutilizan por ciclo
+
+# Barrido de parámetros (python -m src.optimizer)
+# Claves válidas: las de RSI_PARAMS (salvo "period"), rentabilidad_minima, tamano_posicion,
+# capital_inicial y los periodos de indicadores rsi_period, sma_medium y sma_long.
+# Cada valor es una lista (grilla) o una tupla (mínimo, máximo) para búsqueda aleatoria.
+SWEEP_GRID = {
+    "rsi_period": [10, 14, 21],
+    "sma_medium": [20, 50],
+    "sma_long": [100, 200],
+    "alcista_compra_1": [30, 35, 40],
+    "alcista_venta": [65, 70, 72, 75],
+    "rentabilidad_minima": [0.10, 0.20, 0.30],
+}
+SWEEP_WORKERS = None  # None = todos los núcleos disponibles
+SWEEP_RANK_BY = "Rendimiento Medio (%)"
+SWEEP_RESULTS_PATH = "./data/sweep_resultados.csv"
+
+# Análisis de robustez Monte Carlo (python -m src.robustness o sección del reporte)
+ROBUSTNESS_ENABLED = False  # Agregar la sección de robustez al reporte de cada ciclo diario
+ROBUSTNESS_PATHS = 10000  # Trayectorias simuladas por ticker
+ROBUSTNESS_METHOD = "bootstrap"  # "bootstrap" (bloques de retornos históricos) o "gbm"
+ROBUSTNESS_BLOCK_SIZE = 20  # Largo de bloque del bootstrap (barras)
+ROBUSTNESS_SEED = 42
+ROBUSTNESS_CHUNK_MB = 256  # Memoria máxima por bloque de trayectorias en cada proceso
+ROBUSTNESS_FLOAT32 = False  # Indicadores de las trayectorias en float32 (mitad de memoria, valores aproximados)
+ROBUSTNESS_WORKERS = None  # None = todos los núcleos disponibles
+ROBUSTNESS_REPORT_PATH = "./data/robustez_nerv.md"
+
+# Ejecución por shards: el universo se reparte (hash estable por ticker) entre SHARD_COUNT
+# procesos o contenedores, cada uno con su propio caché, y un coordinador une los resultados.
+# Roles: python main.py --shard-index I --shard-count N / --coordinator --shard-count N
+# (o --local-shards N para correr todo en una sola máquina). Ver docker-compose.sharded.yml.
+SHARD_DIR = "./data/shards"
+SHARD_TIMEOUT_SECONDS = 1800  # Espera máxima del coordinador por un shard atrasado
+SHARD_POLL_SECONDS = 10
+SHARD_RETRIES = 1  # Reintentos de un shard fallido en el modo local
+SHARD_KEEP_CYCLES = 5  # Ciclos de resultados parciales que se conservan (respaldo de shards fallidos)
+
+# Simulación de portafolio con capital compartido (python main.py portfolio o etapa del ciclo diario):
+# todas las señales del universo operan sobre una sola cuenta en un eje de fechas común.
+PORTFOLIO_ENABLED = False  # Generar el reporte de portafolio en cada ciclo diario
+PORTFOLIO_CAPITAL_INICIAL = 100000
+PORTFOLIO_SIZING = "equity"  # Base del monto de cada compra: "equity" (valor actual de la cuenta) o "initial"
+PORTFOLIO_POSITION_PCT = 0.02  # Monto de cada compra como fracción de la base
+PORTFOLIO_MAX_POSITION_PCT = 0.10  # Máximo invertido en un ticker (fracción del valor de la cuenta; 1.0 = sin límite)
+PORTFOLIO_MAX_EXPOSURE_PCT = 1.0  # Máximo invertido en total (1.0 = solo limita el efectivo disponible)
+PORTFOLIO_MIN_ORDER = 1.0  # Compras menores a este monto (efectivo insuficiente) no se ejecutan
+PORTFOLIO_RANKING = "rsi"  # Prioridad de las compras del mismo día: "rsi" (el más bajo primero) o "ticker"
+PORTFOLIO_REPORT_PATH = "./data/portafolio_nerv.md"
+PORTFOLIO_REPORT_TRADES = 200  # Operaciones más recientes listadas en el reporte
\ No newline at end of file
@@ -0,0 +1 @@
+"""Benchmarks offline del Proyecto NERV (no requieren red)."""
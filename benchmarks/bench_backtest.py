@@ -0,0 +1,67 @@
+"""
+Mide el speedup por ticker del kernel de arrays de run_backtest frente a la
+implementación original fila por fila (run_backtest_reference). La paridad entre
+ambos se verifica en tests/test_strategy.py.
+
+Usa datos sintéticos y, si existen, los tickers del caché local.
+
+Uso: python -m benchmarks.bench_backtest [--synthetic 20] [--rows 500] [--no-cache]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_ohlcv
+from src.cache_store import get_cache_store
+from src.indicators import apply_indicators
+from src.strategy import run_backtest, run_backtest_reference
+
+
+def _datasets(synthetic: int, rows: int, use_cache: bool):
+    for seed in range(synthetic):
+        yield f"SYN{seed:03d}", make_ohlcv(rows, seed=seed)
+    if use_cache:
+        store = get_cache_store()
+        for key in store.keys():
+            yield key, store.read(key)
+
+
+def _time(fn, repeat: int = 3) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    speedups = []
+    t_ref_total = t_new_total = 0.0
+    for ticker, df in _datasets(args.synthetic, args.rows, not args.no_cache):
+        df = apply_indicators(df)
+        # Primera llamada fuera de la medición: compila el kernel con numba
+        run_backtest(df, ticker)
+        t_ref = _time(lambda: run_backtest_reference(df, ticker), repeat=1)
+        t_new = _time(lambda: run_backtest(df, ticker))
+        t_ref_total += t_ref
+        t_new_total += t_new
+        speedups.append(t_ref / t_new)
+
+    print(f"Tickers medidos: {len(speedups)}")
+    if speedups:
+        print(f"Referencia: {t_ref_total * 1000:.1f} ms - Kernel: {t_new_total * 1000:.1f} ms")
+        print(f"Speedup por ticker: mediana {statistics.median(speedups):.0f}x, mínimo {min(speedups):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compara los backends de caché (CSV histórico vs columnar binario) en lectura
+y en actualización incremental de una fila.
+
+Uso: python -m benchmarks.bench_cache [--rows 500] [--tickers 101] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_ohlcv
+from src.cache_store import get_cache_store
+
+
+def _timeit(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def bench_backend(backend: str, base_dir: str, rows: int, tickers: int, repeat: int) -> dict:
+    store = get_cache_store(backend, base_dir)
+    frames = {f"T{i:04d}": make_ohlcv(rows + repeat, seed=i) for i in range(tickers)}
+    for key, df in frames.items():
+        store.write(key, df.iloc[:rows])
+
+    def read_all():
+        for key in frames:
+            store.read(key)
+
+    counter = iter(range(rows, rows + repeat))
+
+    def update_all():
+        pos = next(counter)
+        for key, df in frames.items():
+            store.append(key, df.iloc[pos:pos + 1])
+
+    return {"read": _timeit(read_all, repeat), "update": _timeit(update_all, repeat)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--tickers", type=int, default=101)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nerv_bench_cache_")
+    try:
+        results = {b: bench_backend(b, os.path.join(tmp, b), args.rows, args.tickers, args.repeat)
+                   for b in ("csv", "columnar")}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{args.tickers} tickers x {args.rows} filas (mediana de {args.repeat} repeticiones)")
+    print(f"{'backend':<10} {'lectura (ms)':>14} {'update (ms)':>14}")
+    for backend, r in results.items():
+        print(f"{backend:<10} {r['read'] * 1000:>14.1f} {r['update'] * 1000:>14.1f}")
+    for stage in ("read", "update"):
+        print(f"speedup {stage}: {results['csv'][stage] / results['columnar'][stage]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
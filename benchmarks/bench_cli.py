@@ -0,0 +1,111 @@
+"""
+Mide el arranque de la CLI (main.py): el tiempo de importar cada módulo en un intérprete
+nuevo y el tiempo total de los comandos rápidos (`--help` y `signals` sobre algunos tickers)
+en frío, comparados con importar el pipeline completo (lo que pagaba cada arranque antes de
+los subcomandos).
+
+`signals` se corre en un directorio temporal con checkpoints de backtests sintéticos, igual
+que los deja el daemon. Falla si algún comando termina con error o importa pandas/yfinance.
+
+Uso: python -m benchmarks.bench_cli [--tickers 101] [--query 3] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+import CONFIG
+from benchmarks.synthetic import make_ohlcv, ticker_name
+
+# Módulos que los comandos rápidos no deberían cargar
+HEAVY_MODULES = ("pandas", "yfinance", "numba", "src.pipeline")
+
+
+def _import_seconds(module: str, repeat: int) -> float:
+    """Mediana del tiempo de importar `module` en un intérprete nuevo."""
+    code = f"import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)"
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            return float("nan")
+        samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def _command_seconds(args, cwd: str, repeat: int) -> float:
+    """Mediana del tiempo total (proceso completo) de `python main.py <args>`."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, os.path.join(ROOT, "main.py")] + args,
+                             capture_output=True, text=True, cwd=cwd)
+        samples.append(time.perf_counter() - t0)
+        if out.returncode != 0:
+            raise RuntimeError(f"main.py {' '.join(args)} terminó con código {out.returncode}:\n{out.stderr}")
+    return statistics.median(samples)
+
+
+def _loaded_heavy_modules(args, cwd: str):
+    """Módulos pesados que quedan cargados tras correr el comando en el mismo intérprete."""
+    code = (f"import sys; sys.argv = ['main.py'] + {args!r}; sys.path.insert(0, {ROOT!r}); import main; "
+            f"main.main(); print('cargados:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=cwd)
+    if out.returncode != 0:
+        return ["error"]
+    loaded = out.stdout.strip().splitlines()[-1].split(":", 1)[1]
+    return [m for m in loaded.split(",") if m]
+
+
+def _seed_checkpoints(work_dir: str, tickers, rows: int):
+    """Checkpoints de backtests sintéticos en `work_dir` (las rutas relativas de CONFIG)."""
+    from src.indicators import apply_indicators
+    from src import strategy
+
+    CONFIG.BACKTEST_CHECKPOINT_DIR = os.path.join(work_dir, CONFIG.BACKTEST_CHECKPOINT_DIR)
+    for i, ticker in enumerate(tickers):
+        strategy.run_backtest_incremental(apply_indicators(make_ohlcv(rows, seed=i)), ticker)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=101, help="Tickers con checkpoint en el directorio de prueba")
+    parser.add_argument("--query", type=int, default=3, help="Tickers que consulta `signals`")
+    parser.add_argument("--rows", type=int, default=750)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tickers = [ticker_name(i) for i in range(args.tickers)]
+    query = ["signals"] + tickers[:args.query]
+    tmp = tempfile.mkdtemp(prefix="nerv_bench_cli_")
+    try:
+        _seed_checkpoints(tmp, tickers, args.rows)
+        imports = {module: _import_seconds(module, args.repeat)
+                   for module in ("main", "src.latest_signals", "src.pipeline", "pandas", "yfinance")}
+        commands = {
+            "main.py --help": _command_seconds(["--help"], tmp, args.repeat),
+            f"main.py {' '.join(query)}": _command_seconds(query, tmp, args.repeat),
+            "main.py signals (todos)": _command_seconds(["signals"] + tickers, tmp, args.repeat),
+        }
+        heavy = _loaded_heavy_modules(query, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"Importación en frío (mediana de {args.repeat}):")
+    for module, seconds in imports.items():
+        print(f"  {module:<22} {seconds * 1000:>8.1f} ms")
+    print("Comandos (proceso completo):")
+    for command, seconds in commands.items():
+        print(f"  {command:<40} {seconds * 1000:>8.1f} ms")
+    print(f"Módulos pesados cargados por `signals`: {', '.join(heavy) if heavy else 'ninguno'}")
+    sys.exit(1 if heavy else 0)
+
+
+if __name__ == "__main__":
+    main()
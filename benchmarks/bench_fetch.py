@@ -0,0 +1,56 @@
+"""
+Mide el throughput de la capa asíncrona de descargas contra el servidor falso local,
+y cuántas respuestas 429 provoca según la concurrencia y el token bucket configurados.
+
+Uso: python -m benchmarks.bench_fetch [--tickers 101] [--latency 0.05] [--server-limit 20]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONFIG
+from benchmarks.fake_quote_server import start_fake_server
+from src.async_fetch import AsyncFetcher, load_data_async
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=101)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-limit", type=float, default=20.0, help="Peticiones/s que tolera el servidor")
+    parser.add_argument("--concurrency", type=int, default=CONFIG.FETCH_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=CONFIG.FETCH_RATE_PER_SECOND)
+    parser.add_argument("--burst", type=float, default=CONFIG.FETCH_RATE_BURST)
+    args = parser.parse_args()
+
+    server = start_fake_server(latency=args.latency, error_rate=args.error_rate, rate_limit=args.server_limit)
+    CONFIG.CACHE_DIR = tempfile.mkdtemp(prefix="nerv_bench_fetch_")
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    try:
+        fetcher_args = dict(base_url=server.base_url, concurrency=args.concurrency, rate=args.rate, burst=args.burst)
+
+        async def run():
+            fetcher = AsyncFetcher(**fetcher_args)
+            t0 = time.perf_counter()
+            data = await load_data_async(tickers, fetcher=fetcher)
+            return data, fetcher.stats, time.perf_counter() - t0
+
+        data, stats, elapsed = asyncio.run(run())
+    finally:
+        server.shutdown()
+        shutil.rmtree(CONFIG.CACHE_DIR, ignore_errors=True)
+
+    loaded = sum(1 for df in data.values() if not df.empty)
+    print(f"{loaded}/{len(tickers)} tickers en {elapsed:.2f}s ({loaded / elapsed:.1f} tickers/s)")
+    print(f"Cliente: {stats}")
+    print(f"Servidor: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
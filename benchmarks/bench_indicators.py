@@ -0,0 +1,98 @@
+"""
+Mide el tiempo por ticker de los indicadores nativos (src.native_indicators) frente a
+pandas_ta (si está instalado), el del modo por lotes, el error del modo float32 y el costo de
+importar cada motor. Usa datos sintéticos y, si existen, los tickers del caché local.
+
+La paridad con pandas_ta se verifica en tests/test_indicators.py.
+
+Uso: python -m benchmarks.bench_indicators [--synthetic 50] [--rows 750] [--no-cache]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONFIG
+from benchmarks.synthetic import make_ohlcv
+from src.cache_store import get_cache_store
+from src.native_indicators import fused_indicators, fused_indicators_batch
+
+
+def _datasets(synthetic: int, rows: int, use_cache: bool):
+    for seed in range(synthetic):
+        yield f"SYN{seed:03d}", make_ohlcv(rows, seed=seed)
+    if use_cache:
+        store = get_cache_store()
+        for key in store.keys():
+            yield key, store.read(key)
+
+
+def _import_seconds(module: str) -> float:
+    """Tiempo de importar `module` en un intérprete nuevo (lo que paga cada arranque del contenedor)."""
+    code = f"import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=root)
+    return float(out.stdout.strip()) if out.returncode == 0 else float("nan")
+
+
+def _ta_seconds(ta, df) -> float:
+    """Tiempo de pandas_ta para el RSI y las tres SMAs de CONFIG."""
+    t0 = time.perf_counter()
+    ta.rsi(df['Close'], length=CONFIG.RSI_PARAMS['period'])
+    for key in ('short', 'medium', 'long'):
+        ta.sma(df['Close'], length=CONFIG.SMA_PERIODS[key])
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=750)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        import pandas_ta as ta
+    except ImportError:
+        ta = None
+        print("pandas_ta no está instalado: solo se mide el motor nativo.")
+
+    datasets = list(_datasets(args.synthetic, args.rows, not args.no_cache))
+    closes = [df['Close'].to_numpy(dtype=np.float64) for _, df in datasets]
+    # Compilar los kernels antes de medir
+    fused_indicators(closes[0])
+    fused_indicators_batch(closes[:1])
+
+    t_ta = t_native = 0.0
+    for (_, df), close in zip(datasets, closes):
+        t0 = time.perf_counter()
+        fused_indicators(close)
+        t_native += time.perf_counter() - t0
+        if ta is not None:
+            t_ta += _ta_seconds(ta, df)
+
+    t0 = time.perf_counter()
+    fused_indicators_batch(closes)
+    t_batch = time.perf_counter() - t0
+
+    f32 = fused_indicators(closes[0], dtype=np.float32)['RSI']
+    f64 = fused_indicators(closes[0])['RSI']
+    f32_error = np.nanmax(np.abs(f32 - f64)) if np.isfinite(f64).any() else 0.0
+
+    print(f"Tickers medidos: {len(datasets)}")
+    if ta is not None:
+        print(f"pandas_ta {ta.version}: {t_ta * 1000:.1f} ms - Nativo: {t_native * 1000:.1f} ms "
+              f"({t_ta / t_native:.0f}x) - Lote: {t_batch * 1000:.1f} ms")
+    else:
+        print(f"Nativo: {t_native * 1000:.1f} ms - Lote: {t_batch * 1000:.1f} ms")
+    print(f"Error máximo del RSI en float32: {f32_error:.2e}")
+    print(f"Importación: pandas_ta {_import_seconds('pandas_ta'):.2f} s - "
+          f"src.native_indicators {_import_seconds('src.native_indicators'):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
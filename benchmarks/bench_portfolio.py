@@ -0,0 +1,83 @@
+"""
+Mide la simulación de portafolio con capital compartido (src.portfolio) sobre un universo
+sintético grande: miles de tickers con décadas de barras diarias y fechas de inicio
+escalonadas (historiales de distinto largo sobre el eje común).
+
+Antes verifica la paridad con el backtest por ticker: un portafolio de un solo ticker con el
+capital y el tamaño de posición de BACKTEST_* y sin límites adicionales debe reproducir el
+valor final y el ledger de run_backtest.
+
+Uso: python -m benchmarks.bench_portfolio [--tickers 3000] [--years 30] [--parity 20] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONFIG
+from benchmarks.synthetic import TRADING_DAYS_PER_YEAR, make_ohlcv, ticker_name
+from src.indicators import apply_indicators
+from src.portfolio import align_universe, run_portfolio
+from src.strategy import run_backtest
+
+
+def _parity(n_series: int, rows: int) -> int:
+    """Tickers cuyo portafolio individual no coincide con run_backtest."""
+    mismatches = 0
+    for seed in range(n_series):
+        df = apply_indicators(make_ohlcv(rows, seed=seed))
+        expected = run_backtest(df, f"P{seed}")
+        summary = run_portfolio({f"P{seed}": df}, capital=CONFIG.BACKTEST_CAPITAL_INICIAL,
+                                position_pct=CONFIG.BACKTEST_TAMANO_POSICION_PCT, max_position_pct=1.0,
+                                max_exposure_pct=1.0, sizing="initial", min_order=0.0)
+        same_ledger = np.array_equal(summary['History'].records, expected['History'].records)
+        if not same_ledger or not np.isclose(summary['Valor Final'], expected['Capital Final'], rtol=0, atol=1e-6):
+            mismatches += 1
+    return mismatches
+
+
+def _universe(n_tickers: int, years: int):
+    """Series con inicios escalonados: el ticker i empieza i % 10 años después del primero."""
+    rows = years * TRADING_DAYS_PER_YEAR
+    return {ticker_name(i): make_ohlcv(rows - (i % 10) * TRADING_DAYS_PER_YEAR, seed=i, end="2024-12-31")
+            for i in range(n_tickers)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--parity", type=int, default=20, help="Series de la verificación de paridad")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    mismatches = _parity(args.parity, 2500)
+    print(f"Paridad con run_backtest (un ticker): {args.parity - mismatches}/{args.parity} idénticos")
+
+    datasets = _universe(args.tickers, args.years)
+    bars = sum(len(df) for df in datasets.values())
+    t0 = time.perf_counter()
+    aligned = align_universe(datasets)
+    align_seconds = time.perf_counter() - t0
+
+    samples = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        summary = run_portfolio(datasets)
+        samples.append(time.perf_counter() - t0)
+    print(f"{args.tickers} tickers x {len(aligned['dates'])} fechas ({bars / 1e6:.1f} M barras), "
+          f"{summary['Compras']} compras / {summary['Ventas']} ventas, "
+          f"{summary['Compras sin Fondos']} sin fondos")
+    print(f"  alineación + indicadores  {align_seconds:>8.2f} s")
+    print(f"  simulación completa       {statistics.median(samples):>8.2f} s (mediana de {args.repeat})")
+    print(f"  rendimiento {summary['Rendimiento (%)']:+.2f}%, drawdown máximo {summary['Drawdown Máximo (%)']:.2f}%, "
+          f"exposición máxima {summary['Exposición Máxima (%)']:.1f}%")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
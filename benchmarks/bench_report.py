@@ -0,0 +1,86 @@
+"""
+Mide el render del informe de backtesting con el caché de secciones (src.report_render) sobre
+un universo sintético grande: en frío, sin cambios entre ciclos y con una fracción de tickers
+cuyo resultado cambió. Verifica que el texto sea idéntico al renderizado sin caché.
+
+Uso: python -m benchmarks.bench_report [--tickers 2000] [--rows 2500] [--changed 0.1] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_ohlcv, ticker_name
+from src.indicators import apply_indicators
+from src.report_render import SectionCache, render_backtest_report, write_atomic
+from src.strategy import run_backtest
+
+# Series distintas que se reparten entre los tickers (simular miles de backtests no es lo medido)
+_BASE_SERIES = 40
+
+
+def _results(n_tickers: int, rows: int):
+    base = [run_backtest(apply_indicators(make_ohlcv(rows, seed=seed)), f"B{seed}") for seed in range(_BASE_SERIES)]
+    return [dict(base[i % _BASE_SERIES], Ticker=ticker_name(i)) for i in range(n_tickers)]
+
+
+def _timeit(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=2500)
+    parser.add_argument("--changed", type=float, default=0.1, help="Fracción de tickers que cambian por ciclo")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = _results(args.tickers, args.rows)
+    operations = sum(len(res['History']) for res in results)
+    generated_at = "2024-01-01 00:00:00"
+    path = os.path.join(tempfile.mkdtemp(prefix="nerv_bench_report_"), "informe.md")
+
+    def cycle(cache: SectionCache, batch):
+        write_atomic(path, render_backtest_report(batch, generated_at, cache=cache))
+
+    uncached = _timeit(lambda: cycle(SectionCache(max_bytes=0), results), args.repeat)
+    cold = _timeit(lambda: cycle(SectionCache(), results), args.repeat)
+    cache = SectionCache()
+    cycle(cache, results)
+    warm = _timeit(lambda: cycle(cache, results), args.repeat)
+
+    # Cada repetición cambia otra fracción de tickers (un nuevo cierre en sus resultados)
+    step = max(1, int(1 / args.changed)) if args.changed > 0 else len(results) + 1
+    counter = iter(range(1, args.repeat + 1))
+
+    def changed_cycle():
+        shift = next(counter)
+        batch = [dict(res, **{'Capital Final': res['Capital Final'] + shift}) if i % step == 0 else res
+                 for i, res in enumerate(results)]
+        cycle(cache, batch)
+
+    changed = _timeit(changed_cycle, args.repeat)
+
+    identical = render_backtest_report(results, generated_at, cache=cache) == \
+        render_backtest_report(results, generated_at, cache=SectionCache(max_bytes=0))
+    print(f"{args.tickers} tickers, {operations} operaciones, informe de {os.path.getsize(path) / 1e6:.1f} MB "
+          f"(mediana de {args.repeat})")
+    print(f"  sin caché          {uncached * 1000:>8.1f} ms")
+    print(f"  caché en frío      {cold * 1000:>8.1f} ms")
+    print(f"  sin cambios        {warm * 1000:>8.1f} ms")
+    print(f"  {args.changed:.0%} cambiados     {changed * 1000:>8.1f} ms")
+    print(f"Texto idéntico al render sin caché: {'sí' if identical else 'NO'}")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
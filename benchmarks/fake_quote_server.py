@@ -0,0 +1,141 @@
+"""
+Servidor HTTP local que imita el endpoint chart de Yahoo (/v8/finance/chart/{ticker})
+con datos OHLCV sintéticos. Permite probar y medir la capa asíncrona de descargas sin red,
+incluyendo latencia artificial, errores 5xx aleatorios y un rate limit que responde 429.
+
+Uso: python -m benchmarks.fake_quote_server [--port 8765] [--latency 0.05] [--rate-limit 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_ohlcv
+
+
+class FakeQuoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, rows: int = 3000, seed: int = 0):
+        super().__init__(address, _ChartHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # peticiones por segundo permitidas (0 = sin límite)
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.frames = {}
+        self.lock = threading.Lock()
+        self.window = []
+        self.stats = {"requests": 0, "served": 0, "rate_limited": 0, "errors": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def frame(self, ticker: str):
+        with self.lock:
+            if ticker not in self.frames:
+                self.frames[ticker] = make_ohlcv(self.rows, seed=zlib.crc32(ticker.encode()),
+                                                 end=time.strftime("%Y-%m-%d"))
+            return self.frames[ticker]
+
+    def admit(self) -> bool:
+        """Rate limit por ventana deslizante de 1 segundo."""
+        with self.lock:
+            self.stats["requests"] += 1
+            if not self.rate_limit:
+                return True
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 1.0]
+            if len(self.window) >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return False
+            self.window.append(now)
+            return True
+
+
+class _ChartHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 4 or parts[:3] != ["v8", "finance", "chart"]:
+            self._send(404, b'{"chart": {"result": null, "error": "not found"}}')
+            return
+        if not server.admit():
+            self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.random.random() < server.error_rate:
+            with server.lock:
+                server.stats["errors"] += 1
+            self._send(503, b"Service Unavailable")
+            return
+
+        query = parse_qs(url.query)
+        period1 = int(query.get("period1", ["0"])[0])
+        period2 = int(query.get("period2", [str(int(time.time()))])[0])
+        df = server.frame(parts[3])
+        epochs = df.index.values.astype("datetime64[s]").astype("int64") + 14 * 3600 + 30 * 60  # ~09:30 NY en UTC
+        mask = (epochs >= period1) & (epochs <= period2)
+        sub = df[mask]
+        payload = {"chart": {"result": [{
+            "meta": {"symbol": parts[3], "exchangeTimezoneName": "America/New_York"},
+            "timestamp": epochs[mask].tolist(),
+            "indicators": {
+                "quote": [{
+                    "open": sub["Open"].tolist(), "high": sub["High"].tolist(), "low": sub["Low"].tolist(),
+                    "close": sub["Close"].tolist(), "volume": sub["Volume"].tolist(),
+                }],
+                "adjclose": [{"adjclose": sub["Close"].tolist()}],
+            },
+        }], "error": None}}
+        with server.lock:
+            server.stats["served"] += 1
+        self._send(200, json.dumps(payload).encode())
+
+
+def start_fake_server(port: int = 0, **kwargs) -> FakeQuoteServer:
+    """Levanta el servidor en un hilo de fondo y lo retorna (usar .base_url y .shutdown())."""
+    server = FakeQuoteServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeQuoteServer(("127.0.0.1", args.port), latency=args.latency,
+                             error_rate=args.error_rate, rate_limit=args.rate_limit)
+    print(f"Servidor falso escuchando en {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
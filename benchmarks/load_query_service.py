@@ -0,0 +1,157 @@
+"""
+Prueba de carga del servicio de consultas (src.query_service) en local.
+
+Levanta el servicio con índices construidos desde backtests sintéticos (o apunta a un daemon
+ya corriendo con --url) y lo consulta desde varios hilos con conexiones persistentes, como
+lo harían varios paneles. Una fracción de las peticiones es condicional (If-None-Match con el
+ETag recibido antes) y, opcionalmente, los índices se refrescan durante la prueba.
+
+Uso: python -m benchmarks.load_query_service [--clients 16] [--seconds 10] [--conditional 0.8]
+     python -m benchmarks.load_query_service --url http://127.0.0.1:8787
+"""
+import argparse
+import http.client
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_ohlcv, ticker_name
+from src.indicators import apply_indicators
+from src.query_service import QueryIndex, start_query_service
+from src.strategy import run_backtest
+
+
+def _synthetic_index(n_tickers: int, rows: int, signals: int) -> QueryIndex:
+    results = []
+    for i in range(n_tickers):
+        ticker = ticker_name(i)
+        result = run_backtest(apply_indicators(make_ohlcv(rows, seed=i)), ticker)
+        if result:
+            results.append(result)
+    rng = random.Random(0)
+    log = [{'Ticker': rng.choice(results)['Ticker'], 'Acción': rng.choice(['Compra', 'Venta']),
+            'Precio': round(rng.uniform(10, 500), 2), 'Motivo': 'sintético',
+            'Fecha': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", 'processed_at': None}
+           for _ in range(signals)]
+    index = QueryIndex()
+    index.refresh(results, log[-10:], signal_log=log, generated_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+    return index
+
+
+def _paths(tickers, rng: random.Random) -> str:
+    ticker = rng.choice(tickers)
+    return rng.choice([
+        "/summary",
+        "/signals/latest",
+        f"/signals?offset={rng.randrange(0, 500, 50)}",
+        f"/signals?ticker={ticker}",
+        f"/backtests?sort=rendimiento&order=desc&offset={rng.randrange(0, len(tickers), 25)}&limit=25",
+        f"/tickers/{ticker}",
+        f"/tickers/{ticker}/trades",
+    ])
+
+
+def _client(base_url: str, tickers, seconds: float, conditional: float, seed: int, out: dict, lock):
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    rng = random.Random(seed)
+    etags = {}
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        path = _paths(tickers, rng)
+        headers = {}
+        if path in etags and rng.random() < conditional:
+            headers['If-None-Match'] = etags[path]
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            statuses['error'] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - t0)
+        statuses[response.status] += 1
+        if response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+    with lock:
+        out['latencies'].extend(latencies)
+        out['statuses'].update(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Servicio ya corriendo (si no, se levanta uno sintético)")
+    parser.add_argument("--tickers", type=int, default=101)
+    parser.add_argument("--rows", type=int, default=750)
+    parser.add_argument("--signals", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--conditional", type=float, default=0.8, help="Fracción de peticiones con If-None-Match")
+    parser.add_argument("--refresh-every", type=float, default=0.0,
+                        help="Refrescar los índices cada N segundos durante la prueba (0 = nunca)")
+    args = parser.parse_args()
+
+    server = index = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        tickers = [ticker_name(i) for i in range(args.tickers)]
+    else:
+        index = _synthetic_index(args.tickers, args.rows, args.signals)
+        server = start_query_service(index, host="127.0.0.1", port=0)
+        base_url = server.base_url
+        tickers = list(index.snapshot.by_ticker)
+
+    stop = threading.Event()
+    refreshes = 0
+    if index is not None and args.refresh_every > 0:
+        def refresher():
+            nonlocal refreshes
+            while not stop.wait(args.refresh_every):
+                snapshot = index.snapshot
+                results = [dict(row, History=snapshot.histories[row['Ticker']]) for row in snapshot.backtests]
+                index.refresh(results, snapshot.latest_signals, signal_log=list(reversed(snapshot.signal_log)))
+                refreshes += 1
+        threading.Thread(target=refresher, daemon=True).start()
+
+    out = {'latencies': [], 'statuses': Counter()}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=_client, args=(base_url, tickers, args.seconds, args.conditional, i, out, lock))
+               for i in range(args.clients)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    if server is not None:
+        server.shutdown()
+
+    latencies = sorted(out['latencies'])
+    total = len(latencies)
+    if not total:
+        print("Sin respuestas del servicio.")
+        sys.exit(1)
+    quantiles = statistics.quantiles(latencies, n=100) if total > 1 else latencies * 99
+    print(f"{total} peticiones en {elapsed:.1f}s con {args.clients} clientes ({total / elapsed:.0f} req/s)")
+    print(f"Latencia: p50 {quantiles[49] * 1000:.2f} ms - p95 {quantiles[94] * 1000:.2f} ms - "
+          f"p99 {quantiles[98] * 1000:.2f} ms - máx {latencies[-1] * 1000:.2f} ms")
+    print(f"Respuestas: {dict(sorted(out['statuses'].items(), key=str))}"
+          + (f" - refrescos de índices: {refreshes}" if refreshes else ""))
+    sys.exit(1 if out['statuses'].get('error') or any(str(s).startswith('5') for s in out['statuses']) else 0)
+
+
+if __name__ == "__main__":
+    main()
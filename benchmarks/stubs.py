@@ -0,0 +1,64 @@
+"""Reemplazos offline de yfinance para los benchmarks."""
+import contextlib
+import sys
+import types
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from benchmarks.synthetic import TRADING_DAYS_PER_YEAR, make_ohlcv, ticker_seed
+
+
+class SyntheticDownloader:
+    """
+    Imita yf.download con datos sintéticos deterministas: mismo contrato de argumentos y
+    columnas MultiIndex (Ticker, Price) con group_by='ticker', (Price, Ticker) si no.
+    """
+
+    def __init__(self, years: float = 2, seed: int = 0, end: Optional[str] = None):
+        self.rows = max(2, int(years * TRADING_DAYS_PER_YEAR))
+        self.seed = seed
+        self.end = end or pd.Timestamp.now().strftime("%Y-%m-%d")
+        self.calls = 0
+        self._frames = {}
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        if ticker not in self._frames:
+            s = ticker_seed(ticker, self.seed)
+            self._frames[ticker] = make_ohlcv(self.rows, seed=s, start_price=20.0 + (s % 480), end=self.end)
+        return self._frames[ticker]
+
+    def __call__(self, tickers: Union[str, List[str]], start: Optional[str] = None, interval: str = "1d",
+                 group_by: str = "column", **kwargs) -> pd.DataFrame:
+        self.calls += 1
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        parts = {}
+        for sym in symbols:
+            df = self.frame(sym)
+            parts[sym] = df[df.index >= pd.Timestamp(start)] if start else df
+        out = pd.concat(parts, axis=1, names=["Ticker", "Price"])
+        if group_by != "ticker":
+            out = out.swaplevel(0, 1, axis=1)
+        return out
+
+
+@contextlib.contextmanager
+def stub_yfinance(downloader: SyntheticDownloader):
+    """
+    Reemplaza yf.download por `downloader` mientras dura el bloque. Si yfinance no está
+    instalado, registra un módulo falso para que src.data_loader pueda importarse.
+    """
+    module = sys.modules.get("yfinance")
+    if module is None:
+        try:
+            import yfinance as module
+        except ImportError:
+            module = types.ModuleType("yfinance")
+            sys.modules["yfinance"] = module
+    original = getattr(module, "download", None)
+    module.download = downloader
+    try:
+        yield downloader
+    finally:
+        if original is not None:
+            module.download = original
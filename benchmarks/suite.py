@@ -0,0 +1,313 @@
+"""
+Suite de benchmarks offline de NERV con compuertas de regresión.
+
+Mide cada etapa del pipeline sobre un universo sintético (yfinance reemplazado por
+benchmarks.stubs, sin red) y guarda los tiempos en un JSON de baseline:
+
+    load_data_cold        descarga inicial + escritura del caché (load_data_batch)
+    load_data_warm        lectura del caché ya al día
+    apply_indicators      RSI + SMAs (motor de CONFIG.INDICATORS_ENGINE) sobre todos los tickers
+    run_backtest          backtest completo de todos los tickers
+    generate_markdown_report
+    append_signals_to_json  con un log previo de --history señales
+    main_cycle_cold       un ciclo completo de main (run_cycle) con caché vacío
+    main_cycle_warm       un segundo ciclo (caché, indicadores y checkpoints al día)
+
+Uso:
+    python -m benchmarks run --tickers 100 --years 2 --output baseline.json
+    python -m benchmarks compare --baseline baseline.json --threshold 0.2
+    python -m benchmarks compare --baseline baseline.json --current actual.json
+
+`compare` falla (código 1) si alguna etapa supera al baseline en más de `--threshold`
+(fracción) y además en más de `--min-delta` segundos, para no fallar por ruido en
+etapas de milisegundos.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONFIG
+from benchmarks.stubs import SyntheticDownloader, stub_yfinance
+from benchmarks.synthetic import ticker_name
+
+STAGES = [
+    "load_data_cold",
+    "load_data_warm",
+    "apply_indicators",
+    "run_backtest",
+    "generate_markdown_report",
+    "append_signals_to_json",
+    "main_cycle_cold",
+    "main_cycle_warm",
+]
+
+SUITE_FORMAT_VERSION = 1
+
+
+@contextlib.contextmanager
+def _isolated_config(work_dir: str, tickers: List[str], workers: int):
+    """Apunta todas las rutas de CONFIG a `work_dir` y restaura los valores al salir."""
+    overrides = {
+        "TICKERS": tickers,
+        "CACHE_DIR": os.path.join(work_dir, "cache"),
+        "INDICATOR_CACHE_DIR": os.path.join(work_dir, "cache", "indicators"),
+        "BACKTEST_CHECKPOINT_DIR": os.path.join(work_dir, "cache", "checkpoints"),
+        "REPORT_PATH": os.path.join(work_dir, "informe_nerv_backtest.md"),
+        "SIGNAL_REPORT_PATH": os.path.join(work_dir, "senales_nerv_hoy.md"),
+        "SIGNALS_JSON_LOG": os.path.join(work_dir, "nerv_signals_log.json"),
+        "SIGNALS_DB_PATH": os.path.join(work_dir, "nerv_signals.db"),
+        "METRICS_PATH": os.path.join(work_dir, "metrics", "nerv.prom"),
+        "PROFILE_TRIGGER_FILE": None,
+        "FETCH_MODE": "batch",
+        "DOWNLOAD_CHUNK_PAUSE_SECONDS": 0,
+        "PIPELINE_WORKERS": workers,
+    }
+    previous = {name: getattr(CONFIG, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(CONFIG, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(CONFIG, name, value)
+
+
+def _reset_dir(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def _measure(fn: Callable[[], object], setup: Optional[Callable[[], None]] = None, repeat: int = 1) -> Dict:
+    """Ejecuta `setup` (sin medir) y `fn` (medido) `repeat` veces. Reporta el mínimo y la mediana."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {"seconds": samples[0], "median": samples[len(samples) // 2], "samples": samples}
+
+
+def _seed_signal_history(n: int):
+    """Precarga el log histórico con `n` señales antiguas (el caso de un log de meses)."""
+    if n <= 0:
+        return
+    from src.signal_store import SignalStore
+    start = datetime.date(2000, 1, 3)
+    signals = [{
+        "Ticker": ticker_name(i % 500),
+        "Acción": "Compra" if i % 2 else "Venta",
+        "Precio": 100.0 + i % 97,
+        "Motivo": "Señal histórica sintética",
+        "Fecha": (start + datetime.timedelta(days=i // 500)).isoformat(),
+    } for i in range(n)]
+    with SignalStore(CONFIG.SIGNALS_DB_PATH) as store:
+        store.add(signals, processed_at="2000-01-01 00:00:00")
+        store.export_legacy_json(CONFIG.SIGNALS_JSON_LOG, limit=CONFIG.SIGNALS_JSON_EXPORT_LIMIT)
+
+
+def run_suite(n_tickers: int = 100, years: float = 2, seed: int = 0, repeat: int = 1, workers: int = 1,
+              history: int = 10000, stages: Optional[List[str]] = None, work_dir: Optional[str] = None) -> Dict:
+    """Corre las etapas indicadas (todas por defecto) y retorna el resultado serializable."""
+    stages = stages or STAGES
+    tickers = [ticker_name(i) for i in range(n_tickers)]
+    downloader = SyntheticDownloader(years=years, seed=seed)
+    # Generar las series antes de medir: el tiempo de load_data no incluye al generador
+    for ticker in tickers:
+        downloader.frame(ticker)
+
+    owns_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="nerv_bench_")
+    results = {}
+    try:
+        with stub_yfinance(downloader), _isolated_config(work_dir, tickers, workers):
+            # Imports diferidos: src.data_loader importa yfinance (ya reemplazado)
+            from src import pipeline
+            from src.data_loader import load_data_batch
+            from src.indicators import apply_indicators
+            from src.strategy import run_backtest
+
+            from src.hot_cache import hot_dataset
+
+            def cold_cache():
+                _reset_dir(work_dir)
+                hot_dataset.clear()
+
+            datasets = {}
+
+            def load():
+                datasets.update(load_data_batch(tickers, period="3y", interval="1d", downloader=downloader))
+
+            if "load_data_cold" in stages:
+                results["load_data_cold"] = _measure(load, setup=cold_cache, repeat=repeat)
+            if not datasets or "load_data_warm" in stages:
+                if not datasets:
+                    cold_cache()
+                    load()
+                results["load_data_warm"] = _measure(load, repeat=repeat)
+
+            enriched = {}
+
+            def indicators():
+                for ticker in tickers:
+                    enriched[ticker] = apply_indicators(datasets[ticker].copy())
+
+            if "apply_indicators" in stages or set(stages) & {"run_backtest", "generate_markdown_report",
+                                                               "append_signals_to_json"}:
+                timing = _measure(indicators, repeat=repeat)
+                if "apply_indicators" in stages:
+                    results["apply_indicators"] = timing
+
+            backtests = []
+
+            def backtest():
+                backtests[:] = [r for r in (run_backtest(enriched[t], t) for t in tickers) if r]
+
+            if "run_backtest" in stages or set(stages) & {"generate_markdown_report", "append_signals_to_json"}:
+                timing = _measure(backtest, repeat=repeat)
+                if "run_backtest" in stages:
+                    results["run_backtest"] = timing
+
+            if "generate_markdown_report" in stages:
+                results["generate_markdown_report"] = _measure(
+                    lambda: pipeline.generate_markdown_report(backtests, CONFIG.REPORT_PATH), repeat=repeat)
+
+            if "append_signals_to_json" in stages:
+                signals = pipeline.generate_signals_report(backtests, CONFIG.SIGNAL_REPORT_PATH)
+
+                def seeded_log():
+                    for path in (CONFIG.SIGNALS_DB_PATH, CONFIG.SIGNALS_JSON_LOG):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    _seed_signal_history(history)
+
+                results["append_signals_to_json"] = _measure(
+                    lambda: pipeline.append_signals_to_json(signals, CONFIG.SIGNALS_JSON_LOG),
+                    setup=seeded_log, repeat=repeat)
+
+            if "main_cycle_cold" in stages:
+                results["main_cycle_cold"] = _measure(pipeline.run_cycle, setup=cold_cache, repeat=repeat)
+            if "main_cycle_warm" in stages:
+                if "main_cycle_cold" not in stages:
+                    cold_cache()
+                    pipeline.run_cycle()
+                results["main_cycle_warm"] = _measure(pipeline.run_cycle, repeat=repeat)
+    finally:
+        if owns_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "version": SUITE_FORMAT_VERSION,
+        "created_at": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "params": {"tickers": n_tickers, "years": years, "seed": seed, "repeat": repeat,
+                   "workers": workers, "history": history},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "stages": {name: results[name] for name in STAGES if name in results and name in stages},
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float, min_delta: float) -> List[str]:
+    """Retorna las etapas que regresaron respecto al baseline (y muestra la tabla comparativa)."""
+    if baseline.get("params") != current.get("params"):
+        print(f"Aviso: parámetros distintos al baseline ({baseline.get('params')} vs {current.get('params')})")
+    regressions = []
+    print(f"{'Etapa':<26}{'Baseline (s)':>14}{'Actual (s)':>14}{'Cambio':>10}")
+    for name in STAGES:
+        if name not in baseline["stages"] or name not in current["stages"]:
+            continue
+        base = baseline["stages"][name]["seconds"]
+        now = current["stages"][name]["seconds"]
+        change = (now - base) / base if base > 0 else 0.0
+        regressed = change > threshold and now - base > min_delta
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<26}{base:>14.4f}{now:>14.4f}{change:>+9.1%}{'  REGRESIÓN' if regressed else ''}")
+    return regressions
+
+
+def _print_results(result: Dict):
+    print(f"{'Etapa':<26}{'Mínimo (s)':>12}{'Mediana (s)':>13}")
+    for name, timing in result["stages"].items():
+        print(f"{name:<26}{timing['seconds']:>12.4f}{timing['median']:>13.4f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_run_args(p):
+        p.add_argument("--tickers", type=int, default=100, help="Tickers sintéticos (100 a 10.000)")
+        p.add_argument("--years", type=float, default=2, help="Años de historia por ticker (2 a 30)")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--repeat", type=int, default=1, help="Repeticiones por etapa (se reporta el mínimo)")
+        p.add_argument("--workers", type=int, default=1, help="PIPELINE_WORKERS para el ciclo completo")
+        p.add_argument("--history", type=int, default=10000, help="Señales previas en el log histórico")
+        p.add_argument("--stages", nargs="*", choices=STAGES, default=None)
+
+    run = sub.add_parser("run", help="Corre la suite y guarda los tiempos")
+    add_run_args(run)
+    run.add_argument("--output", default=None, help="Archivo JSON de salida (baseline)")
+
+    cmp_ = sub.add_parser("compare", help="Compara contra un baseline y falla si hay regresiones")
+    add_run_args(cmp_)
+    cmp_.add_argument("--baseline", required=True)
+    cmp_.add_argument("--current", default=None, help="Resultado ya medido (si no, se corre la suite)")
+    cmp_.add_argument("--threshold", type=float, default=0.20, help="Regresión tolerada (0.20 = 20%%)")
+    cmp_.add_argument("--min-delta", type=float, default=0.05, help="Diferencia mínima en segundos para fallar")
+    cmp_.add_argument("--output", default=None, help="Guardar también el resultado actual")
+    args = parser.parse_args(argv)
+
+    # Los logs INFO de cada ticker distorsionan los tiempos; solo se muestran advertencias.
+    # Se configura antes de importar src/pipeline para que su basicConfig(INFO) no tenga efecto.
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "compare":
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if args.current:
+            with open(args.current, "r") as f:
+                current = json.load(f)
+        else:
+            params = baseline.get("params", {})
+            current = run_suite(n_tickers=params.get("tickers", args.tickers), years=params.get("years", args.years),
+                                seed=params.get("seed", args.seed), repeat=args.repeat,
+                                workers=params.get("workers", args.workers),
+                                history=params.get("history", args.history),
+                                stages=args.stages or list(baseline["stages"]))
+    else:
+        current = run_suite(n_tickers=args.tickers, years=args.years, seed=args.seed, repeat=args.repeat,
+                            workers=args.workers, history=args.history, stages=args.stages)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+    if args.command == "run":
+        _print_results(current)
+        return 0
+
+    regressions = compare(baseline, current, args.threshold, args.min_delta)
+    if regressions:
+        print(f"Regresiones sobre el {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("Sin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import zlib
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(rows: int = 500, seed: int = 0, start: str = "2020-01-01", start_price: float = 100.0,
+               end: Optional[str] = None) -> pd.DataFrame:
+    """
+    Genera un DataFrame OHLCV sintético (paseo aleatorio geométrico en días hábiles).
+    Si se indica `end`, la serie termina en esa fecha en lugar de empezar en `start`.
+    """
+    rng = np.random.default_rng(seed)
+    if end is not None:
+        index = pd.bdate_range(end=end, periods=rows, name="Date")
+    else:
+        index = pd.bdate_range(start=start, periods=rows, name="Date")
+    returns = rng.normal(0.0004, 0.02, rows)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.005, rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, rows)))
+    volume = rng.integers(1_000_000, 50_000_000, rows)
+    return pd.DataFrame(
+        {"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume},
+        index=index,
+    )
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def ticker_name(i: int) -> str:
+    """Nombre determinista del ticker sintético i (SYN00000, SYN00001, ...)."""
+    return f"SYN{i:05d}"
+
+
+def ticker_seed(ticker: str, seed: int = 0) -> int:
+    """Semilla estable por ticker para que cada serie sea reproducible por separado."""
+    return (zlib.crc32(ticker.encode()) + seed * 1_000_003) % (2 ** 32)
+
+
+def make_universe(n_tickers: int = 100, years: float = 2, seed: int = 0,
+                  end: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Universo sintético de `n_tickers` series de `years` años que terminan en `end` (hoy por defecto).
+    Es un generador: con 10.000 tickers x 30 años no se materializa todo en memoria a la vez.
+    """
+    rows = max(2, int(years * TRADING_DAYS_PER_YEAR))
+    end = end or pd.Timestamp.now().strftime("%Y-%m-%d")
+    for i in range(n_tickers):
+        ticker = ticker_name(i)
+        s = ticker_seed(ticker, seed)
+        price = 20.0 + (s % 480)
+        yield ticker, make_ohlcv(rows, seed=s, start_price=price, end=end)
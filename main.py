@@ -1,238 +1,180 @@
-import os
+import argparse
 import datetime
-import logging
-import time
 import json
-from typing import List, Dict
+import logging
+import sys
+from typing import Dict, List, Optional
 
 import CONFIG
-from src.data_loader import load_data
-from src.indicators import apply_indicators
-from src.strategy import run_backtest # Now using the backtest engine
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def generate_markdown_report(results: List[Dict], report_path: str):
-    """Generates a detailed Markdown report with global aggregates and per-ticker logs."""
-    try:
-        os.makedirs(os.path.dirname(report_path), exist_ok=True)
-        
-        # Cálculos Globales
-        total_tickers = len(results)
-        total_invertido = total_tickers * CONFIG.BACKTEST_CAPITAL_INICIAL
-        capital_final_total = sum(res.get('Capital Final', 0.0) for res in results)
-        capital_heldeado_total = sum(res.get('Capital en Posición', 0.0) for res in results)
-        rendimiento_global = ((capital_final_total - total_invertido) / total_invertido) * 100 if total_invertido > 0 else 0
-        
-        tickers_ganadores = sum(1 for res in results if res.get('Rendimiento (%)', 0) > 0)
-        tickers_perdedores = sum(1 for res in results if res.get('Rendimiento (%)', 0) < 0)
-        win_rate = (tickers_ganadores / total_tickers * 100) if total_tickers > 0 else 0
-        
-        with open(report_path, "w") as f:
-            f.write("# Proyecto NERV - Informe de Backtesting Global\n\n")
-            f.write(f"**Fecha de generación:** {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            f.write("## 📊 Resumen Ejecutivo Global\n")
-            f.write("| Métrica | Valor |\n")
-            f.write("|---------|-------|\n")
-            f.write(f"| **Total Activos Analizados** | {total_tickers} |\n")
-            f.write(f"| **Inversión Inicial Total** | ${total_invertido:,.2f} |\n")
-            f.write(f"| **Valor Final de Cartera** | ${capital_final_total:,.2f} |\n")
-            f.write(f"| **Capital Actual Heldeado** | **${capital_heldeado_total:,.2f}** |\n")
-            
-            rend_global_str = f"{rendimiento_global:+.2f}%"
-            if rendimiento_global > 0: rend_global_str = f"🟢 **{rend_global_str}**"
-            elif rendimiento_global < 0: rend_global_str = f"🔴 **{rend_global_str}**"
-            
-            f.write(f"| **Rendimiento Global** | {rend_global_str} |\n")
-            f.write(f"| **Win Rate (Activos)** | {win_rate:.1f}% ({tickers_ganadores} ✅ / {tickers_perdedores} ❌) |\n\n")
-
-            f.write("--- \n\n")
-            
-            f.write("## 📈 Tabla Comparativa de Activos\n")
-            f.write("| Ticker | Ops | Capital Final | Rendimiento | Estado |\n")
-            f.write("|--------|-----|---------------|-------------|--------|\n")
-            
-            for res in results:
-                ticker = res.get('Ticker', 'N/A')
-                ops = res.get('Operaciones Creadas', 0)
-                cap = res.get('Capital Final', 0.0)
-                rend = res.get('Rendimiento (%)', 0.0)
-                estado = res.get('Estado', 'N/A')
-                
-                rend_str = f"{rend:+.2f}%"
-                if rend > 0: rend_str = f"🟢 {rend_str}"
-                elif rend < 0: rend_str = f"🔴 {rend_str}"
-                
-                f.write(f"| **{ticker}** | {ops} | ${cap:,.2f} | {rend_str} | *{estado}* |\n")
-            
-            f.write("\n---\n\n")
-            f.write("## 📝 Detalle de Operaciones\n\n")
-            
-            for res in results:
-                ticker = res.get('Ticker', 'N/A')
-                history = res.get('History', [])
-                
-                if not history:
-                    continue
-                    
-                f.write(f"### 🔍 {ticker}\n")
-                f.write("| Fecha | Acción | Monto | Precio | Motivo |\n")
-                f.write("|-------|---------|-------|--------|--------|\n")
-                for event in history:
-                    monto_str = f"${event['amount']:,.2f}"
-                    precio_str = f"${event['price']:,.2f}"
-                    f.write(f"| {event['date']} | **{event['action']}** | {monto_str} | {precio_str} | {event['reason']} |\n")
-                f.write("\n")
-                
-            f.write("\n\n*Proyecto NERV - Motor de Backtesting Detallado.*\n")
-            
-        logging.info(f"Informe generado exitosamente en {report_path}")
-    except Exception as e:
-        logging.error(f"Error al generar el informe: {e}")
-
-
-def generate_signals_report(results: List[Dict], report_path: str) -> List[Dict]:
-    """Generates a concise report with only today's BUY/SELL signals and returns them."""
-    try:
-        os.makedirs(os.path.dirname(report_path), exist_ok=True)
-        
-        # Obtener la fecha más reciente de los resultados
-        last_dates = []
-        for res in results:
-            if res.get('History'):
-                last_dates.append(res['History'][-1]['date'])
-        
-        if not last_dates:
-            logging.warning("No hay historial operativo para generar señales.")
-            return []
-
-        reference_date = max(last_dates)
-        signals = []
-        
-        for res in results:
-            history = res.get('History', [])
-            if history:
-                last_event = history[-1]
-                if last_event['date'] == reference_date:
-                    signals.append({
-                        'Ticker': res['Ticker'],
-                        'Acción': last_event['action'],
-                        'Precio': last_event['price'],
-                        'Motivo': last_event['reason'],
-                        'Fecha': last_event['date']
-                    })
-
-        with open(report_path, "w") as f:
-            f.write(f"# 🎯 Recomendaciones NERV - {reference_date}\n\n")
-            
-            if not signals:
-                f.write("No hay señales de COMPRA o VENTA detectadas para la jornada más reciente.\n")
-            else:
-                f.write("### 📢 Acciones Sugeridas\n")
-                f.write("| Ticker | Operación | Precio Ref. | Motivo Técnico |\n")
-                f.write("|--------|-----------|-------------|----------------|\n")
-                for s in signals:
-                    emoji = "🚀" if s['Acción'] == 'Compra' else "💰"
-                    f.write(f"| **{s['Ticker']}** | {emoji} **{s['Acción']}** | ${s['Precio']:,.2f} | {s['Motivo']} |\n")
-            
-            f.write("\n\n*Nota: Estas señales corresponden al estado más reciente detectado en el backtest.*")
-            
-        logging.info(f"Reporte de señales generado exitosamente en {report_path}")
-        return signals
-
-    except Exception as e:
-        logging.error(f"Error generando reporte de señales: {e}")
-        return []
-
-def append_signals_to_json(signals: List[Dict], log_path: str):
-    """Appends current signals to a historical JSON log file."""
-    if not signals:
+# Subcomandos de la CLI. Cada uno importa solo lo que usa: `signals` lee el estado persistido
+# sin cargar pandas, yfinance ni el pipeline. Sin subcomando se asume `daemon` (compatibilidad
+# con `python main.py --once` y los despliegues existentes).
+COMMANDS = ("scan", "signals", "backtest", "portfolio", "daemon")
+
+
+def _add_deployment_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--shard-index", type=int, default=None,
+                        help="Run as shard worker I of --shard-count (publishes partial results)")
+    parser.add_argument("--shard-count", type=int, default=None, help="Number of shards the universe is split into")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="Merge the shards' partial results into the reports and signal log")
+    parser.add_argument("--local-shards", type=int, default=None, metavar="N",
+                        help="Run N shard processes on this machine and merge them (single-host stand-in)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Proyecto NERV - escáner de señales RSI/SMA.")
+    commands = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+
+    scan = commands.add_parser("scan", help="Run one cycle if a new close or bar is due, then exit (cron mode)")
+    scan.add_argument("--force", action="store_true", help="Run even if no new close or bar is due")
+    _add_deployment_args(scan)
+
+    signals = commands.add_parser("signals", help="Latest signals of some tickers from the persisted state")
+    signals.add_argument("tickers", nargs="*", help="Tickers to report (all of CONFIG.TICKERS by default)")
+    signals.add_argument("--refresh", action="store_true",
+                         help="Bring these tickers up to date first (downloads new bars and simulates them)")
+    signals.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    backtest = commands.add_parser("backtest", help="Backtest some tickers and print the summary")
+    backtest.add_argument("tickers", nargs="*", help="Tickers to backtest (all of CONFIG.TICKERS by default)")
+    backtest.add_argument("--workers", type=int, default=None, help="Worker processes (CONFIG.PIPELINE_WORKERS)")
+    backtest.add_argument("--report", default=None, metavar="PATH", help="Also write the Markdown report to PATH")
+    backtest.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    portfolio = commands.add_parser("portfolio", help="Simulate the universe as one account with shared capital")
+    portfolio.add_argument("tickers", nargs="*", help="Tickers in the portfolio (all of CONFIG.TICKERS by default)")
+    portfolio.add_argument("--capital", type=float, default=None, help="Initial capital (CONFIG.PORTFOLIO_CAPITAL_INICIAL)")
+    portfolio.add_argument("--ranking", choices=("rsi", "ticker"), default=None,
+                           help="Priority of same-day buys competing for cash (CONFIG.PORTFOLIO_RANKING)")
+    portfolio.add_argument("--sizing", choices=("equity", "initial"), default=None,
+                           help="Base of each buy amount (CONFIG.PORTFOLIO_SIZING)")
+    portfolio.add_argument("--report", default=None, metavar="PATH", help="Also write the Markdown report to PATH")
+    portfolio.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    daemon = commands.add_parser("daemon", help="Scan every new close or bar, forever (default command)")
+    daemon.add_argument("--once", action="store_true",
+                        help="Run a single cycle if a new close or bar is due, then exit (cron mode)")
+    daemon.add_argument("--force", action="store_true", help="Run even if no new close or bar is due")
+    _add_deployment_args(daemon)
+    return parser
+
+
+def _deployment_cycle(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Validates the shard flags and returns (cycle, intervals) for this process' role."""
+    if args.shard_index is not None and not args.shard_count:
+        parser.error("--shard-index requiere --shard-count")
+    if args.coordinator and not args.shard_count:
+        parser.error("--coordinator requiere --shard-count")
+    from src.pipeline import cycle_for
+    return cycle_for(args.shard_index, args.shard_count, args.coordinator, args.local_shards)
+
+
+def _tickers(args: argparse.Namespace) -> List[str]:
+    return [t.upper() for t in args.tickers] if args.tickers else list(CONFIG.TICKERS)
+
+
+def _print_table(headers: List[str], rows: List[List[str]]):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for line in [headers, ["-" * w for w in widths]] + rows:
+        print("  ".join(str(cell).ljust(w) for cell, w in zip(line, widths)).rstrip())
+
+
+def _money(value: Optional[float]) -> str:
+    return "" if value is None else f"${value:,.2f}"
+
+
+def cmd_daemon(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Long-running scanner: one cycle per new close or bar (or every hour without the scheduler)."""
+    cycle, intervals = _deployment_cycle(args, parser)
+    from src.pipeline import run_daemon
+    run_daemon(cycle, intervals, once=args.once, force=args.force, serve_queries=args.shard_index is None)
+
+
+def cmd_scan(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Single scan cycle, if one is due (or --force), then exit."""
+    cycle, intervals = _deployment_cycle(args, parser)
+    from src.pipeline import run_daemon
+    run_daemon(cycle, intervals, once=True, force=args.force, serve_queries=False)
+
+
+def cmd_signals(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """
+    Today's signals of the given tickers, read from the backtest checkpoints the daemon leaves
+    behind. --refresh updates those tickers first (heavy path: data, indicators, backtest).
+    """
+    tickers = _tickers(args)
+    if args.refresh:
+        from src.pipeline import analyze_tickers
+        analyze_tickers(tickers)
+    from src.latest_signals import latest_signals
+    rows = latest_signals(tickers)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
         return
-        
-    try:
-        history = []
-        if os.path.exists(log_path):
-            with open(log_path, 'r') as f:
-                try:
-                    history = json.load(f)
-                except json.JSONDecodeError:
-                    history = []
-        
-        # Agregar nuevas señales con timestamp de procesamiento
-        now_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        for s in signals:
-            entry = s.copy()
-            entry['processed_at'] = now_str
-            # Evitar duplicados exactos si el cron corre varias veces el mismo día
-            if not any(h['Ticker'] == entry['Ticker'] and h['Fecha'] == entry['Fecha'] and h['Acción'] == entry['Acción'] for h in history):
-                history.append(entry)
-            
-        # Mantener solo las últimas 1000 entradas
-        history = history[-1000:]
-        
-        with open(log_path, 'w') as f:
-            json.dump(history, f, indent=4)
-            
-        logging.info(f"Señales históricas guardadas en {log_path}")
-    except Exception as e:
-        logging.error(f"Error guardando señales en JSON: {e}")
-
-
-def main():
-    while True:
-        try:
-            logging.info("--- Iniciando ciclo de escaneo NERV ---")
-            
-            results = []
-            
-            for ticker in CONFIG.TICKERS:
-                df = load_data(ticker, period="3y", interval="1d")
-                
-                if df.empty:
-                    logging.warning(f"Omitiendo {ticker} por falta de datos.")
-                    continue
-                    
-                # 1. Agregar Indicadores (RSI y SMAs)
-                df = apply_indicators(df)
-                
-                # 2. Correr Backtest sobre los históricos
-                try:
-                     resultado_ticker = run_backtest(df, ticker)
-                     if resultado_ticker:
-                          results.append(resultado_ticker)
-                except Exception as e:
-                     logging.error(f"Error procesando backtest para {ticker}: {e}")
-            
-            if results:
-                # Generar nombres con fecha para el historial
-                today_str = datetime.datetime.now().strftime('%Y-%m-%d')
-                
-                # Informe de Backtest con fecha (Auditoría visual)
-                base_report, ext_report = os.path.splitext(CONFIG.REPORT_PATH)
-                dated_report_path = f"{base_report}_{today_str}{ext_report}"
-                generate_markdown_report(results, dated_report_path)
-                
-                # Informe de Señales con fecha (Acción diaria)
-                base_signal, ext_signal = os.path.splitext(CONFIG.SIGNAL_REPORT_PATH)
-                dated_signal_path = f"{base_signal}_{today_str}{ext_signal}"
-                signals_today = generate_signals_report(results, dated_signal_path)
-                
-                # Log Histórico JSON (Para integración Web)
-                append_signals_to_json(signals_today, CONFIG.SIGNALS_JSON_LOG)
-                
-                logging.info("Simulación y reporteo terminados exitosamente.")
-                logging.info(f"Reportes guardados: {os.path.basename(dated_report_path)} y {os.path.basename(dated_signal_path)}")
-            else:
-                logging.warning("No se generaron resultados de backtest.")
-
-        except Exception as e:
-            logging.error(f"Error crítico en el ciclo principal: {e}")
-            
-        finally:
-            # EL ESCUDO ANTI-BANEO (Sentinel Mode) - ESTO SIEMPRE SE EJECUTA
-            logging.info("Modo centinela activado. Próximo escaneo en 1 hora...")
-            time.sleep(3600)
+    _print_table(["Ticker", "Última barra", "Señal", "Precio", "Estado", "Última operación"],
+                 [[r['Ticker'], r['Última Barra'] or "", r['Acción'] or "-", _money(r['Precio']), r['Estado'],
+                   r['Última Operación'] or ""] for r in rows])
+    for r in rows:
+        if r['Motivo']:
+            print(f"{r['Ticker']}: {r['Motivo']}")
+
+
+def cmd_backtest(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Backtest of the given tickers with the cached data (only new bars are downloaded)."""
+    from src.pipeline import analyze_tickers, generate_markdown_report
+    results = analyze_tickers(_tickers(args), args.workers)
+    if args.report:
+        generate_markdown_report(results, args.report)
+    summary: List[Dict] = [{k: v for k, v in res.items() if k != 'History'} for res in results]
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+    _print_table(["Ticker", "Operaciones", "Capital Final", "Rendimiento", "Estado"],
+                 [[s['Ticker'], s['Operaciones Creadas'], _money(s['Capital Final']),
+                   f"{s['Rendimiento (%)']:.2f}%", s['Estado']] for s in summary])
+
+
+def cmd_portfolio(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Shared-capital simulation of the given tickers with the cached data (only new bars are downloaded)."""
+    from src.pipeline import load_daily_datasets
+    from src.portfolio import format_portfolio_report, run_portfolio
+    datasets = load_daily_datasets(_tickers(args))
+    if not datasets:
+        parser.exit(1, "No hay datos para simular el portafolio.\n")
+    summary = run_portfolio(datasets, capital=args.capital, sizing=args.sizing, ranking=args.ranking)
+    if args.report:
+        from src.report_render import write_atomic
+        write_atomic(args.report, format_portfolio_report(summary, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    totals = {k: v for k, v in summary.items() if k not in ('Posiciones', 'History', 'History Tickers')}
+    if args.json:
+        print(json.dumps({**totals, 'Posiciones': summary['Posiciones']}, ensure_ascii=False, indent=2))
+        return
+    for key, value in totals.items():
+        if key in ('Capital Inicial', 'Valor Final', 'Efectivo Final'):
+            value = _money(value)
+        elif isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"{key}: {value}")
+    _print_table(["Ticker", "Compras", "Ventas", "Realizado", "En Posición", "Total"],
+                 [[p['Ticker'], p['Compras'], p['Ventas'], _money(p['Resultado Realizado']),
+                   _money(p['Valor en Posición']), _money(p['Resultado Total'])]
+                  for p in summary['Posiciones'] if p['Compras']])
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["daemon"] + argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    commands = {"scan": cmd_scan, "signals": cmd_signals, "backtest": cmd_backtest, "portfolio": cmd_portfolio,
+                "daemon": cmd_daemon}
+    commands[args.command](args, parser)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.cache_store import get_cache_store
+from src.data_loader import _download_start, _normalize_download, _read_cache, _update_cache, record_daily_bars
+from src.metrics import metrics
+
+# Códigos HTTP que indican un problema transitorio (se reintentan)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableFetchError(Exception):
+    """Error transitorio (rate limit, 5xx, timeout) que justifica reintentar."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Rate limiter de tipo token bucket compartido por todas las peticiones."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            # Se espera sin el lock: las demás peticiones recalculan sus tokens mientras tanto
+            await asyncio.sleep(wait)
+
+
+def _parse_chart(payload: dict, interval: str) -> pd.DataFrame:
+    """
+    Convierte la respuesta del endpoint chart de Yahoo en un DataFrame OHLCV con el mismo
+    formato que yf.download (auto_adjust): precios ajustados e índice sin zona horaria.
+    """
+    chart = payload.get("chart") or {}
+    results = chart.get("result") or []
+    if not results or not results[0].get("timestamp"):
+        return pd.DataFrame()
+    result = results[0]
+    quote = result["indicators"]["quote"][0]
+
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True)
+    tz = (result.get("meta") or {}).get("exchangeTimezoneName")
+    if tz:
+        index = index.tz_convert(tz)
+    index = index.tz_localize(None)
+    if interval in ("1d", "5d", "1wk", "1mo", "3mo"):
+        index = index.normalize()
+
+    df = pd.DataFrame({
+        "Close": quote.get("close"),
+        "High": quote.get("high"),
+        "Low": quote.get("low"),
+        "Open": quote.get("open"),
+        "Volume": quote.get("volume"),
+    }, index=pd.DatetimeIndex(index, name="Date"), dtype="float64")
+
+    adjclose = (result["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose is not None:
+        ratio = pd.Series(adjclose, index=df.index, dtype="float64") / df["Close"]
+        for col in ("Open", "High", "Low"):
+            df[col] = df[col] * ratio
+        df["Close"] = pd.Series(adjclose, index=df.index, dtype="float64")
+
+    df = df.dropna(how="all")
+    df = df[~df.index.duplicated(keep="last")]
+    return df
+
+
+class AsyncFetcher:
+    """
+    Capa de descarga asíncrona contra el endpoint chart de Yahoo (o un servidor compatible):
+    - semáforo de concurrencia
+    - timeout por petición
+    - backoff exponencial con jitter (respeta Retry-After)
+    - token bucket compartido por todos los tickers
+    """
+
+    def __init__(self, base_url: Optional[str] = None, concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 rate: Optional[float] = None, burst: Optional[float] = None):
+        self.base_url = (base_url or CONFIG.QUOTE_API_URL).rstrip("/")
+        self.timeout = timeout or CONFIG.FETCH_TIMEOUT_SECONDS
+        self.max_retries = CONFIG.FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.semaphore = asyncio.Semaphore(concurrency or CONFIG.FETCH_CONCURRENCY)
+        self.bucket = TokenBucket(rate or CONFIG.FETCH_RATE_PER_SECOND, burst or CONFIG.FETCH_RATE_BURST)
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0, "bytes": 0}
+
+    def _get(self, url: str) -> bytes:
+        """
+        GET bloqueante (corre en un hilo). El timeout lo aplica el socket, así la petición termina
+        de verdad al vencer y no sigue ocupando un cupo de concurrencia mientras corre el reintento.
+        """
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (NERV)"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code in RETRYABLE_STATUS:
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+                raise RetryableFetchError(f"HTTP {e.code}", e.code, float(retry_after) if retry_after else None)
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise RetryableFetchError(str(e))
+
+    async def _get_with_retries(self, url: str) -> bytes:
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                async with self.semaphore:
+                    body = await asyncio.to_thread(self._get, url)
+                self.stats["bytes"] += len(body)
+                return body
+            except RetryableFetchError as e:
+                if e.status == 429:
+                    self.stats["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                backoff = CONFIG.FETCH_BACKOFF_SECONDS * (2 ** attempt)
+                wait = max(e.retry_after or 0.0, random.uniform(backoff / 2, backoff))
+                logging.warning(f"Reintento {attempt + 1}/{self.max_retries} en {wait:.1f}s para {url} ({e}).")
+                await asyncio.sleep(wait)
+
+    async def fetch(self, ticker: str, start_date: str, interval: str = "1d") -> pd.DataFrame:
+        """Descarga las barras de `ticker` desde `start_date` hasta ahora."""
+        period1 = int(pd.Timestamp(start_date).timestamp())
+        period2 = int(time.time())
+        url = (f"{self.base_url}/v8/finance/chart/{ticker}?period1={period1}&period2={period2}"
+               f"&interval={interval}&includePrePost=false&events=div%2Csplits")
+        body = await self._get_with_retries(url)
+        return _parse_chart(json.loads(body), interval)
+
+
+async def load_data_async(tickers: List[str], interval: str = "1d",
+                          fetcher: Optional[AsyncFetcher] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Equivalente asíncrono de load_data_batch: descarga los tickers desactualizados con
+    concurrencia acotada y escribe cada caché en un hilo apenas llega su descarga, de modo
+    que la escritura a disco se solapa con las descargas pendientes.
+    """
+    os.makedirs(CONFIG.CACHE_DIR, exist_ok=True)
+    fetcher = fetcher or AsyncFetcher()
+    store = get_cache_store()
+
+    local = {}
+    for ticker in tickers:
+        local[ticker] = await asyncio.to_thread(_read_cache, store, ticker)
+    result = dict(local)
+
+    async def refresh(ticker: str, start_date: str):
+        logging.info(f"Descargando nuevos datos para {ticker} desde {start_date}...")
+        try:
+            wall0 = time.perf_counter()
+            new_data = await fetcher.fetch(ticker, start_date, interval)
+            # Solo tiempo de reloj: la descarga corre en otro hilo y se solapa con las demás
+            if metrics.enabled:
+                metrics.record("download", time.perf_counter() - wall0, 0.0, ticker)
+        except Exception as e:
+            logging.error(f"Error descargando datos para {ticker}: {e}")
+            return
+        new_data = _normalize_download(new_data)
+        if new_data.empty:
+            logging.info(f"No hay nuevos datos para {ticker}.")
+            return
+        try:
+            result[ticker] = await asyncio.to_thread(_update_cache, store, ticker, local[ticker], new_data)
+        except Exception as e:
+            logging.error(f"Error actualizando cache para {ticker}: {e}")
+
+    tasks = []
+    for ticker in tickers:
+        start_date = _download_start(ticker, local[ticker])
+        if start_date is not None:
+            tasks.append(refresh(ticker, start_date))
+    await asyncio.gather(*tasks)
+
+    logging.info(f"Descarga asíncrona terminada: {fetcher.stats}")
+    metrics.inc("nerv_download_requests", fetcher.stats["requests"])
+    metrics.inc("nerv_download_retries", fetcher.stats["retries"])
+    metrics.inc("nerv_download_rate_limited", fetcher.stats["rate_limited"])
+    metrics.inc("nerv_download_failures", fetcher.stats["failures"])
+    metrics.inc("nerv_download_bytes", fetcher.stats["bytes"])
+    record_daily_bars(result)
+    return result
+
+
+def load_data_async_batch(tickers: List[str], interval: str = "1d") -> Dict[str, pd.DataFrame]:
+    """Punto de entrada síncrono para main."""
+    return asyncio.run(load_data_async(tickers, interval=interval))
@@ -0,0 +1,435 @@
+import json
+import logging
+import os
+import shutil
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+# Versión del formato columnar (se guarda en meta.json)
+COLUMNAR_FORMAT_VERSION = 2
+
+
+class CacheStore:
+    """
+    Interfaz común de los backends de caché de datos históricos.
+    Cada entrada se identifica por una clave (el ticker) y guarda un DataFrame
+    indexado por fecha.
+    """
+
+    name = "base"
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def read(self, key: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write(self, key: str, df: pd.DataFrame) -> None:
+        """Reemplaza por completo el contenido de la entrada."""
+        raise NotImplementedError
+
+    def append(self, key: str, new_rows: pd.DataFrame) -> None:
+        """
+        Agrega filas nuevas a la entrada. Si alguna fila solapa con lo ya guardado,
+        se hace una reescritura completa conservando la versión más reciente.
+        """
+        raise NotImplementedError
+
+    def keys(self) -> List[str]:
+        raise NotImplementedError
+
+    def signature(self, key: str) -> Optional[tuple]:
+        """
+        Huella barata del contenido en disco (sin leer los datos). Cambia con cada escritura;
+        None si el backend no la soporta o la entrada no existe.
+        """
+        return None
+
+    @staticmethod
+    def _stat_signature(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _merge_rewrite(self, key: str, new_rows: pd.DataFrame) -> None:
+        existing = self.read(key) if self.exists(key) else pd.DataFrame()
+        if existing.empty:
+            merged = new_rows
+        else:
+            merged = pd.concat([existing, new_rows])
+            merged = merged[~merged.index.duplicated(keep='last')]
+            merged = merged.sort_index()
+        self.write(key, merged)
+
+
+class CsvCacheStore(CacheStore):
+    """Backend histórico: un CSV por ticker en CACHE_DIR (reescritura completa en cada update)."""
+
+    name = "csv"
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.base_dir, f"{key}.csv")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def read(self, key: str) -> pd.DataFrame:
+        return pd.read_csv(self._path(key), index_col=0, parse_dates=True)
+
+    def signature(self, key: str) -> Optional[tuple]:
+        return self._stat_signature(self._path(key))
+
+    def write(self, key: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.base_dir, exist_ok=True)
+        df.to_csv(self._path(key))
+
+    def append(self, key: str, new_rows: pd.DataFrame) -> None:
+        self._merge_rewrite(key, new_rows)
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(f[:-4] for f in os.listdir(self.base_dir) if f.endswith(".csv"))
+
+
+class ColumnarCacheStore(CacheStore):
+    """
+    Backend columnar binario: un directorio por ticker con un archivo por columna
+    (valores crudos little-endian) más un `meta.json` con nombres, archivos, dtypes y número
+    de filas.
+
+    - La lectura es un `np.fromfile` por columna, sin parseo de texto.
+    - Las actualizaciones incrementales solo agregan bytes al final de cada archivo.
+    - Una reescritura completa crea archivos de una generación nueva (`col0.3.bin`, ...) sin
+      tocar los vigentes y luego reemplaza `meta.json`.
+    - `meta.json` se reemplaza de forma atómica al final, por lo que actúa como marca de
+      commit: una escritura interrumpida deja la versión anterior intacta (archivos de una
+      generación huérfana o bytes sobrantes al final, que se ignoran y se limpian después).
+    """
+
+    name = "columnar"
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.base_dir, key)
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self._dir(key), "meta.json")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._meta_path(key))
+
+    def read_meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def signature(self, key: str) -> Optional[tuple]:
+        # meta.json se reemplaza de forma atómica en cada escritura (nuevo inodo y mtime)
+        return self._stat_signature(self._meta_path(key))
+
+    def last_index(self, key: str) -> Optional[pd.Timestamp]:
+        """Última fecha guardada, leída solo desde la metadata."""
+        meta = self.read_meta(key)
+        if not meta or not meta["rows"]:
+            return None
+        return pd.Timestamp(meta["last_index"])
+
+    def read(self, key: str) -> pd.DataFrame:
+        for attempt in range(2):
+            meta = self.read_meta(key)
+            if meta is None:
+                raise FileNotFoundError(f"No existe caché columnar para {key}")
+            try:
+                return self._read_files(key, meta)
+            except FileNotFoundError:
+                # Una reescritura concurrente borró la generación leída en meta.json: releer
+                if attempt:
+                    raise
+
+    def _read_files(self, key: str, meta: Dict) -> pd.DataFrame:
+        rows = meta["rows"]
+        folder = self._dir(key)
+
+        index_values = np.fromfile(os.path.join(folder, meta.get("index_file", "index.bin")), dtype="<i8", count=rows)
+        index = pd.DatetimeIndex(index_values.view("datetime64[ns]"), name=meta.get("index_name"))
+        data = {}
+        for col in meta["columns"]:
+            data[col["name"]] = np.fromfile(os.path.join(folder, col["file"]), dtype=col["dtype"], count=rows)
+        if len(index) != rows or any(len(v) != rows for v in data.values()):
+            raise ValueError(f"Caché columnar incompleto para {key}")
+        return pd.DataFrame(data, index=index, columns=[c["name"] for c in meta["columns"]])
+
+    def write(self, key: str, df: pd.DataFrame) -> None:
+        folder = self._dir(key)
+        os.makedirs(folder, exist_ok=True)
+        generation = (self.read_meta(key) or {}).get("generation", 0) + 1
+
+        columns = []
+        index_file = f"index.{generation}.bin"
+        arrays = {index_file: self._index_array(df.index)}
+        for i, name in enumerate(df.columns):
+            values = self._column_array(df[name])
+            file_name = f"col{i}.{generation}.bin"
+            arrays[file_name] = values
+            columns.append({"name": str(name), "file": file_name, "dtype": values.dtype.str})
+
+        # La generación anterior sigue siendo la vigente hasta que se reemplaza meta.json
+        for file_name, values in arrays.items():
+            values.tofile(os.path.join(folder, file_name))
+
+        self._write_meta(key, df.index, columns, len(df), index_file=index_file, generation=generation)
+        self._remove_stale(folder, set(arrays))
+
+    def append(self, key: str, new_rows: pd.DataFrame) -> None:
+        if new_rows.empty:
+            return
+        meta = self.read_meta(key)
+        if meta is None or not meta["rows"]:
+            self.write(key, new_rows.sort_index())
+            return
+
+        new_rows = new_rows.sort_index()
+        last = pd.Timestamp(meta["last_index"])
+        stored_names = [c["name"] for c in meta["columns"]]
+        same_layout = sorted(stored_names) == sorted(str(c) for c in new_rows.columns)
+        if same_layout:
+            new_rows = new_rows[stored_names]
+        overlaps = new_rows.index.min() <= last or new_rows.index.has_duplicates
+        if not same_layout or overlaps:
+            self._merge_rewrite(key, new_rows)
+            return
+
+        index_file = meta.get("index_file", "index.bin")
+        arrays = {index_file: self._index_array(new_rows.index)}
+        for col in meta["columns"]:
+            values = self._column_array(new_rows[col["name"]])
+            if values.dtype.str != col["dtype"]:
+                # Volume llega como float en descargas multi-ticker; se castea si no pierde información
+                casted = values.astype(col["dtype"])
+                if not np.array_equal(casted, values):
+                    self._merge_rewrite(key, new_rows)
+                    return
+                values = casted
+            arrays[col["file"]] = values
+
+        rows = meta["rows"]
+        folder = self._dir(key)
+        for file_name, values in arrays.items():
+            path = os.path.join(folder, file_name)
+            with open(path, "r+b") as f:
+                # Descartar restos de una escritura interrumpida antes de agregar
+                f.truncate(rows * values.dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+
+        self._write_meta(key, new_rows.index, meta["columns"], rows + len(new_rows), meta.get("index_name"),
+                         index_file=index_file, generation=meta.get("generation", 0))
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(k for k in os.listdir(self.base_dir) if self.exists(k))
+
+    def _write_meta(self, key: str, index: pd.DatetimeIndex, columns: List[Dict], rows: int,
+                    index_name: Optional[str] = None, index_file: str = "index.bin", generation: int = 0) -> None:
+        meta = {
+            "version": COLUMNAR_FORMAT_VERSION,
+            "generation": generation,
+            "rows": rows,
+            "index_file": index_file,
+            "index_name": index_name if index_name is not None else index.name,
+            "last_index": index.max().isoformat() if len(index) else None,
+            "columns": columns,
+        }
+        meta_path = self._meta_path(key)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _remove_stale(folder: str, current: set) -> None:
+        """Borra archivos de generaciones anteriores o de escrituras interrumpidas."""
+        for file_name in os.listdir(folder):
+            if file_name.endswith((".bin", ".tmp")) and file_name not in current:
+                try:
+                    os.remove(os.path.join(folder, file_name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _index_array(index: pd.Index) -> np.ndarray:
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return np.asarray(index.values, dtype="datetime64[ns]").view("<i8")
+
+    @staticmethod
+    def _column_array(series: pd.Series) -> np.ndarray:
+        values = series.to_numpy()
+        if values.dtype.kind not in "iuf":
+            values = values.astype("float64")
+        return np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+
+
+class PartitionedCacheStore(CacheStore):
+    """
+    Backend particionado por mes para series intradía: un directorio por clave y, dentro,
+    una partición columnar por mes (`2024-05`, `2024-06`, ...).
+
+    - Las actualizaciones solo tocan la partición del mes en curso (la barra en formación
+      se reemplaza reescribiendo únicamente esa partición).
+    - La retención descarta particiones completas (`prune`), así el disco queda acotado.
+    - `read(start=...)` y `read_tail(rows)` leen solo las particiones necesarias.
+    """
+
+    name = "partitioned"
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def _partitions(self, key: str) -> ColumnarCacheStore:
+        return ColumnarCacheStore(os.path.join(self.base_dir, key))
+
+    def partitions(self, key: str) -> List[str]:
+        """Meses guardados para la clave, en orden cronológico."""
+        return self._partitions(key).keys()
+
+    def exists(self, key: str) -> bool:
+        return bool(self.partitions(key))
+
+    def read(self, key: str, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        store = self._partitions(key)
+        months = store.keys()
+        if start is not None:
+            first = str(pd.Timestamp(start).to_period("M"))
+            months = [m for m in months if m >= first]
+        if not months:
+            raise FileNotFoundError(f"No existe caché particionado para {key}")
+        df = pd.concat([store.read(m) for m in months])
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        return df
+
+    def read_tail(self, key: str, rows: int) -> pd.DataFrame:
+        """Últimas `rows` filas, leyendo solo las particiones finales (el conteo sale de la metadata)."""
+        store = self._partitions(key)
+        months, total = [], 0
+        for month in reversed(store.keys()):
+            months.insert(0, month)
+            total += (store.read_meta(month) or {}).get("rows", 0)
+            if total >= rows:
+                break
+        if not months:
+            raise FileNotFoundError(f"No existe caché particionado para {key}")
+        return pd.concat([store.read(m) for m in months]).iloc[-rows:]
+
+    def last_index(self, key: str) -> Optional[pd.Timestamp]:
+        months = self.partitions(key)
+        return self._partitions(key).last_index(months[-1]) if months else None
+
+    def write(self, key: str, df: pd.DataFrame) -> None:
+        shutil.rmtree(os.path.join(self.base_dir, key), ignore_errors=True)
+        store = self._partitions(key)
+        for month, part in self._by_month(df):
+            store.write(month, part)
+
+    def append(self, key: str, new_rows: pd.DataFrame) -> None:
+        store = self._partitions(key)
+        for month, part in self._by_month(new_rows):
+            store.append(month, part)
+
+    def prune(self, key: str, before: pd.Timestamp) -> int:
+        """Elimina las particiones cuyo mes termina antes de `before`. Retorna cuántas se eliminaron."""
+        removed = 0
+        for month in self.partitions(key):
+            if pd.Period(month, "M").end_time < before:
+                shutil.rmtree(os.path.join(self.base_dir, key, month), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(k for k in os.listdir(self.base_dir) if self.exists(k))
+
+    @staticmethod
+    def _by_month(df: pd.DataFrame):
+        if df.empty:
+            return
+        df = df.sort_index()
+        for period, part in df.groupby(pd.DatetimeIndex(df.index).to_period("M")):
+            yield str(period), part
+
+
+_BACKENDS = {
+    CsvCacheStore.name: CsvCacheStore,
+    ColumnarCacheStore.name: ColumnarCacheStore,
+    PartitionedCacheStore.name: PartitionedCacheStore,
+}
+
+
+def cache_key(ticker: str, interval: str = "1d") -> str:
+    """
+    Clave de caché para un ticker e intervalo. El diario conserva la clave histórica
+    (solo el ticker) para no invalidar los cachés existentes.
+    """
+    return ticker if interval == "1d" else f"{ticker}__{interval}"
+
+
+def get_cache_store(backend: Optional[str] = None, base_dir: Optional[str] = None) -> CacheStore:
+    """Crea el backend de caché configurado en CONFIG.CACHE_BACKEND."""
+    backend = backend or CONFIG.CACHE_BACKEND
+    base_dir = base_dir or CONFIG.CACHE_DIR
+    if backend not in _BACKENDS:
+        raise ValueError(f"Backend de caché desconocido: {backend}")
+    if backend == CsvCacheStore.name:
+        return CsvCacheStore(base_dir)
+    return _BACKENDS[backend](os.path.join(base_dir, backend))
+
+
+def migrate_csv_entry(store: CacheStore, key: str, csv_dir: Optional[str] = None) -> bool:
+    """Migra un CSV histórico al backend indicado. Retorna True si hubo migración."""
+    legacy = CsvCacheStore(csv_dir or CONFIG.CACHE_DIR)
+    if isinstance(store, CsvCacheStore) or not legacy.exists(key) or store.exists(key):
+        return False
+    df = legacy.read(key)
+    store.write(key, df)
+    logging.info(f"Cache CSV de {key} migrado al backend '{store.name}' ({len(df)} filas).")
+    return True
+
+
+def migrate_csv_cache(store: Optional[CacheStore] = None, csv_dir: Optional[str] = None) -> int:
+    """Migración única de todos los CSV de CACHE_DIR al backend configurado."""
+    store = store or get_cache_store()
+    legacy = CsvCacheStore(csv_dir or CONFIG.CACHE_DIR)
+    migrated = 0
+    for key in legacy.keys():
+        try:
+            if migrate_csv_entry(store, key, legacy.base_dir):
+                migrated += 1
+        except Exception as e:
+            logging.error(f"Error migrando cache CSV de {key}: {e}")
+    logging.info(f"Migración de caché completada: {migrated} tickers.")
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    migrate_csv_cache()
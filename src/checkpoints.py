@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import sys
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+# Parámetros de la estrategia y checkpoints del backtest. Solo depende de CONFIG: el comando
+# `signals` lee el estado persistido sin importar pandas ni el motor de simulación.
+
+
+def strategy_params() -> dict:
+    """Parámetros de la estrategia tal como están definidos en CONFIG."""
+    params = dict(CONFIG.RSI_PARAMS)
+    params['rentabilidad_minima'] = CONFIG.RENTABILIDAD_MINIMA_VENTA_PCT
+    params['capital_inicial'] = CONFIG.BACKTEST_CAPITAL_INICIAL
+    params['tamano_posicion'] = CONFIG.BACKTEST_TAMANO_POSICION_PCT
+    return params
+
+
+def account_summary(ticker: str, params: dict, capital: float, shares: float, total_trades: int,
+                    last_price: float, history) -> dict:
+    """Resumen final del backtest a partir del estado de la cuenta y el último precio."""
+    pos_value_final = shares * last_price
+    valor_final_cartera = capital + pos_value_final
+    rendimiento_pct = ((valor_final_cartera - params['capital_inicial']) / params['capital_inicial']) * 100
+
+    estado_final = "En posición (Holdeando utilidad)" if shares > 0 else "Liquidez (Sin posición)"
+
+    return {
+        'Ticker': ticker,
+        'Operaciones Creadas': total_trades,
+        'Capital Final': valor_final_cartera,
+        'Capital en Posición': pos_value_final,
+        'Rendimiento (%)': rendimiento_pct,
+        'Estado': estado_final,
+        'History': history
+    }
+
+
+# --- Checkpoints -------------------------------------------------------------
+# El estado de la simulación se persiste por ticker tras cada corrida para que la
+# siguiente solo simule las barras nuevas en lugar de repetir todo el historial.
+
+def params_digest(params: dict) -> str:
+    """Huella de los parámetros que afectan la simulación (umbrales y periodos de indicadores)."""
+    payload = {'params': params, 'rsi': CONFIG.RSI_PARAMS['period'], 'sma': CONFIG.SMA_PERIODS}
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def checkpoint_path(ticker: str) -> str:
+    return os.path.join(CONFIG.BACKTEST_CHECKPOINT_DIR, f"{ticker}.json")
+
+
+def load_checkpoint(ticker: str) -> Optional[dict]:
+    try:
+        with open(checkpoint_path(ticker), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_checkpoint(ticker: str, checkpoint: dict):
+    os.makedirs(CONFIG.BACKTEST_CHECKPOINT_DIR, exist_ok=True)
+    path = checkpoint_path(ticker)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
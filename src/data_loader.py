@@ -1,78 +1,409 @@
-import yfinance as yf
 import pandas as pd
 import logging
 import os
 import sys
+import time
+from typing import Callable, Dict, List, Optional, Union
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import CONFIG
+from src.cache_store import CacheStore, PartitionedCacheStore, cache_key, get_cache_store, migrate_csv_entry
+from src.hot_cache import hot_dataset
+from src.market_calendar import MarketCalendar, load_calendar
+from src.metrics import metrics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_data(ticker: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+
+def _yf_download(*args, **kwargs) -> pd.DataFrame:
+    """yf.download importando yfinance recién al descargar: los comandos que solo leen el caché no lo cargan."""
+    import yfinance as yf
+    return yf.download(*args, **kwargs)
+
+
+def _read_cache(store: CacheStore, ticker: str) -> pd.DataFrame:
     """
-    Carga datos históricos para un ticker. Implementa caché local incremental para evitar 
-    descargas redundantes y bloqueos.
+    Lee el caché local del ticker (migrando el CSV histórico la primera vez). Con
+    CONFIG.HOT_CACHE_ENABLED se usa la copia en memoria si el disco no cambió.
     """
-    os.makedirs(CONFIG.CACHE_DIR, exist_ok=True)
-    cache_path = os.path.join(CONFIG.CACHE_DIR, f"{ticker}.csv")
-    
+    if CONFIG.HOT_CACHE_ENABLED:
+        df_hot = hot_dataset.get(store, ticker)
+        if df_hot is not None:
+            metrics.inc("nerv_hot_hits")
+            return df_hot
+
     df_local = pd.DataFrame()
-    if os.path.exists(cache_path):
+    with metrics.stage("cache_read", ticker):
         try:
-            df_local = pd.read_csv(cache_path, index_col=0, parse_dates=True)
-            logging.info(f"Cargados datos locales para {ticker} ({len(df_local)} filas).")
+            migrate_csv_entry(store, ticker)
+            if store.exists(ticker):
+                df_local = store.read(ticker)
+                logging.info(f"Cargados datos locales para {ticker} ({len(df_local)} filas).")
+                if CONFIG.HOT_CACHE_ENABLED:
+                    hot_dataset.put(store, ticker, df_local)
         except Exception as e:
             logging.error(f"Error cargando cache para {ticker}: {e}")
+    return df_local
+
+
+# Calendario de mercado (se carga al primer uso)
+_calendar: Optional[MarketCalendar] = None
+
+# Barra diaria más reciente presente en el caché tras las cargas de este proceso.
+# El planificador la consulta para dar por procesado un cierre solo si su barra se guardó.
+_latest_daily_bar: Optional[pd.Timestamp] = None
+
 
-    # Determinar rango de descarga
-    last_date = None
+def _market_calendar() -> MarketCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = load_calendar()
+    return _calendar
+
+
+def _download_start(ticker: str, df_local: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> Optional[str]:
+    """
+    Calcula la fecha desde la que hay que descargar. Retorna None si el caché ya tiene la
+    barra de la última sesión cerrada según el calendario de mercado (`now` en UTC): la
+    barra de hoy se pide apenas cierra la sesión, no al día siguiente.
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC").tz_localize(None)
+    last_session = pd.Timestamp(_market_calendar().last_session_day(now))
     if not df_local.empty:
         last_date = df_local.index.max()
+        if last_date.normalize() >= last_session:
+            logging.info(f"Datos de {ticker} ya están actualizados (última sesión cerrada: {last_session.date()}).")
+            metrics.inc("nerv_cache_hits")
+            return None
         start_date = (last_date + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
     else:
         # Descarga inicial (2 años hacia atrás para calentamiento de SMA200)
-        start_date = (pd.Timestamp.now() - pd.Timedelta(days=730)).strftime('%Y-%m-%d')
+        start_date = (now - pd.Timedelta(days=730)).strftime('%Y-%m-%d')
+    metrics.inc("nerv_cache_misses")
+    return start_date
+
+
+def record_daily_bar(bar: pd.Timestamp):
+    """Registra una barra diaria guardada en el caché (propio o de un shard)."""
+    global _latest_daily_bar
+    bar = pd.Timestamp(bar).normalize()
+    if _latest_daily_bar is None or bar > _latest_daily_bar:
+        _latest_daily_bar = bar
+
+
+def record_daily_bars(datasets: Dict[str, pd.DataFrame]):
+    """Registra la barra diaria más reciente de `datasets` (el contenido del caché tras la carga)."""
+    for df in datasets.values():
+        if df is not None and not df.empty:
+            record_daily_bar(df.index.max())
+
+
+def latest_daily_bar() -> Optional[pd.Timestamp]:
+    """Barra diaria más reciente guardada en el caché por este proceso (None si no cargó ninguna)."""
+    return _latest_daily_bar
+
+
+def _normalize_download(new_data: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Aplana columnas MultiIndex, elimina la zona horaria del índice y descarta las barras de una
+    sesión que aún no cierra en `now` (UTC): una barra parcial guardada ya no se volvería a pedir.
+    """
+    # Aplanar MultiIndex si existe (pasa en versiones nuevas de yfinance)
+    if isinstance(new_data.columns, pd.MultiIndex):
+        new_data.columns = new_data.columns.get_level_values(0)
+
+    # Limpiar índice y timezone como antes
+    new_data.index = pd.to_datetime(new_data.index)
+    if new_data.index.tz is not None:
+        new_data.index = new_data.index.tz_localize(None)
+
+    now = now if now is not None else pd.Timestamp.now(tz="UTC").tz_localize(None)
+    last_session = pd.Timestamp(_market_calendar().last_session_day(now))
+    unfinished = new_data.index.normalize() > last_session
+    if unfinished.any():
+        logging.info(f"Se descartan {int(unfinished.sum())} barras de la sesión en curso (última cerrada: {last_session.date()}).")
+        new_data = new_data[~unfinished]
+    return new_data
+
+
+def _record_download(data: Optional[pd.DataFrame]):
+    """
+    Cuenta una petición de descarga en las métricas. yfinance no expone los bytes de la respuesta:
+    nerv_download_bytes suma el tamaño en memoria del DataFrame como estimación (el camino
+    asíncrono de src.async_fetch cuenta los bytes reales del cuerpo HTTP).
+    """
+    metrics.inc("nerv_download_requests")
+    if data is not None:
+        metrics.inc("nerv_download_bytes", int(data.memory_usage(index=True, deep=True).sum()))
+
+
+def _update_cache(store: CacheStore, ticker: str, df_local: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
+    """Combina los datos nuevos con el caché local y los persiste."""
+    if df_local.empty:
+        df_final = new_data
+    else:
+        df_final = pd.concat([df_local, new_data])
+        # Eliminar duplicados por índice por si acaso solapan
+        df_final = df_final[~df_final.index.duplicated(keep='last')]
+        df_final.sort_index(inplace=True)
+
+    # Guardar en cache (solo se agregan las filas nuevas)
+    with metrics.stage("cache_write", ticker):
+        if df_local.empty:
+            store.write(ticker, df_final)
+        else:
+            store.append(ticker, new_data)
+    metrics.inc("nerv_download_rows", len(new_data))
+    if CONFIG.HOT_CACHE_ENABLED:
+        hot_dataset.put(store, ticker, df_final)
+    logging.info(f"Cache actualizado para {ticker}. Total filas: {len(df_final)}")
+    return df_final
+
+
+def load_data(ticker: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+    """
+    Carga datos históricos para un ticker. Implementa caché local incremental para evitar 
+    descargas redundantes y bloqueos.
+    """
+    if is_intraday(interval):
+        return load_data_intraday([ticker], interval).get(ticker, pd.DataFrame())
+
+    os.makedirs(CONFIG.CACHE_DIR, exist_ok=True)
+    store = get_cache_store()
+    df_local = _read_cache(store, ticker)
 
-    today = pd.Timestamp.now().strftime('%Y-%m-%d')
-    
-    if (last_date and last_date.strftime('%Y-%m-%d') >= today) or (start_date >= today):
-        logging.info(f"Datos de {ticker} ya están actualizados o no hay datos para descargar aún (es hoy).")
+    start_date = _download_start(ticker, df_local)
+    if start_date is None:
         return df_local
 
     logging.info(f"Descargando nuevos datos para {ticker} desde {start_date}...")
     try:
         # Usar yf.download y asegurar que no traiga MultiIndex si es posible, 
         # o aplanarlo manualmente.
-        new_data = yf.download(ticker, start=start_date, interval=interval, progress=False)
+        with metrics.stage("download", ticker):
+            new_data = _yf_download(ticker, start=start_date, interval=interval, progress=False)
+        _record_download(new_data)
         
+        new_data = _normalize_download(new_data)
         if new_data.empty:
             logging.info(f"No hay nuevos datos para {ticker}.")
             return df_local
 
-        # Aplanar MultiIndex si existe (pasa en versiones nuevas de yfinance)
-        if isinstance(new_data.columns, pd.MultiIndex):
-            new_data.columns = new_data.columns.get_level_values(0)
-
-        # Limpiar índice y timezone como antes
-        new_data.index = pd.to_datetime(new_data.index)
-        if new_data.index.tz is not None:
-            new_data.index = new_data.index.tz_localize(None)
-
-        # Combinar
-        if df_local.empty:
-            df_final = new_data
-        else:
-            df_final = pd.concat([df_local, new_data])
-            # Eliminar duplicados por índice por si acaso solapan
-            df_final = df_final[~df_final.index.duplicated(keep='last')]
-            df_final.sort_index(inplace=True)
-
-        # Guardar en cache
-        df_final.to_csv(cache_path)
-        logging.info(f"Cache actualizado para {ticker}. Total filas: {len(df_final)}")
-        return df_final
+        return _update_cache(store, ticker, df_local, new_data)
 
     except Exception as e:
         logging.error(f"Error descargando datos para {ticker}: {e}")
         return df_local
+
+
+def _download_with_backoff(downloader: Callable, symbols: List[str], start_date: Union[str, pd.Timestamp],
+                           interval: str) -> pd.DataFrame:
+    """Descarga un bloque de tickers reintentando con espera exponencial ante errores."""
+    retries = CONFIG.DOWNLOAD_MAX_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            return downloader(symbols, start=start_date, interval=interval, group_by='ticker',
+                              progress=False, threads=True)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = CONFIG.DOWNLOAD_BACKOFF_SECONDS * (2 ** attempt)
+            logging.warning(f"Fallo descargando bloque {symbols[0]}..{symbols[-1]} ({e}). Reintento en {wait:.0f}s...")
+            time.sleep(wait)
+
+
+def _split_download(data: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Separa el resultado MultiIndex de una descarga múltiple en un DataFrame por ticker."""
+    frames = {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Descarga de un solo ticker con columnas planas (versiones antiguas de yfinance)
+        if len(symbols) == 1:
+            frames[symbols[0]] = data
+        return frames
+
+    for level in range(data.columns.nlevels):
+        present = set(data.columns.get_level_values(level))
+        if any(sym in present for sym in symbols):
+            break
+    else:
+        return frames
+
+    for sym in symbols:
+        if sym not in present:
+            continue
+        sub = data.xs(sym, axis=1, level=level).dropna(how='all')
+        if not sub.empty:
+            frames[sym] = sub.copy()
+    return frames
+
+
+def load_data_batch(tickers: List[str], period: str = "1y", interval: str = "1d",
+                    downloader: Optional[Callable] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Versión por lotes de load_data: agrupa los tickers según la fecha desde la que
+    necesitan datos y descarga cada grupo con peticiones multi-ticker de tamaño
+    CONFIG.DOWNLOAD_CHUNK_SIZE, en lugar de una petición por ticker.
+    `downloader` permite reemplazar yf.download (mismo contrato) para pruebas offline.
+    """
+    if is_intraday(interval):
+        return load_data_intraday(tickers, interval, downloader=downloader)
+
+    os.makedirs(CONFIG.CACHE_DIR, exist_ok=True)
+    downloader = downloader or _yf_download
+    store = get_cache_store()
+
+    local = {}
+    groups = {}
+    for ticker in tickers:
+        local[ticker] = _read_cache(store, ticker)
+        start_date = _download_start(ticker, local[ticker])
+        if start_date is not None:
+            groups.setdefault(start_date, []).append(ticker)
+
+    result = dict(local)
+    chunk_size = max(1, CONFIG.DOWNLOAD_CHUNK_SIZE)
+    first_request = True
+    for start_date in sorted(groups):
+        pending = groups[start_date]
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i:i + chunk_size]
+            if not first_request:
+                time.sleep(CONFIG.DOWNLOAD_CHUNK_PAUSE_SECONDS)
+            first_request = False
+
+            logging.info(f"Descargando bloque de {len(chunk)} tickers desde {start_date}...")
+            try:
+                with metrics.stage("download"):
+                    data = _download_with_backoff(downloader, chunk, start_date, interval)
+                _record_download(data)
+            except Exception as e:
+                logging.error(f"Error descargando bloque {chunk[0]}..{chunk[-1]}: {e}")
+                continue
+
+            frames = _split_download(data, chunk) if data is not None and not data.empty else {}
+            for ticker in chunk:
+                new_data = frames.get(ticker)
+                if new_data is not None:
+                    new_data = _normalize_download(new_data)
+                if new_data is None or new_data.empty:
+                    logging.info(f"No hay nuevos datos para {ticker}.")
+                    continue
+                try:
+                    result[ticker] = _update_cache(store, ticker, local[ticker], new_data)
+                except Exception as e:
+                    logging.error(f"Error actualizando cache para {ticker}: {e}")
+
+    record_daily_bars(result)
+    return result
+
+
+def is_intraday(interval: str) -> bool:
+    """True para intervalos de minutos u horas (1m, 5m, 15m, 1h, ...)."""
+    return interval.endswith("m") or interval.endswith("h")
+
+
+def _bar_delta(interval: str) -> pd.Timedelta:
+    return pd.Timedelta(interval.replace("m", "min"))
+
+
+def _intraday_retention(interval: str) -> pd.Timedelta:
+    days = CONFIG.INTRADAY_RETENTION_DAYS.get(interval, CONFIG.INTRADAY_RETENTION_DEFAULT_DAYS)
+    return pd.Timedelta(days=days)
+
+
+def _normalize_intraday(new_data: pd.DataFrame) -> pd.DataFrame:
+    """Como _normalize_download, pero el índice intradía se guarda en UTC (sin zona horaria)."""
+    if isinstance(new_data.columns, pd.MultiIndex):
+        new_data.columns = new_data.columns.get_level_values(0)
+    index = pd.to_datetime(new_data.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    new_data.index = index
+    return new_data[~new_data.index.duplicated(keep='last')].sort_index()
+
+
+def _intraday_start(ticker: str, last_bar: Optional[pd.Timestamp], interval: str,
+                    now: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """
+    Barra desde la que hay que descargar (UTC). Se pide de nuevo la última barra guardada
+    porque pudo quedar a medio formar; no se descarga si todavía no abrió una barra nueva.
+    """
+    cutoff = now - _intraday_retention(interval)
+    if last_bar is None or last_bar < cutoff:
+        return cutoff.floor("D")
+    if now < last_bar + _bar_delta(interval):
+        logging.info(f"Datos {interval} de {ticker} al día (última barra {last_bar}).")
+        metrics.inc("nerv_cache_hits")
+        return None
+    metrics.inc("nerv_cache_misses")
+    return last_bar
+
+
+def load_data_intraday(tickers: List[str], interval: str = "1h", downloader: Optional[Callable] = None,
+                       bars: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Carga series intradía con caché por (ticker, intervalo) particionado por mes.
+    Descarga solo desde la última barra de cada ticker (reemplazando la barra en formación),
+    aplica la retención de CONFIG.INTRADAY_RETENTION_DAYS y retorna por ticker solo las
+    últimas `bars` barras (CONFIG.INTRADAY_ANALYSIS_BARS), sin cargar todo el historial.
+    """
+    downloader = downloader or _yf_download
+    bars = bars or CONFIG.INTRADAY_ANALYSIS_BARS
+    store = get_cache_store(PartitionedCacheStore.name, base_dir=CONFIG.INTRADAY_CACHE_DIR)
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    cutoff = now - _intraday_retention(interval)
+
+    starts = {}
+    for ticker in tickers:
+        start = _intraday_start(ticker, store.last_index(cache_key(ticker, interval)), interval, now)
+        if start is not None:
+            starts[ticker] = start
+
+    # Un bloque comparte la fecha de inicio más antigua; cada ticker se recorta a la suya
+    pending = sorted(starts, key=lambda t: starts[t])
+    chunk_size = max(1, CONFIG.DOWNLOAD_CHUNK_SIZE)
+    for i in range(0, len(pending), chunk_size):
+        chunk = pending[i:i + chunk_size]
+        if i:
+            time.sleep(CONFIG.DOWNLOAD_CHUNK_PAUSE_SECONDS)
+        start = min(starts[t] for t in chunk)
+        logging.info(f"Descargando barras {interval} de {len(chunk)} tickers desde {start} UTC...")
+        try:
+            with metrics.stage("download"):
+                data = _download_with_backoff(downloader, chunk, start.tz_localize("UTC"), interval)
+            _record_download(data)
+        except Exception as e:
+            logging.error(f"Error descargando bloque {interval} {chunk[0]}..{chunk[-1]}: {e}")
+            continue
+
+        frames = _split_download(data, chunk) if data is not None and not data.empty else {}
+        for ticker in chunk:
+            new_data = frames.get(ticker)
+            if new_data is None or new_data.empty:
+                continue
+            new_data = _normalize_intraday(new_data)
+            new_data = new_data[new_data.index >= starts[ticker]]
+            if new_data.empty:
+                continue
+            key = cache_key(ticker, interval)
+            try:
+                with metrics.stage("cache_write", ticker):
+                    store.append(key, new_data)
+                    store.prune(key, cutoff)
+                metrics.inc("nerv_download_rows", len(new_data))
+            except Exception as e:
+                logging.error(f"Error actualizando cache {interval} para {ticker}: {e}")
+
+    result = {}
+    for ticker in tickers:
+        key = cache_key(ticker, interval)
+        if not store.exists(key):
+            continue
+        with metrics.stage("cache_read", ticker):
+            try:
+                df = store.read_tail(key, bars)
+            except Exception as e:
+                logging.error(f"Error cargando cache {interval} para {ticker}: {e}")
+                continue
+        result[ticker] = df[df.index >= cutoff]
+    return result
@@ -0,0 +1,176 @@
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.cache_store import CacheStore
+from src.indicators import (INDICATOR_COLUMNS, apply_indicators_incremental, extend_indicator_state,
+                            has_indicator_state, indicators_with_state)
+from src.metrics import metrics
+
+
+class _HotEntry:
+    __slots__ = ('raw', 'signature', 'indicators', 'state', 'nbytes')
+
+    def __init__(self, raw: pd.DataFrame, signature: tuple):
+        self.raw = raw
+        self.signature = signature
+        self.indicators: Optional[Dict[str, np.ndarray]] = None
+        self.state: Optional[dict] = None
+        self.nbytes = 0
+
+
+class HotDataset:
+    """
+    Caché en memoria del proceso (el daemon vive entre ciclos) con el DataFrame de cada
+    ticker y sus indicadores ya calculados.
+
+    - Cada entrada guarda la huella del caché en disco (`CacheStore.signature`); si el archivo
+      cambió por fuera del proceso, la entrada se descarta y se vuelve a leer.
+    - Las filas descargadas se agregan a la entrada y los indicadores se extienden solo en esas
+      filas (mismo motor incremental que src.indicators).
+    - Desalojo LRU cuando la memoria estimada supera CONFIG.HOT_CACHE_MAX_MB.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(CONFIG.HOT_CACHE_MAX_MB * 1024 * 1024)
+        self._entries: 'OrderedDict[str, _HotEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get(self, store: CacheStore, key: str) -> Optional[pd.DataFrame]:
+        """Datos del ticker si la entrada sigue vigente respecto al disco; None si no hay o quedó obsoleta."""
+        signature = store.signature(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if signature is None or entry.signature != signature:
+                logging.info(f"Caché en memoria de {key} invalidado: el caché en disco cambió.")
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            # Copia superficial: las columnas que agregue el llamador no tocan la entrada
+            return entry.raw.copy(deep=False)
+
+    def put(self, store: CacheStore, key: str, df: pd.DataFrame):
+        """
+        Registra los datos vigentes del ticker (tras leerlos o actualizarlos en disco). Si solo
+        se agregaron filas al final, se conservan los indicadores ya calculados (prepare verifica
+        con su estado que los cierres previos no hayan cambiado).
+        """
+        signature = store.signature(key)
+        if signature is None or df.empty:
+            return
+        with self._lock:
+            previous = self._entries.get(key)
+            # Copia superficial: columnas que el llamador agregue después no entran a la entrada
+            entry = _HotEntry(df.copy(deep=False), signature)
+            if previous is not None and previous.indicators is not None and self._extends(previous.raw, df):
+                entry.indicators = previous.indicators
+                entry.state = previous.state
+            self._store(key, entry)
+
+    def can_prepare(self, ticker: str, df: pd.DataFrame) -> bool:
+        """
+        True si los indicadores del ticker se pueden obtener sin cálculo completo: están en
+        memoria o hay estado incremental en disco. El cálculo completo queda para el pool.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or not self._same_rows(entry.raw, df):
+                return False
+            return entry.indicators is not None or has_indicator_state(ticker)
+
+    def prepare(self, ticker: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Equivalente a apply_indicators_incremental(df, ticker) usando los indicadores en memoria:
+        solo se calculan las filas que no estaban en el ciclo anterior.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and not self._same_rows(entry.raw, df):
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(ticker)
+        if entry is None:
+            return apply_indicators_incremental(df, ticker)
+
+        extended = extend_indicator_state(entry.state, df, ticker) if entry.indicators is not None else None
+        if extended is None:
+            prepared, state = indicators_with_state(df.copy(deep=False), ticker)
+            if state is not None:
+                indicators = {col: prepared[col].to_numpy(dtype=np.float64) for col in INDICATOR_COLUMNS}
+                self._set_indicators(ticker, entry, indicators, state)
+            return prepared
+
+        new_rows, state = extended
+        indicators = entry.indicators
+        if len(new_rows):
+            indicators = {col: np.concatenate([entry.indicators[col], new_rows[col].to_numpy(dtype=np.float64)])
+                          for col in INDICATOR_COLUMNS}
+            self._set_indicators(ticker, entry, indicators, state)
+            metrics.inc("nerv_hot_indicator_rows", len(new_rows))
+        metrics.inc("nerv_hot_indicator_hits")
+        return df.assign(**indicators)
+
+    def _set_indicators(self, ticker: str, entry: _HotEntry, indicators: Dict[str, np.ndarray], state: dict):
+        with self._lock:
+            if self._entries.get(ticker) is not entry:
+                return
+            entry.indicators = indicators
+            entry.state = state
+            self._store(ticker, entry)
+
+    @staticmethod
+    def _same_rows(raw: pd.DataFrame, df: pd.DataFrame) -> bool:
+        return len(raw) == len(df) and len(df) > 0 and raw.index[-1] == df.index[-1]
+
+    @staticmethod
+    def _extends(old: pd.DataFrame, new: pd.DataFrame) -> bool:
+        """True si `new` continúa las fechas de `old` (los cierres se comparan en prepare)."""
+        n = len(old)
+        return n > 0 and len(new) >= n and new.index[n - 1] == old.index[-1]
+
+    @staticmethod
+    def _entry_bytes(entry: _HotEntry) -> int:
+        size = int(entry.raw.memory_usage(index=True, deep=False).sum())
+        if entry.indicators is not None:
+            size += sum(values.nbytes for values in entry.indicators.values())
+        return size
+
+    def _store(self, key: str, entry: _HotEntry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+        entry.nbytes = self._entry_bytes(entry)
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes and self._entries:
+            evicted, _ = next(iter(self._entries.items()))
+            self._drop(evicted)
+            metrics.inc("nerv_hot_evictions")
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+
+# Caché del proceso, compartido entre ciclos del daemon
+hot_dataset = HotDataset()
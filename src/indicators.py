@@ -1,11 +1,18 @@
+import hashlib
+import json
+import logging
+import math
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import sys
 import os
+from typing import Dict, List, Optional, Tuple
 
 # Agregamos el directorio raíz para poder importar CONFIG sin problemas
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import CONFIG
+from src.cache_store import CacheStore, get_cache_store
+from src.native_indicators import _rsi_update, _sma_update, fused_indicators, indicator_state
 
 def apply_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -18,14 +25,15 @@ def apply_indicators(df: pd.DataFrame) -> pd.DataFrame:
         pass
 
     try:
-        # RSI
-        rsi_period = CONFIG.RSI_PARAMS['period']
-        df['RSI'] = ta.rsi(df['Close'], length=rsi_period)
-
-        # SMAs
-        df['SMA_10'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['short'])
-        df['SMA_50'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['medium'])
-        df['SMA_200'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['long'])
+        if CONFIG.INDICATORS_ENGINE == "pandas_ta":
+            _apply_pandas_ta(df)
+        else:
+            # RSI y las tres SMAs en una sola pasada sobre Close
+            lengths = [CONFIG.SMA_PERIODS['short'], CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']]
+            values = fused_indicators(_close_values(df), CONFIG.RSI_PARAMS['period'], lengths)
+            df['RSI'] = values['RSI']
+            for col, length in zip(INDICATOR_COLUMNS[1:], lengths):
+                df[col] = values[f"SMA_{length}"]
         
         # Opcional (Limpieza básica), removemos eventuales filas extras si no nos importan mucho los NaNs muy antiguos, 
         # pero es mejor dejarlos para que la serie de tiempo esté completa y el usuario vea cómo fue la evolución.
@@ -34,3 +42,253 @@ def apply_indicators(df: pd.DataFrame) -> pd.DataFrame:
          print(f"Error applying indicators: {e}")
 
     return df
+
+
+def _apply_pandas_ta(df: pd.DataFrame):
+    """Cálculo con pandas_ta (motor anterior). Se importa aquí para no cargarlo en cada arranque."""
+    import pandas_ta as ta
+
+    # RSI
+    rsi_period = CONFIG.RSI_PARAMS['period']
+    df['RSI'] = ta.rsi(df['Close'], length=rsi_period)
+
+    # SMAs
+    df['SMA_10'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['short'])
+    df['SMA_50'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['medium'])
+    df['SMA_200'] = ta.sma(df['Close'], length=CONFIG.SMA_PERIODS['long'])
+
+
+# --- Motor incremental -------------------------------------------------------
+# Persiste por ticker el estado del RSI de Wilder, el de la suma compensada de cada SMA y la
+# ventana de cierres, para extender las columnas de indicadores solo en las filas nuevas de
+# cada ciclo con los mismos bits que el cálculo completo.
+
+INDICATOR_COLUMNS = ['RSI', 'SMA_10', 'SMA_50', 'SMA_200']
+
+# Versión del estado persistido: los estados de otra versión se reconstruyen con el cálculo
+# completo (2 = rma de pandas_ta 0.4, ewm con adjust=False; 3 = suma compensada de las SMAs)
+STATE_VERSION = 3
+
+
+def _indicator_config() -> dict:
+    return {
+        'version': STATE_VERSION,
+        'rsi': CONFIG.RSI_PARAMS['period'],
+        'sma': [CONFIG.SMA_PERIODS['short'], CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']],
+    }
+
+
+def _rsi_step(state: dict, delta: float, length: int) -> float:
+    """
+    Avanza un paso el RSI persistido en `state`. Usa la misma recursión que el cálculo completo
+    (src.native_indicators, que replica el `ewm` de pandas), por lo que coincide bit a bit.
+    """
+    state['up'], state['down'], state['wt'], value = _rsi_update(
+        float(state['up']), float(state['down']), float(state['wt']), float(delta), length)
+    return value
+
+
+def _sma_step(state: list, window: List[float], close: float, length: int) -> float:
+    """
+    Avanza una SMA persistida en `state` con el cierre nuevo. `window` son los cierres previos:
+    sale de la ventana el de hace `length` filas. Misma suma compensada que el cálculo completo.
+    """
+    old = window[-length] if len(window) >= length else math.nan
+    result = _sma_update(*state, float(close), old, length)
+    state[:] = result[:-1]
+    return result[-1]
+
+
+def _state_path(ticker: str) -> str:
+    return os.path.join(CONFIG.INDICATOR_CACHE_DIR, f"{ticker}.state.json")
+
+
+def _load_state(ticker: str) -> Optional[dict]:
+    try:
+        with open(_state_path(ticker), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_state(ticker: str, state: dict):
+    os.makedirs(CONFIG.INDICATOR_CACHE_DIR, exist_ok=True)
+    path = _state_path(ticker)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+
+def _close_values(df: pd.DataFrame) -> np.ndarray:
+    close = df['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.to_numpy(dtype=np.float64)
+
+
+def _extend_indicators(state: dict, closes: List[float], prev_close: float) -> Dict[str, List[float]]:
+    """Calcula los indicadores de las filas nuevas avanzando el estado en su lugar."""
+    config = state['params']
+    window = state['window']
+    max_len = max(config['sma'])
+    out = {col: [] for col in INDICATOR_COLUMNS}
+    for close in closes:
+        out['RSI'].append(_rsi_step(state['rsi'], close - prev_close, config['rsi']))
+        for col, length, sma_state in zip(INDICATOR_COLUMNS[1:], config['sma'], state['sma']):
+            out[col].append(_sma_step(sma_state, window, close, length))
+        window.append(close)
+        if len(window) > max_len:
+            del window[0]
+        prev_close = close
+    return out
+
+
+def _advance_state(state: dict, df: pd.DataFrame, closes: np.ndarray) -> Dict[str, List[float]]:
+    """Extiende el estado en su lugar con las filas de `df` posteriores a state['rows']."""
+    rows = state['rows']
+    new_values = _extend_indicators(state, closes[rows:].tolist(), float(closes[rows - 1]))
+    state['rows'] = len(df)
+    state['last_index'] = df.index[-1].isoformat()
+    state['closes_digest'] = _closes_digest(closes)
+    return new_values
+
+
+def _closes_digest(closes: np.ndarray) -> str:
+    """Huella de la serie de cierres: detecta datos reescritos en cualquier punto del historial."""
+    return hashlib.blake2b(np.ascontiguousarray(closes, dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+
+
+def _build_state(df: pd.DataFrame) -> dict:
+    """Reconstruye el estado incremental recorriendo toda la serie de cierres."""
+    config = _indicator_config()
+    closes = _close_values(df)
+    (up, down, wt), sma_states = indicator_state(closes, config['rsi'], config['sma'])
+    return {
+        'params': config,
+        'rows': len(closes),
+        'last_index': df.index[-1].isoformat(),
+        'closes_digest': _closes_digest(closes),
+        'rsi': {'up': up, 'down': down, 'wt': wt},
+        'sma': sma_states,
+        'window': closes[-max(config['sma']):].tolist(),
+    }
+
+
+def _state_matches(state: dict, df: pd.DataFrame, closes: np.ndarray) -> bool:
+    """
+    El estado sirve si los parámetros no cambiaron y los cierres ya procesados siguen iguales.
+    Con `rsi` filas o menos el RSI completo es todo NaN (como ta.rsi): se recalcula completo.
+    """
+    rows = state.get('rows', 0)
+    config = _indicator_config()
+    if state.get('params') != config or rows <= config['rsi'] or len(df) < rows:
+        return False
+    if df.index[rows - 1] != pd.Timestamp(state['last_index']):
+        return False
+    return state.get('closes_digest') == _closes_digest(closes[:rows])
+
+
+def _full_recompute(df: pd.DataFrame, ticker: str, store: CacheStore) -> pd.DataFrame:
+    df = apply_indicators(df)
+    if df.empty or any(col not in df.columns for col in INDICATOR_COLUMNS):
+        return df
+    for col in INDICATOR_COLUMNS:
+        df[col] = df[col].astype(np.float64)
+    try:
+        store.write(ticker, df[INDICATOR_COLUMNS])
+        _save_state(ticker, _build_state(df))
+    except Exception as e:
+        logging.error(f"Error guardando estado de indicadores para {ticker}: {e}")
+    return df
+
+
+def apply_indicators_incremental(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """
+    Igual que apply_indicators, pero reutiliza los indicadores persistidos del ciclo anterior
+    y solo calcula las filas agregadas desde entonces. Si no hay estado válido (primera vez,
+    cambio de parámetros o datos reescritos) hace el cálculo completo como fallback.
+    Con CONFIG.INDICATORS_PARITY_CHECK se compara además contra el cálculo completo.
+    """
+    if df.empty:
+        return apply_indicators(df)
+
+    store = get_cache_store(base_dir=CONFIG.INDICATOR_CACHE_DIR)
+    closes = _close_values(df)
+    state = _load_state(ticker)
+    if state is None or not _state_matches(state, df, closes):
+        return _full_recompute(df, ticker, store)
+
+    try:
+        rows = state['rows']
+        stored = store.read(ticker)
+        if len(stored) != rows:
+            return _full_recompute(df, ticker, store)
+
+        new_values = _advance_state(state, df, closes)
+        for col in INDICATOR_COLUMNS:
+            df[col] = np.concatenate([stored[col].to_numpy(dtype=np.float64), np.asarray(new_values[col], dtype=np.float64)])
+
+        if len(df) > rows:
+            store.append(ticker, pd.DataFrame(new_values, index=df.index[rows:], columns=INDICATOR_COLUMNS))
+            _save_state(ticker, state)
+    except Exception as e:
+        logging.warning(f"Indicadores incrementales no disponibles para {ticker} ({e}). Recalculando completo.")
+        return _full_recompute(df, ticker, store)
+
+    if CONFIG.INDICATORS_PARITY_CHECK:
+        full = apply_indicators(df.drop(columns=INDICATOR_COLUMNS))
+        for col in INDICATOR_COLUMNS:
+            # Bit a bit: los checkpoints del backtest guardan la huella exacta de estas columnas
+            if not np.array_equal(df[col].to_numpy(dtype=np.float64), full[col].to_numpy(dtype=np.float64),
+                                  equal_nan=True):
+                logging.warning(f"Paridad de indicadores fallida para {ticker} en {col}. Usando cálculo completo.")
+                return _full_recompute(df.drop(columns=INDICATOR_COLUMNS), ticker, store)
+
+    return df
+
+
+# --- Estado en memoria entre ciclos (src.hot_cache) ----------------------------
+
+def has_indicator_state(ticker: str) -> bool:
+    """True si hay estado incremental persistido: el ticker no necesita cálculo completo."""
+    return os.path.exists(_state_path(ticker))
+
+
+def indicators_with_state(df: pd.DataFrame, ticker: str) -> Tuple[pd.DataFrame, Optional[dict]]:
+    """
+    Igual que apply_indicators_incremental, pero retorna además el estado incremental con el
+    que quedaron los indicadores (None si no se pudieron calcular), para seguir extendiéndolos
+    en memoria con extend_indicator_state.
+    """
+    df = apply_indicators_incremental(df, ticker)
+    if df.empty or any(col not in df.columns for col in INDICATOR_COLUMNS):
+        return df, None
+    closes = _close_values(df)
+    state = _load_state(ticker)
+    if state is None or state.get('rows') != len(df) or not _state_matches(state, df, closes):
+        state = _build_state(df)
+    return df, state
+
+
+def extend_indicator_state(state: dict, df: pd.DataFrame, ticker: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """
+    Indicadores de las filas de `df` posteriores a las que cubre `state` y el estado avanzado;
+    `state` no se modifica. Las filas nuevas y el estado se persisten para que un reinicio no
+    recalcule todo. Retorna None si `state` ya no sirve para `df` (cambiaron los parámetros o
+    los cierres ya procesados).
+    """
+    closes = _close_values(df)
+    if not _state_matches(state, df, closes):
+        return None
+    rows = state['rows']
+    if rows == len(df):
+        return pd.DataFrame(columns=INDICATOR_COLUMNS, index=df.index[:0], dtype=np.float64), state
+
+    state = dict(state, rsi=dict(state['rsi']), sma=[list(v) for v in state['sma']], window=list(state['window']))
+    new_rows = pd.DataFrame(_advance_state(state, df, closes), index=df.index[rows:], columns=INDICATOR_COLUMNS)
+    try:
+        get_cache_store(base_dir=CONFIG.INDICATOR_CACHE_DIR).append(ticker, new_rows)
+        _save_state(ticker, state)
+    except Exception as e:
+        logging.error(f"Error guardando indicadores de {ticker}: {e}")
+    return new_rows, state
@@ -0,0 +1,100 @@
+import datetime
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.checkpoints import account_summary, load_checkpoint, params_digest, strategy_params
+from src.ledger import TradeLedger
+
+# Señales del último cierre leídas del estado persistido (checkpoints del backtest), sin
+# descargar ni recalcular nada. Solo importa NumPy: es el camino rápido del comando `signals`.
+
+STATUS_POSITION = "En posición"
+STATUS_CASH = "Liquidez"
+STATUS_MISSING = "Sin checkpoint"
+STATUS_OUTDATED = "Parámetros cambiaron"
+
+
+def _bar_time(iso: str) -> np.datetime64:
+    """Fecha de la última barra del checkpoint en la misma escala que el ledger (UTC sin zona)."""
+    moment = datetime.datetime.fromisoformat(iso)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return np.datetime64(moment, 's')
+
+
+def ticker_signal(ticker: str, params: Optional[dict] = None, digest: Optional[str] = None) -> Dict:
+    """
+    Estado del ticker según su checkpoint: señal si la última operación cayó en la última barra
+    simulada, la última operación y si la cuenta está en posición. Un checkpoint escrito con
+    otros parámetros se reporta como desactualizado (no se interpreta).
+    """
+    params = params or strategy_params()
+    digest = digest or params_digest(params)
+    row = {'Ticker': ticker, 'Estado': STATUS_MISSING, 'Última Barra': None, 'Acción': None, 'Precio': None,
+           'Motivo': None, 'Fecha': None, 'Última Operación': None}
+    checkpoint = load_checkpoint(ticker)
+    if not checkpoint or 'ledger' not in checkpoint:
+        return row
+    row['Última Barra'] = checkpoint['last_date'][:10]
+    if checkpoint.get('params_digest') != digest:
+        row['Estado'] = STATUS_OUTDATED
+        return row
+
+    # state[1] = acciones en cartera (S_SHARES del kernel)
+    row['Estado'] = STATUS_POSITION if checkpoint['state'][1] > 0 else STATUS_CASH
+    history = TradeLedger.from_json(checkpoint['ledger'], params)
+    if len(history):
+        last_event = history[-1]
+        row['Última Operación'] = last_event['date']
+        if history.records['date'][-1] == _bar_time(checkpoint['last_date']):
+            row.update({'Acción': last_event['action'], 'Precio': last_event['price'],
+                        'Motivo': last_event['reason'], 'Fecha': last_event['date']})
+    return row
+
+
+def latest_signals(tickers: Optional[List[str]] = None) -> List[Dict]:
+    """Estado de cada ticker (CONFIG.TICKERS por defecto), en el orden pedido."""
+    params = strategy_params()
+    digest = params_digest(params)
+    return [ticker_signal(ticker, params, digest) for ticker in (tickers or CONFIG.TICKERS)]
+
+
+def _last_close(ticker: str, checkpoint: dict) -> Optional[float]:
+    """Cierre de la última barra simulada (los checkpoints anteriores no lo guardan: se lee del caché)."""
+    if 'last_close' in checkpoint:
+        return checkpoint['last_close']
+    from src.cache_store import get_cache_store
+    try:
+        closes = get_cache_store().read(ticker)['Close'].loc[:checkpoint['last_date']]
+    except Exception:
+        return None
+    if len(closes) and closes.index[-1].isoformat() == checkpoint['last_date']:
+        return float(closes.iloc[-1])
+    return None
+
+
+def checkpoint_results(tickers: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Resumen del backtest de cada ticker (mismo formato que run_backtest) reconstruido desde su
+    checkpoint, sin descargar ni simular. Se omiten los tickers sin checkpoint vigente.
+    """
+    params = strategy_params()
+    digest = params_digest(params)
+    results = []
+    for ticker in tickers or CONFIG.TICKERS:
+        checkpoint = load_checkpoint(ticker)
+        if not checkpoint or 'ledger' not in checkpoint or checkpoint.get('params_digest') != digest:
+            continue
+        last_close = _last_close(ticker, checkpoint)
+        if last_close is None:
+            continue
+        # state[0] = capital, state[1] = acciones, state[6] = operaciones (S_CAPITAL, S_SHARES, S_TOTAL_TRADES)
+        state = checkpoint['state']
+        results.append(account_summary(ticker, params, float(state[0]), float(state[1]), int(state[6]),
+                                       last_close, TradeLedger.from_json(checkpoint['ledger'], params)))
+    return results
@@ -0,0 +1,190 @@
+import numpy as np
+
+# Códigos de acción del kernel (last_action usa además HOLD)
+ACTION_HOLD = 0
+ACTION_BUY = 1
+ACTION_SELL = 2
+
+# Códigos de motivo de cada operación
+REASON_VENTA_ALCISTA = 1
+REASON_COMPRA_ALCISTA_N1 = 2
+REASON_COMPRA_ALCISTA_N2 = 3
+REASON_COMPRA_ALCISTA_N3 = 4
+REASON_PULLBACK_ALCISTA = 5
+REASON_VENTA_BAJISTA = 6
+REASON_COMPRA_BAJISTA = 7
+
+# Nivel de cruce de la compra bajista (fijo en la lógica original, no usa RSI_PARAMS['bajista_compra_cruce'])
+RSI_CRUCE_BAJISTA = 35
+
+# Una fila por operación ejecutada (42 bytes, sin textos).
+# `ref` guarda el valor auxiliar del motivo: utilidad latente en ventas y el RSI de la
+# compra anterior en la compra de nivel 3.
+LEDGER_DTYPE = np.dtype([
+    ('date', 'datetime64[s]'),
+    ('action', 'i1'),
+    ('amount', 'f8'),
+    ('price', 'f8'),
+    ('reason', 'i1'),
+    ('rsi', 'f8'),
+    ('ref', 'f8'),
+])
+
+ACTION_LABELS = {ACTION_BUY: 'Compra', ACTION_SELL: 'Venta'}
+
+
+def format_reason(reason: int, rsi: float, ref: float, params: dict) -> str:
+    """Texto del motivo de una operación (idéntico al generado por la lógica original)."""
+    if reason == REASON_VENTA_ALCISTA:
+        return f"Venta Tendencia Alcista: RSI {rsi:.2f} >= {params['alcista_venta']} con utilidad {ref*100:.2f}%"
+    if reason == REASON_COMPRA_ALCISTA_N1:
+        return f"Compra Tendencia Alcista: RSI {rsi:.2f} <= {params['alcista_compra_1']} (Nivel 1)"
+    if reason == REASON_COMPRA_ALCISTA_N2:
+        return f"Compra Tendencia Alcista: RSI {rsi:.2f} <= {params['alcista_compra_2']} (Nivel 2)"
+    if reason == REASON_COMPRA_ALCISTA_N3:
+        return f"Compra Tendencia Alcista: RSI {rsi:.2f} bajó {params['alcista_compra_step']} puntos desde {ref:.2f}"
+    if reason == REASON_PULLBACK_ALCISTA:
+        return f"Pullback Tendencia Alcista: RSI {rsi:.2f} < {params['alcista_pullback_compra']} tras venta"
+    if reason == REASON_VENTA_BAJISTA:
+        return f"Venta Tendencia Bajista: RSI {rsi:.2f} >= {params['bajista_venta']} con utilidad {ref*100:.2f}%"
+    if reason == REASON_COMPRA_BAJISTA:
+        return f"Compra Tendencia Bajista: Cruce RSI {rsi:.2f} > {RSI_CRUCE_BAJISTA}"
+    return ""
+
+
+def _format_date(value: np.datetime64) -> str:
+    """Fecha de la operación: solo el día en series diarias, con hora (UTC) en barras intradía."""
+    return _date_text(str(np.datetime_as_string(value, unit='m')))
+
+
+def _date_text(text: str) -> str:
+    if text.endswith('T00:00'):
+        return text[:10]
+    return text.replace('T', ' ')
+
+
+class TradeEvent:
+    """
+    Vista de una fila del ledger con la misma interfaz que los dicts de historial
+    anteriores (event['date'], event['reason'], ...). Los textos se generan al leerlos.
+    """
+
+    __slots__ = ('_ledger', '_i')
+
+    KEYS = ('date', 'action', 'amount', 'price', 'reason')
+
+    def __init__(self, ledger: 'TradeLedger', i: int):
+        self._ledger = ledger
+        self._i = i
+
+    def __getitem__(self, key: str):
+        row = self._ledger.records[self._i]
+        if key == 'date':
+            return _format_date(row['date'])
+        if key == 'action':
+            return ACTION_LABELS[int(row['action'])]
+        if key == 'amount':
+            return float(row['amount'])
+        if key == 'price':
+            return float(row['price'])
+        if key == 'reason':
+            return format_reason(int(row['reason']), float(row['rsi']), float(row['ref']), self._ledger.params)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self.KEYS}
+
+    def __repr__(self):
+        return f"TradeEvent({self.to_dict()})"
+
+
+class TradeLedger:
+    """
+    Historial de operaciones de un ticker como array estructurado de NumPy (LEDGER_DTYPE).
+    Se comporta como la lista de eventos que consumen los reportes: len(), iteración,
+    índice (incluido [-1]) y comparación con listas de dicts.
+    """
+
+    __slots__ = ('records', 'params')
+
+    def __init__(self, records: np.ndarray = None, params: dict = None):
+        self.records = np.empty(0, dtype=LEDGER_DTYPE) if records is None else records
+        self.params = params or {}
+
+    @classmethod
+    def from_events(cls, dates: np.ndarray, events: dict, params: dict) -> 'TradeLedger':
+        """Construye el ledger desde los arrays de eventos del kernel y las fechas de esas filas."""
+        records = np.empty(len(events['idx']), dtype=LEDGER_DTYPE)
+        records['date'] = dates.astype('datetime64[s]')
+        for field in ('action', 'amount', 'price', 'reason', 'rsi', 'ref'):
+            records[field] = events[field]
+        return cls(records, params)
+
+    def concat(self, other: 'TradeLedger') -> 'TradeLedger':
+        return TradeLedger(np.concatenate([self.records, other.records]), other.params or self.params)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return TradeLedger(self.records[i], self.params)
+        n = len(self.records)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("índice fuera del ledger")
+        return TradeEvent(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.records)):
+            yield TradeEvent(self, i)
+
+    def to_dicts(self) -> list:
+        return [event.to_dict() for event in self]
+
+    def to_rows(self) -> list:
+        """
+        Tuplas (date, action, amount, price, reason) con los mismos valores que los TradeEvent,
+        leyendo cada columna una sola vez (para renderizar historiales largos).
+        """
+        r = self.records
+        dates = np.datetime_as_string(r['date'], unit='m').tolist()
+        return [(_date_text(date), ACTION_LABELS[action], amount, price, format_reason(reason, rsi, ref, self.params))
+                for date, action, amount, price, reason, rsi, ref in zip(
+                    dates, r['action'].tolist(), r['amount'].tolist(), r['price'].tolist(), r['reason'].tolist(),
+                    r['rsi'].tolist(), r['ref'].tolist())]
+
+    def __eq__(self, other):
+        if isinstance(other, TradeLedger):
+            return np.array_equal(self.records, other.records) and self.params == other.params
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def to_json(self) -> dict:
+        """Columnas serializables (para checkpoints); las fechas van como segundos epoch."""
+        data = {field: self.records[field].tolist() for field in LEDGER_DTYPE.names if field != 'date'}
+        data['date'] = self.records['date'].astype('int64').tolist()
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict, params: dict) -> 'TradeLedger':
+        records = np.empty(len(data['date']), dtype=LEDGER_DTYPE)
+        records['date'] = np.asarray(data['date'], dtype='int64').astype('datetime64[s]')
+        for field in LEDGER_DTYPE.names:
+            if field != 'date':
+                records[field] = data[field]
+        return cls(records, params)
+
+    def __repr__(self):
+        return f"TradeLedger({len(self)} operaciones)"
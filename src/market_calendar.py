@@ -0,0 +1,207 @@
+import csv
+import datetime
+import logging
+import os
+import sys
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+# Cierre de las jornadas anticipadas de NYSE/Nasdaq (hora local)
+EARLY_CLOSE_TIME = "13:00"
+
+# Cierres extraordinarios de NYSE/Nasdaq que no siguen una regla (se suman a nyse_holidays)
+NYSE_SPECIAL_CLOSINGS = {
+    "2025-01-09": "Duelo nacional (Jimmy Carter)",
+}
+
+
+def _easter(year: int) -> datetime.date:
+    """Domingo de Pascua del calendario gregoriano (algoritmo anónimo de Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """`n`-ésimo `weekday` (0 = lunes) del mes; n = -1 es el último."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: datetime.date, name: str, days: Dict[datetime.date, str]):
+    """Feriado fijo: si cae sábado se cierra el viernes anterior y si cae domingo el lunes siguiente."""
+    if day.weekday() == 5:
+        days[day - datetime.timedelta(days=1)] = f"{name} (observado)"
+    elif day.weekday() == 6:
+        days[day + datetime.timedelta(days=1)] = f"{name} (observado)"
+    else:
+        days[day] = name
+
+
+def nyse_holidays(year: int) -> Dict[datetime.date, str]:
+    """Feriados de NYSE/Nasdaq de `year` según sus reglas vigentes (mercado cerrado todo el día)."""
+    days = {}
+    new_year = datetime.date(year, 1, 1)
+    # Año Nuevo en sábado no se adelanta: la bolsa no cierra el último día hábil del año
+    if new_year.weekday() != 5:
+        _observed(new_year, "Año Nuevo", days)
+    days[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, 0, 3)] = "Presidents' Day"
+    days[_easter(year) - datetime.timedelta(days=2)] = "Viernes Santo"
+    days[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        _observed(datetime.date(year, 6, 19), "Juneteenth", days)
+    _observed(datetime.date(year, 7, 4), "Independence Day", days)
+    days[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving"
+    _observed(datetime.date(year, 12, 25), "Navidad", days)
+    return days
+
+
+def nyse_early_closes(year: int) -> Dict[datetime.date, str]:
+    """Jornadas de `year` con cierre anticipado: víspera de Independence Day, viernes de Thanksgiving y Nochebuena."""
+    closes = {}
+    july_3 = datetime.date(year, 7, 3)
+    if july_3.weekday() <= 3:
+        closes[july_3] = EARLY_CLOSE_TIME
+    closes[_nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1)] = EARLY_CLOSE_TIME
+    christmas_eve = datetime.date(year, 12, 24)
+    if christmas_eve.weekday() < 5 and christmas_eve not in nyse_holidays(year):
+        closes[christmas_eve] = EARLY_CLOSE_TIME
+    return closes
+
+
+def nyse_rules(year: int) -> Tuple[Dict[datetime.date, str], Dict[datetime.date, str]]:
+    """Reglas de NYSE para MarketCalendar: (feriados, cierres anticipados) de `year`."""
+    return nyse_holidays(year), nyse_early_closes(year)
+
+
+class MarketCalendar:
+    """
+    Calendario de sesiones de una bolsa: días hábiles, feriados y cierres anticipados, con
+    horario de apertura/cierre en la zona horaria de la bolsa.
+
+    - `rules(año)` genera los feriados y cierres anticipados recurrentes de cada año.
+    - `holidays` y `early_closes` son excepciones que se suman a las reglas; `sessions` son
+      días que las reglas cerrarían pero en los que sí hay sesión.
+    - Todas las horas que entrega están en UTC (sin zona horaria), igual que el caché intradía.
+    """
+
+    def __init__(self, timezone: str, open_time: str, close_time: str,
+                 holidays: Dict[str, str], early_closes: Dict[str, str],
+                 rules: Optional[Callable[[int], Tuple[Dict[datetime.date, str], Dict[datetime.date, str]]]] = None,
+                 sessions: Iterable[str] = ()):
+        self.timezone = timezone
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = {datetime.date.fromisoformat(d) for d in holidays}
+        self.early_closes = {datetime.date.fromisoformat(d): t for d, t in early_closes.items()}
+        self.sessions = {datetime.date.fromisoformat(d) for d in sessions}
+        self.rules = rules
+        known = {d.year for d in self.holidays}
+        self.first_year = min(known) if known else None
+        self.last_year = max(known) if known else None
+        self._years: Dict[int, Tuple[set, Dict[datetime.date, str]]] = {}
+        self._warned = set()
+
+    def _year(self, year: int) -> Tuple[set, Dict[datetime.date, str]]:
+        """Feriados y cierres anticipados de `year` (reglas más excepciones), calculados una vez."""
+        cached = self._years.get(year)
+        if cached is None:
+            holidays, early_closes = self.rules(year) if self.rules else ({}, {})
+            holidays = {d for d in holidays if d not in self.sessions}
+            holidays |= {d for d in self.holidays if d.year == year}
+            early_closes = {d: t for d, t in early_closes.items() if d not in holidays}
+            early_closes.update((d, t) for d, t in self.early_closes.items() if d.year == year)
+            cached = self._years[year] = (holidays, early_closes)
+        return cached
+
+    def is_session(self, day: datetime.date) -> bool:
+        if day.weekday() >= 5:
+            return False
+        if self.rules is None and self.last_year is not None and not self.first_year <= day.year <= self.last_year \
+                and day.year not in self._warned:
+            self._warned.add(day.year)
+            logging.warning(f"El calendario de mercado no tiene feriados para {day.year}; solo se excluyen fines de semana.")
+        return day not in self._year(day.year)[0]
+
+    def session_bounds(self, day: datetime.date) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Apertura y cierre (UTC) de la sesión de `day`, o None si no hay sesión."""
+        if not self.is_session(day):
+            return None
+        close_time = self._year(day.year)[1].get(day, self.close_time)
+        opens = pd.Timestamp(f"{day} {self.open_time}", tz=self.timezone)
+        closes = pd.Timestamp(f"{day} {close_time}", tz=self.timezone)
+        return (opens.tz_convert("UTC").tz_localize(None), closes.tz_convert("UTC").tz_localize(None))
+
+    def _local_day(self, now: pd.Timestamp) -> datetime.date:
+        return now.tz_localize("UTC").tz_convert(self.timezone).date()
+
+    def current_session(self, now: pd.Timestamp) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Sesión abierta en `now` (UTC), o None si el mercado está cerrado."""
+        bounds = self.session_bounds(self._local_day(now))
+        if bounds and bounds[0] <= now < bounds[1]:
+            return bounds
+        return None
+
+    def last_close(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Último cierre de sesión ocurrido hasta `now` (UTC)."""
+        day = self._local_day(now)
+        for _ in range(15):
+            bounds = self.session_bounds(day)
+            if bounds and bounds[1] <= now:
+                return bounds[1]
+            day -= datetime.timedelta(days=1)
+        raise ValueError("No se encontró una sesión en los últimos 15 días")
+
+    def last_session_day(self, now: pd.Timestamp) -> datetime.date:
+        """Día (en la zona horaria de la bolsa) de la última sesión cerrada hasta `now` (UTC)."""
+        return self._local_day(self.last_close(now))
+
+    def next_session(self, now: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Próxima sesión que aún no cierra en `now` (puede ser la actual)."""
+        day = self._local_day(now)
+        for _ in range(15):
+            bounds = self.session_bounds(day)
+            if bounds and bounds[1] > now:
+                return bounds
+            day += datetime.timedelta(days=1)
+        raise ValueError("No se encontró una sesión en los próximos 15 días")
+
+
+def load_calendar(path: Optional[str] = None) -> MarketCalendar:
+    """
+    Calendario configurado: reglas de feriados de NYSE más NYSE_SPECIAL_CLOSINGS.
+    CONFIG.MARKET_CALENDAR_PATH puede apuntar a un CSV con columnas `date,type,close` con
+    excepciones (type = holiday, early_close o session para abrir un día que las reglas cierran).
+    """
+    holidays = dict(NYSE_SPECIAL_CLOSINGS)
+    early_closes = {}
+    sessions = []
+    path = path or CONFIG.MARKET_CALENDAR_PATH
+    if path and os.path.exists(path):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                if row["type"] == "holiday":
+                    holidays[row["date"]] = row.get("name") or "feriado"
+                elif row["type"] == "early_close":
+                    early_closes[row["date"]] = row["close"]
+                elif row["type"] == "session":
+                    sessions.append(row["date"])
+    return MarketCalendar(CONFIG.MARKET_TIMEZONE, CONFIG.MARKET_OPEN_TIME, CONFIG.MARKET_CLOSE_TIME,
+                          holidays, early_closes, rules=nyse_rules, sessions=sessions)
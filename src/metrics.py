@@ -0,0 +1,233 @@
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+# Contexto vacío reutilizado cuando las métricas están desactivadas (sin costo por llamada)
+_NULL = contextlib.nullcontext()
+
+_HELP = {
+    "nerv_stage_wall_seconds": "Tiempo de reloj acumulado por etapa en el último ciclo.",
+    "nerv_stage_cpu_seconds": "Tiempo de CPU (del hilo) acumulado por etapa en el último ciclo.",
+    "nerv_stage_calls": "Veces que se ejecutó cada etapa en el último ciclo.",
+    "nerv_ticker_stage_wall_seconds": "Tiempo de reloj por ticker y etapa en el último ciclo.",
+    "nerv_ticker_stage_cpu_seconds": "Tiempo de CPU por ticker y etapa en el último ciclo.",
+    "nerv_download_bytes": "Bytes descargados en el último ciclo (cuerpo HTTP con FETCH_MODE async; "
+                           "con yfinance, estimado por el tamaño en memoria de los datos recibidos).",
+}
+
+
+def _format_value(value: float) -> str:
+    """Enteros sin decimales; el resto con 6 decimales (sin notación científica)."""
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.6f}"
+
+
+class Metrics:
+    """
+    Registro de métricas de un ciclo de escaneo: tiempos de reloj y CPU por etapa
+    (y por ticker), contadores y gauges. Se reinicia al comienzo de cada ciclo y se
+    exporta en formato texto de Prometheus (textfile collector).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (stage, ticker) -> [wall, cpu, calls]; ticker None = total de la etapa
+            self.timings: Dict[Tuple[str, Optional[str]], list] = {}
+            self.counters: Dict[str, float] = {}
+            self.gauges: Dict[str, float] = {}
+
+    def stage(self, name: str, ticker: Optional[str] = None):
+        """Context manager que mide una etapa. Si las métricas están desactivadas no hace nada."""
+        if not self.enabled:
+            return _NULL
+        return self._timed(name, ticker)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str, ticker: Optional[str]):
+        wall0 = time.perf_counter()
+        cpu0 = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall0, time.thread_time() - cpu0, ticker)
+
+    def record(self, name: str, wall: float, cpu: float, ticker: Optional[str] = None, calls: int = 1):
+        with self._lock:
+            keys = [(name, None)] if ticker is None else [(name, None), (name, ticker)]
+            for key in keys:
+                entry = self.timings.setdefault(key, [0.0, 0.0, 0])
+                entry[0] += wall
+                entry[1] += cpu
+                entry[2] += calls
+
+    def inc(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        """Copia serializable (para enviarla desde un proceso worker al principal)."""
+        with self._lock:
+            return {
+                "timings": {key: list(v) for key, v in self.timings.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+    def merge(self, snapshot: Optional[dict]):
+        """Suma las métricas recolectadas en otro proceso."""
+        if not snapshot or not self.enabled:
+            return
+        with self._lock:
+            for key, (wall, cpu, calls) in snapshot["timings"].items():
+                entry = self.timings.setdefault(key, [0.0, 0.0, 0])
+                entry[0] += wall
+                entry[1] += cpu
+                entry[2] += calls
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.gauges.update(snapshot["gauges"])
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def family(name: str, kind: str, help_text: Optional[str] = None):
+            lines.append(f"# HELP {name} {help_text or _HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            totals = sorted((k[0], v) for k, v in self.timings.items() if k[1] is None)
+            per_ticker = sorted((k, v) for k, v in self.timings.items() if k[1] is not None)
+            for metric, pos in (("nerv_stage_wall_seconds", 0), ("nerv_stage_cpu_seconds", 1),
+                                ("nerv_stage_calls", 2)):
+                family(metric, "gauge")
+                for stage, values in totals:
+                    lines.append(f'{metric}{{stage="{stage}"}} {_format_value(values[pos])}')
+            for metric, pos in (("nerv_ticker_stage_wall_seconds", 0), ("nerv_ticker_stage_cpu_seconds", 1)):
+                family(metric, "gauge")
+                for (stage, ticker), values in per_ticker:
+                    lines.append(f'{metric}{{stage="{stage}",ticker="{ticker}"}} {_format_value(values[pos])}')
+            for name, value in sorted(self.counters.items()):
+                family(name, "gauge", _HELP.get(name, f"Contador del último ciclo ({name})."))
+                lines.append(f"{name} {_format_value(value)}")
+            for name, value in sorted(self.gauges.items()):
+                family(name, "gauge", f"Valor del último ciclo ({name}).")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None):
+        """Escribe el archivo de métricas de forma atómica (lo lee node_exporter --collector.textfile)."""
+        if not self.enabled:
+            return
+        path = path or CONFIG.METRICS_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def log_summary(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            totals = sorted(((k[0], v) for k, v in self.timings.items() if k[1] is None),
+                            key=lambda item: item[1][0], reverse=True)
+        summary = ", ".join(f"{stage} {wall:.2f}s" for stage, (wall, _, _) in totals)
+        logging.info(f"Tiempos por etapa: {summary}")
+
+
+# Registro global del proceso (cada worker del pool tiene el suyo)
+metrics = Metrics(CONFIG.METRICS_ENABLED)
+
+
+def collect(fn: Callable, *args):
+    """
+    Ejecuta `fn` en un worker con el registro vacío y retorna (resultado, métricas del worker)
+    para que el proceso principal las sume con `metrics.merge`.
+    """
+    metrics.reset()
+    value = fn(*args)
+    return value, metrics.snapshot() if metrics.enabled else None
+
+
+@contextlib.contextmanager
+def profile_cycle(label: str = "cycle"):
+    """
+    Perfila el bloque si existe CONFIG.PROFILE_TRIGGER_FILE (se borra al terminar, así el
+    perfil cubre un solo ciclo). Usa pyinstrument si CONFIG.PROFILER lo pide y está instalado;
+    si no, cProfile. Los procesos del pool no quedan perfilados: usar PIPELINE_WORKERS = 1.
+    """
+    trigger = CONFIG.PROFILE_TRIGGER_FILE
+    if not trigger or not os.path.exists(trigger):
+        yield
+        return
+
+    os.makedirs(CONFIG.PROFILE_OUTPUT_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    base_path = os.path.join(CONFIG.PROFILE_OUTPUT_DIR, f"{label}_{stamp}")
+
+    profiler = None
+    if CONFIG.PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+        except ImportError:
+            logging.warning("pyinstrument no está instalado. Se usa cProfile.")
+
+    logging.info(f"Perfilando el ciclo ({'pyinstrument' if profiler else 'cProfile'}).")
+    if profiler is not None:
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(base_path + ".html", "w") as f:
+                f.write(profiler.output_html())
+            _finish_profile(trigger, base_path + ".html")
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(base_path + ".prof")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        with open(base_path + ".txt", "w") as f:
+            f.write(out.getvalue())
+        _finish_profile(trigger, base_path + ".prof")
+
+
+def _finish_profile(trigger: str, path: str):
+    try:
+        os.remove(trigger)
+    except OSError:
+        pass
+    logging.info(f"Perfil del ciclo guardado en {path}")
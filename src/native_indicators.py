@@ -0,0 +1,392 @@
+import math
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+try:
+    from numba import njit
+except ImportError:  # numba es opcional: sin él los kernels corren en Python puro sobre listas
+    njit = None
+
+# Indicadores en NumPy/numba sin pandas_ta. Las recursiones replican las de pandas_ta 0.4
+# (la serie que instala la imagen): el RSI usa su `rma`, el `ewm(alpha=1/length, adjust=False)`
+# de pandas, y coincide bit a bit con ta.rsi. Las SMAs replican el rolling mean de pandas
+# (suma compensada de Kahan); ta.sma las calcula con una convolución (producto punto de BLAS),
+# así que coinciden con ella hasta el redondeo (~1e-15 relativo), no bit a bit.
+#
+# Para agregar un indicador: escribir su paso como función escalar (como _wilder_step),
+# un kernel que recorra la serie (como _rma_kernel) y la función pública que lo envuelve.
+
+
+def _wilder_alpha(length):
+    """alpha de `ewm(alpha=1/length)` tal como lo recalcula pandas desde el centro de masa."""
+    a = 1.0 / length
+    return 1.0 / (1.0 + (1.0 - a) / a)
+
+
+def _wilder_step(avg, wt, value, alpha):
+    """
+    Un paso de `ewm(alpha=alpha, adjust=False).mean()` de pandas (ignore_na=False), la media de
+    Wilder (`rma`) de pandas_ta. Retorna (promedio, peso). El promedio es NaN hasta la primera
+    observación.
+    """
+    if avg == avg:
+        wt = wt * (1.0 - alpha)
+        if value == value:
+            if avg != value:
+                avg = (wt * avg + alpha * value) / (wt + alpha)
+            wt = 1.0
+    elif value == value:
+        avg = value
+    return avg, wt
+
+
+def _rsi_update(up, down, wt, delta, length):
+    """
+    Avanza el RSI de Wilder un paso con la variación `delta` del cierre. Las medias de subidas
+    y bajadas comparten el peso (tienen los mismos NaN). Retorna (up, down, wt, rsi).
+    """
+    alpha = _wilder_alpha(length)
+    gain = math.nan
+    loss = math.nan
+    if delta == delta:
+        gain = delta if delta > 0 else 0.0
+        loss = delta if delta < 0 else 0.0
+    new_up, new_wt = _wilder_step(up, wt, gain, alpha)
+    down, _ = _wilder_step(down, wt, loss, alpha)
+    up = new_up
+    wt = new_wt
+
+    denom = up + abs(down)
+    return up, down, wt, (100 * up / denom if denom != 0 else math.nan)
+
+
+def _sma_update(nobs, total, neg, comp_add, comp_rem, same, prev, value, old, length):
+    """
+    Un paso de `roll_mean` de pandas: quita de la ventana `old` (el cierre que sale, NaN si aún
+    no sale ninguno) y agrega `value`. La suma es de Kahan con compensaciones separadas para
+    altas y bajas, y la media es exacta cuando toda la ventana es igual.
+    Retorna (nobs, total, neg, comp_add, comp_rem, same, prev, media).
+    """
+    if length <= 1:
+        # Ventana de 1: pandas reinicia la suma en cada fila
+        nobs = 0
+        total = 0.0
+        neg = 0
+        comp_add = 0.0
+        comp_rem = 0.0
+        same = 0
+        prev = value
+    elif old == old:
+        nobs -= 1
+        y = -old - comp_rem
+        t = total + y
+        comp_rem = t - total - y
+        total = t
+        if math.copysign(1.0, old) < 0:
+            neg -= 1
+    if value == value:
+        nobs += 1
+        y = value - comp_add
+        t = total + y
+        comp_add = t - total - y
+        total = t
+        if math.copysign(1.0, value) < 0:
+            neg += 1
+        if value == prev:
+            same += 1
+        else:
+            same = 1
+        prev = value
+
+    mean = math.nan
+    if nobs >= length and nobs > 0:
+        mean = total / nobs
+        if same >= nobs:
+            mean = prev
+        elif neg == 0 and mean < 0:
+            mean = 0.0
+        elif neg == nobs and mean > 0:
+            mean = 0.0
+    return nobs, total, neg, comp_add, comp_rem, same, prev, mean
+
+
+if njit is not None:
+    _wilder_alpha = njit(cache=True)(_wilder_alpha)
+    _wilder_step = njit(cache=True)(_wilder_step)
+    _rsi_update = njit(cache=True)(_rsi_update)
+    _sma_update = njit(cache=True)(_sma_update)
+
+
+def _fused_kernel(close, offsets, rsi_length, sma_lengths, out_rsi, out_sma):
+    """
+    RSI y todas las SMAs en una sola pasada por cada segmento [offsets[s], offsets[s + 1])
+    de `close` (una serie por ticker o trayectoria, concatenadas).
+    Las SMAs avanzan con _sma_update (el `roll_mean` de pandas). Como ta.rsi, una serie de
+    menos de `rsi_length + 1` cierres no tiene RSI.
+    """
+    n_sma = len(sma_lengths)
+    for s in range(len(offsets) - 1):
+        start = offsets[s]
+        stop = offsets[s + 1]
+        if stop <= start:
+            continue
+        up = math.nan
+        down = math.nan
+        wt = 1.0
+        has_rsi = stop - start > rsi_length
+        prev = math.nan
+        s_nobs = [0] * n_sma
+        s_sum = [0.0] * n_sma
+        s_neg = [0] * n_sma
+        s_comp_add = [0.0] * n_sma
+        s_comp_rem = [0.0] * n_sma
+        s_same = [0] * n_sma
+        s_prev = [close[start]] * n_sma
+
+        for i in range(start, stop):
+            value = close[i]
+            up, down, wt, rsi = _rsi_update(up, down, wt, value - prev, rsi_length)
+            out_rsi[i] = rsi if has_rsi else math.nan
+            prev = value
+
+            for k in range(n_sma):
+                length = sma_lengths[k]
+                old = close[i - length] if i - start >= length else math.nan
+                nobs, total, neg, comp_add, comp_rem, same, last, mean = _sma_update(
+                    s_nobs[k], s_sum[k], s_neg[k], s_comp_add[k], s_comp_rem[k], s_same[k], s_prev[k],
+                    value, old, length)
+                s_nobs[k] = nobs
+                s_sum[k] = total
+                s_neg[k] = neg
+                s_comp_add[k] = comp_add
+                s_comp_rem[k] = comp_rem
+                s_same[k] = same
+                s_prev[k] = last
+                out_sma[k, i] = mean
+
+
+def _state_kernel(close, rsi_length, sma_lengths, rsi_state, sma_state):
+    """
+    Estado final tras recorrer `close`, para retomar el cálculo con filas nuevas: el del RSI
+    (up, down, wt) y el de cada SMA (los primeros siete valores de _sma_update).
+    """
+    up = math.nan
+    down = math.nan
+    wt = 1.0
+    prev = math.nan
+    for i in range(len(close)):
+        up, down, wt, _ = _rsi_update(up, down, wt, close[i] - prev, rsi_length)
+        prev = close[i]
+    rsi_state[0] = up
+    rsi_state[1] = down
+    rsi_state[2] = wt
+
+    for k in range(len(sma_lengths)):
+        length = sma_lengths[k]
+        nobs = 0
+        total = 0.0
+        neg = 0
+        comp_add = 0.0
+        comp_rem = 0.0
+        same = 0
+        last = close[0] if len(close) else math.nan
+        for i in range(len(close)):
+            old = close[i - length] if i >= length else math.nan
+            nobs, total, neg, comp_add, comp_rem, same, last, _ = _sma_update(
+                nobs, total, neg, comp_add, comp_rem, same, last, close[i], old, length)
+        sma_state[k, 0] = nobs
+        sma_state[k, 1] = total
+        sma_state[k, 2] = neg
+        sma_state[k, 3] = comp_add
+        sma_state[k, 4] = comp_rem
+        sma_state[k, 5] = same
+        sma_state[k, 6] = last
+
+
+def _ema_kernel(close, length, seed, out):
+    """
+    EMA de pandas_ta: la primera media es `seed` (SMA de los primeros `length` cierres) y luego
+    `ewm(span=length, adjust=False)` de pandas.
+    """
+    n = len(close)
+    alpha = 1.0 / (1.0 + (length - 1.0) / 2.0)
+    for i in range(min(length - 1, n)):
+        out[i] = math.nan
+    if n < length:
+        return
+    avg = seed
+    wt = 1.0
+    out[length - 1] = avg
+    for i in range(length, n):
+        value = close[i]
+        wt *= 1.0 - alpha
+        if value == value:
+            if avg != value:
+                avg = (wt * avg + alpha * value) / (wt + alpha)
+            wt = 1.0
+        out[i] = avg
+
+
+def _rma_kernel(values, length, out):
+    """Media de Wilder (`rma` de pandas_ta) de una serie completa."""
+    alpha = _wilder_alpha(length)
+    avg = math.nan
+    wt = 1.0
+    for i in range(len(values)):
+        avg, wt = _wilder_step(avg, wt, values[i], alpha)
+        out[i] = avg
+
+
+if njit is not None:
+    _fused_kernel_jit = njit(cache=True)(_fused_kernel)
+    _state_kernel_jit = njit(cache=True)(_state_kernel)
+    _ema_kernel_jit = njit(cache=True)(_ema_kernel)
+    _rma_kernel_jit = njit(cache=True)(_rma_kernel)
+else:
+    _fused_kernel_jit = _state_kernel_jit = _ema_kernel_jit = _rma_kernel_jit = None
+
+
+def _as_float64(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _run_fused(close: np.ndarray, offsets: np.ndarray, rsi_length: int, sma_lengths: Sequence[int],
+               dtype) -> tuple:
+    out_rsi = np.empty(len(close), dtype=dtype)
+    out_sma = np.empty((len(sma_lengths), len(close)), dtype=dtype)
+    lengths = np.asarray(sma_lengths, dtype=np.int64)
+    if _fused_kernel_jit is not None and CONFIG.INDICATORS_JIT:
+        _fused_kernel_jit(close, offsets, int(rsi_length), lengths, out_rsi, out_sma)
+    else:
+        # Las listas de floats de Python son bastante más rápidas de indexar que un ndarray
+        _fused_kernel(close.tolist(), offsets.tolist(), int(rsi_length), lengths.tolist(), out_rsi, out_sma)
+    return out_rsi, out_sma
+
+
+def fused_indicators(close, rsi_length: Optional[int] = None, sma_lengths: Optional[Sequence[int]] = None,
+                     dtype=np.float64) -> Dict[str, np.ndarray]:
+    """
+    RSI y SMAs de una serie de cierres en una sola pasada. Por defecto los periodos de CONFIG.
+    Retorna {'RSI': ..., 'SMA_<n>': ...}. `dtype=np.float32` reduce a la mitad la memoria de
+    salida (el cálculo interno sigue en float64).
+    """
+    rsi_length = rsi_length or CONFIG.RSI_PARAMS['period']
+    sma_lengths = _config_sma_lengths() if sma_lengths is None else list(sma_lengths)
+    close = _as_float64(close)
+    out_rsi, out_sma = _run_fused(close, np.array([0, len(close)], dtype=np.int64), rsi_length, sma_lengths, dtype)
+    out = {'RSI': out_rsi}
+    for length, values in zip(sma_lengths, out_sma):
+        out[f"SMA_{length}"] = values
+    return out
+
+
+def fused_indicators_batch(closes: Sequence, rsi_length: Optional[int] = None,
+                           sma_lengths: Optional[Sequence[int]] = None, dtype=np.float64) -> List[Dict[str, np.ndarray]]:
+    """
+    Igual que fused_indicators para muchas series a la vez (tickers de distinto largo): se
+    concatenan en un solo buffer y el kernel recorre todos los segmentos en una llamada.
+    """
+    rsi_length = rsi_length or CONFIG.RSI_PARAMS['period']
+    sma_lengths = _config_sma_lengths() if sma_lengths is None else list(sma_lengths)
+    arrays = [_as_float64(c) for c in closes]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    close = np.concatenate(arrays) if arrays else np.empty(0)
+    out_rsi, out_sma = _run_fused(close, offsets, rsi_length, sma_lengths, dtype)
+    results = []
+    for s in range(len(arrays)):
+        lo, hi = offsets[s], offsets[s + 1]
+        out = {'RSI': out_rsi[lo:hi]}
+        for length, values in zip(sma_lengths, out_sma):
+            out[f"SMA_{length}"] = values[lo:hi]
+        results.append(out)
+    return results
+
+
+def fused_indicators_2d(paths: np.ndarray, rsi_length: Optional[int] = None,
+                        sma_lengths: Optional[Sequence[int]] = None, dtype=np.float64) -> tuple:
+    """
+    Versión por lotes para una matriz (series x barras) de igual largo, como las trayectorias
+    de src.robustness. Retorna (rsi, smas) con formas (series, barras) y (n_sma, series, barras).
+    """
+    rsi_length = rsi_length or CONFIG.RSI_PARAMS['period']
+    sma_lengths = _config_sma_lengths() if sma_lengths is None else list(sma_lengths)
+    n_series, n_bars = paths.shape
+    close = _as_float64(paths).reshape(-1)
+    offsets = np.arange(n_series + 1, dtype=np.int64) * n_bars
+    out_rsi, out_sma = _run_fused(close, offsets, rsi_length, sma_lengths, dtype)
+    return out_rsi.reshape(n_series, n_bars), out_sma.reshape(len(sma_lengths), n_series, n_bars)
+
+
+def indicator_state(close, rsi_length: int, sma_lengths: Sequence[int]) -> tuple:
+    """
+    Estado con el que fused_indicators seguiría tras el último cierre: (up, down, wt) del RSI y,
+    por SMA, [nobs, suma, negativos, comp_alta, comp_baja, iguales, último] para _sma_update.
+    """
+    close = _as_float64(close)
+    rsi_state = np.empty(3, dtype=np.float64)
+    sma_state = np.empty((len(sma_lengths), 7), dtype=np.float64)
+    lengths = np.asarray(sma_lengths, dtype=np.int64)
+    if _state_kernel_jit is not None and CONFIG.INDICATORS_JIT:
+        _state_kernel_jit(close, int(rsi_length), lengths, rsi_state, sma_state)
+    else:
+        _state_kernel(close.tolist(), int(rsi_length), lengths.tolist(), rsi_state, sma_state)
+    sma = [[int(row[0]), float(row[1]), int(row[2]), float(row[3]), float(row[4]), int(row[5]), float(row[6])]
+           for row in sma_state]
+    return tuple(float(v) for v in rsi_state), sma
+
+
+def rsi(close, length: int = 14) -> np.ndarray:
+    """Equivalente a ta.rsi(close, length) como array."""
+    return fused_indicators(close, length, [])['RSI']
+
+
+def sma(close, length: int = 10) -> np.ndarray:
+    """Equivalente a ta.sma(close, length) como array."""
+    return fused_indicators(close, 2, [length])[f"SMA_{length}"]
+
+
+def ema(close, length: int = 10) -> np.ndarray:
+    """Equivalente a ta.ema(close, length) (semilla SMA, adjust=False)."""
+    close = _as_float64(close)
+    out = np.empty(len(close), dtype=np.float64)
+    seed = float(np.mean(close[:length])) if len(close) >= length else math.nan
+    if _ema_kernel_jit is not None and CONFIG.INDICATORS_JIT:
+        _ema_kernel_jit(close, int(length), seed, out)
+    else:
+        _ema_kernel(close.tolist(), int(length), seed, out)
+    return out
+
+
+def atr(high, low, close, length: int = 14) -> np.ndarray:
+    """
+    Equivalente a ta.atr(high, low, close, length): rango verdadero (el primero es high - low),
+    semilla con la media de los primeros `length` rangos y luego la media de Wilder.
+    """
+    high, low, close = _as_float64(high), _as_float64(low), _as_float64(close)
+    out = np.full(len(close), np.nan)
+    if len(close) <= length:
+        return out
+    hl_range = high - low
+    if (hl_range == 0).any():
+        # non_zero_range de pandas_ta
+        hl_range = hl_range + np.finfo(float).eps
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(np.fmax(np.abs(hl_range), np.abs(high - prev_close)), np.abs(prev_close - low))
+    true_range[length - 1] = np.mean(true_range[:length])
+    true_range[:length - 1] = np.nan
+    if _rma_kernel_jit is not None and CONFIG.INDICATORS_JIT:
+        _rma_kernel_jit(true_range, int(length), out)
+    else:
+        _rma_kernel(true_range.tolist(), int(length), out)
+    return out
+
+
+def _config_sma_lengths() -> List[int]:
+    return [CONFIG.SMA_PERIODS['short'], CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']]
@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.cache_store import get_cache_store
+from src.native_indicators import rsi, sma
+from src.strategy import (P_CAPITAL_INICIAL, S_CAPITAL, S_SHARES, S_TOTAL_TRADES, event_buffers,
+                          initial_state, pack_params, simulate_arrays, strategy_params)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Parámetros que cambian las series de indicadores (el resto son umbrales de la estrategia)
+INDICATOR_KEYS = ('rsi_period', 'sma_medium', 'sma_long')
+
+
+def default_params() -> dict:
+    """Combinación base: umbrales de la estrategia más los periodos de indicadores de CONFIG."""
+    params = strategy_params()
+    params.pop('period', None)
+    params['rsi_period'] = CONFIG.RSI_PARAMS['period']
+    params['sma_medium'] = CONFIG.SMA_PERIODS['medium']
+    params['sma_long'] = CONFIG.SMA_PERIODS['long']
+    return params
+
+
+def grid_combinations(grid: Dict[str, list]) -> List[dict]:
+    """Producto cartesiano de una grilla {parámetro: [valores]}."""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_combinations(space: Dict[str, object], n: int, seed: int = 0) -> List[dict]:
+    """
+    Muestreo aleatorio de un espacio {parámetro: [valores] o (mínimo, máximo)}.
+    Los rangos con extremos enteros se muestrean como enteros (inclusive).
+    """
+    rng = np.random.default_rng(seed)
+    combos = []
+    for _ in range(n):
+        combo = {}
+        for key, spec in space.items():
+            if isinstance(spec, tuple):
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    combo[key] = int(rng.integers(low, high + 1))
+                else:
+                    combo[key] = float(rng.uniform(low, high))
+            else:
+                combo[key] = spec[int(rng.integers(len(spec)))]
+        combos.append(combo)
+    return combos
+
+
+def _build_matrices(combos: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convierte las combinaciones en una matriz de periodos de indicadores y otra de parámetros del kernel."""
+    base = default_params()
+    unknown = {k for combo in combos for k in combo} - set(base)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos en el barrido: {sorted(unknown)}")
+
+    indicators = np.empty((len(combos), len(INDICATOR_KEYS)), dtype=np.int64)
+    packed = np.empty((len(combos), 10), dtype=np.float64)
+    for j, combo in enumerate(combos):
+        params = {**base, **combo}
+        indicators[j] = [params[k] for k in INDICATOR_KEYS]
+        packed[j] = pack_params(params)
+    return indicators, packed
+
+
+# Estado por proceso del pool (se inicializa una vez por worker, no por tarea)
+_WORKER = {}
+
+
+def _init_worker(indicators: np.ndarray, packed: np.ndarray):
+    _WORKER['indicators'] = indicators
+    _WORKER['packed'] = packed
+
+
+def _evaluate_ticker(ticker: str) -> Optional[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Evalúa todas las combinaciones sobre un ticker. Cada serie de indicador (RSI de largo L,
+    SMA de periodo N) se calcula una sola vez y se comparte entre las combinaciones que la usan.
+    """
+    indicators = _WORKER['indicators']
+    packed = _WORKER['packed']
+
+    store = get_cache_store()
+    if not store.exists(ticker):
+        return None
+    df = store.read(ticker)
+    if df.empty:
+        return None
+    close = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+
+    series_cache = {}
+
+    def series(kind: str, length: int) -> np.ndarray:
+        key = (kind, length)
+        if key not in series_cache:
+            fn = rsi if kind == 'rsi' else sma
+            series_cache[key] = fn(close, length=int(length))
+        return series_cache[key]
+
+    final_values = np.empty(len(packed), dtype=np.float64)
+    trades = np.empty(len(packed), dtype=np.int64)
+    buffers = event_buffers(len(close))
+    for j in range(len(packed)):
+        rsi_period, sma_medium, sma_long = indicators[j]
+        state = initial_state(packed[j, P_CAPITAL_INICIAL])
+        simulate_arrays(close, series('rsi', rsi_period), series('sma', sma_medium), series('sma', sma_long),
+                        packed[j], state, buffers=buffers)
+        final_values[j] = state[S_CAPITAL] + state[S_SHARES] * close[-1]
+        trades[j] = int(state[S_TOTAL_TRADES])
+    return ticker, final_values, trades
+
+
+def run_sweep(combos: List[dict], tickers: Optional[List[str]] = None, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evalúa cada combinación de parámetros sobre todos los tickers con datos en caché,
+    repartiendo los tickers en un pool de procesos. Retorna una tabla ordenada por
+    CONFIG.SWEEP_RANK_BY (mejor primero).
+    """
+    if not combos:
+        return pd.DataFrame()
+    tickers = tickers or CONFIG.TICKERS
+    workers = workers or CONFIG.SWEEP_WORKERS or os.cpu_count() or 1
+    indicators, packed = _build_matrices(combos)
+
+    t0 = time.perf_counter()
+    outputs = {}
+    if workers == 1:
+        _init_worker(indicators, packed)
+        for ticker in tickers:
+            out = _evaluate_ticker(ticker)
+            if out is not None:
+                outputs[ticker] = out
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(indicators, packed)) as pool:
+            futures = {pool.submit(_evaluate_ticker, t): t for t in tickers}
+            for future in as_completed(futures):
+                try:
+                    out = future.result()
+                except Exception as e:
+                    logging.error(f"Error evaluando barrido para {futures[future]}: {e}")
+                    continue
+                if out is not None:
+                    outputs[out[0]] = out
+
+    evaluated = [t for t in tickers if t in outputs]
+    skipped = len(tickers) - len(evaluated)
+    if skipped:
+        logging.warning(f"{skipped} tickers sin datos en caché fueron omitidos del barrido.")
+    if not evaluated:
+        return pd.DataFrame()
+
+    capital = packed[:, P_CAPITAL_INICIAL]
+    final_values = np.vstack([outputs[t][1] for t in evaluated])
+    trades = np.vstack([outputs[t][2] for t in evaluated])
+    returns = (final_values - capital) / capital * 100
+
+    table = pd.DataFrame(combos)
+    table['Rendimiento Medio (%)'] = returns.mean(axis=0)
+    table['Rendimiento Mediana (%)'] = np.median(returns, axis=0)
+    table['Peor Rendimiento (%)'] = returns.min(axis=0)
+    table['Win Rate (%)'] = (returns > 0).mean(axis=0) * 100
+    table['Operaciones'] = trades.sum(axis=0)
+    table['Capital Final Total'] = final_values.sum(axis=0)
+    table = table.sort_values(CONFIG.SWEEP_RANK_BY, ascending=False, kind='stable').reset_index(drop=True)
+    table.index = table.index + 1
+    table.index.name = 'Ranking'
+
+    elapsed = time.perf_counter() - t0
+    logging.info(f"Barrido completado: {len(combos)} combinaciones x {len(evaluated)} tickers en {elapsed:.1f}s.")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la estrategia NERV sobre el caché local.")
+    parser.add_argument("--random", type=int, default=0,
+                        help="Número de combinaciones aleatorias sobre CONFIG.SWEEP_GRID (0 = grilla completa)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tickers", nargs="*", default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.random:
+        combos = random_combinations(CONFIG.SWEEP_GRID, args.random, seed=args.seed)
+    else:
+        combos = grid_combinations(CONFIG.SWEEP_GRID)
+
+    table = run_sweep(combos, tickers=args.tickers, workers=args.workers)
+    if table.empty:
+        logging.warning("El barrido no produjo resultados.")
+        return
+
+    os.makedirs(os.path.dirname(CONFIG.SWEEP_RESULTS_PATH), exist_ok=True)
+    table.to_csv(CONFIG.SWEEP_RESULTS_PATH)
+    logging.info(f"Resultados del barrido guardados en {CONFIG.SWEEP_RESULTS_PATH}")
+    print(table.head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+import datetime
+import functools
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.async_fetch import load_data_async_batch
+from src.data_loader import latest_daily_bar, load_data_batch, load_data_intraday, record_daily_bar
+from src.hot_cache import hot_dataset
+from src.indicators import apply_indicators, apply_indicators_incremental
+from src.latest_signals import checkpoint_results
+from src.metrics import collect, metrics, profile_cycle
+from src.portfolio import format_portfolio_report, run_portfolio
+from src.query_service import query_index, start_query_service
+from src.report_render import render_backtest_report, write_atomic
+from src.robustness import run_robustness
+from src.scheduler import Scheduler
+from src.sharding import (configure_shard, cycle_id, merge_partials, run_local_shards, wait_for_partials,
+                          write_partial)
+from src.signal_store import SignalStore
+from src.strategy import run_backtest, run_backtest_incremental # Now using the backtest engine
+
+def generate_markdown_report(results: List[Dict], report_path: str, robustness: Optional[List[Dict]] = None):
+    """
+    Generates a detailed Markdown report with global aggregates and per-ticker logs.
+    `robustness` (output of src.robustness.run_robustness) adds the Monte Carlo section.
+    Per-ticker sections come from the render cache (only changed tickers are re-rendered)
+    and the file is written in one go and published with an atomic rename.
+    """
+    try:
+        generated_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        write_atomic(report_path, render_backtest_report(results, generated_at, robustness))
+        logging.info(f"Informe generado exitosamente en {report_path}")
+    except Exception as e:
+        logging.error(f"Error al generar el informe: {e}")
+
+
+def select_signals(results: List[Dict]) -> Tuple[Optional[str], List[Dict]]:
+    """Most recent operation date across `results` and the BUY/SELL signals dated on it."""
+    # Obtener la fecha más reciente de los resultados
+    last_dates = []
+    for res in results:
+        if res.get('History'):
+            last_dates.append(res['History'][-1]['date'])
+
+    if not last_dates:
+        return None, []
+
+    reference_date = max(last_dates)
+    signals = []
+
+    for res in results:
+        history = res.get('History', [])
+        if history:
+            last_event = history[-1]
+            if last_event['date'] == reference_date:
+                signals.append({
+                    'Ticker': res['Ticker'],
+                    'Acción': last_event['action'],
+                    'Precio': last_event['price'],
+                    'Motivo': last_event['reason'],
+                    'Fecha': last_event['date']
+                })
+    return reference_date, signals
+
+
+def generate_signals_report(results: List[Dict], report_path: str) -> List[Dict]:
+    """Generates a concise report with only today's BUY/SELL signals and returns them."""
+    try:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        
+        reference_date, signals = select_signals(results)
+        if reference_date is None:
+            logging.warning("No hay historial operativo para generar señales.")
+            return []
+
+        parts = [f"# 🎯 Recomendaciones NERV - {reference_date}\n\n"]
+        if not signals:
+            parts.append("No hay señales de COMPRA o VENTA detectadas para la jornada más reciente.\n")
+        else:
+            parts.append("### 📢 Acciones Sugeridas\n")
+            parts.append("| Ticker | Operación | Precio Ref. | Motivo Técnico |\n")
+            parts.append("|--------|-----------|-------------|----------------|\n")
+            for s in signals:
+                emoji = "🚀" if s['Acción'] == 'Compra' else "💰"
+                parts.append(f"| **{s['Ticker']}** | {emoji} **{s['Acción']}** | ${s['Precio']:,.2f} | {s['Motivo']} |\n")
+        parts.append("\n\n*Nota: Estas señales corresponden al estado más reciente detectado en el backtest.*")
+        write_atomic(report_path, "".join(parts))
+            
+        logging.info(f"Reporte de señales generado exitosamente en {report_path}")
+        return signals
+
+    except Exception as e:
+        logging.error(f"Error generando reporte de señales: {e}")
+        return []
+
+def append_signals_to_json(signals: List[Dict], log_path: str):
+    """
+    Records current signals in the indexed signal store and refreshes the legacy
+    JSON log (used by the web integration) from it.
+    """
+    if not signals:
+        return
+        
+    try:
+        with SignalStore(CONFIG.SIGNALS_DB_PATH) as store:
+            # Migración única del log JSON histórico al crear la base
+            if store.is_new and os.path.exists(log_path):
+                store.import_legacy_json(log_path)
+            
+            # Agregar nuevas señales con timestamp de procesamiento (los duplicados se ignoran)
+            now_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            store.add(signals, processed_at=now_str)
+            store.export_legacy_json(log_path, limit=CONFIG.SIGNALS_JSON_EXPORT_LIMIT)
+            
+        logging.info(f"Señales históricas guardadas en {log_path}")
+    except Exception as e:
+        logging.error(f"Error guardando señales en JSON: {e}")
+
+
+def analyze_ticker(ticker: str, df: pd.DataFrame, incremental: bool = True,
+                   prepared: bool = False) -> Optional[Dict]:
+    """
+    Runs indicators and backtest for one ticker. Picklable so it can run in a worker process.
+    `incremental=False` skips the per-ticker indicator state and checkpoints (intraday windows);
+    `prepared=True` means `df` already carries its indicators (from the in-memory hot cache).
+    """
+    # 1. Agregar Indicadores (RSI y SMAs), extendiendo solo las filas nuevas si se puede
+    if not prepared:
+        with metrics.stage("indicators", ticker):
+            if incremental and CONFIG.INDICATORS_INCREMENTAL:
+                df = apply_indicators_incremental(df, ticker)
+            else:
+                df = apply_indicators(df)
+    
+    # 2. Correr Backtest sobre los históricos
+    try:
+         with metrics.stage("backtest", ticker):
+              if incremental and CONFIG.BACKTEST_CHECKPOINTS:
+                   resultado_ticker = run_backtest_incremental(df, ticker)
+              else:
+                   resultado_ticker = run_backtest(df, ticker)
+         return resultado_ticker or None
+    except Exception as e:
+         logging.error(f"Error procesando backtest para {ticker}: {e}")
+         return None
+
+
+def run_analysis(datasets: Dict[str, pd.DataFrame], workers: Optional[int] = None,
+                 incremental: bool = True, tickers: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Analyzes every ticker with data, serially (workers=1) or on a process pool.
+    Results are streamed back as workers finish, but the returned list always follows
+    the order of `tickers` (CONFIG.TICKERS by default) so reports are identical to a serial run.
+    """
+    universe = CONFIG.TICKERS if tickers is None else tickers
+    tickers = []
+    for ticker in universe:
+        df = datasets.get(ticker)
+        if df is None or df.empty:
+            logging.warning(f"Omitiendo {ticker} por falta de datos.")
+            continue
+        tickers.append(ticker)
+
+    # Indicadores desde el caché en memoria del daemon (solo filas nuevas); los tickers sin
+    # estado previo se calculan completos en los workers
+    datasets = dict(datasets)
+    prepared = set()
+    if CONFIG.HOT_CACHE_ENABLED and incremental and CONFIG.INDICATORS_INCREMENTAL:
+        for ticker in tickers:
+            if hot_dataset.can_prepare(ticker, datasets[ticker]):
+                with metrics.stage("indicators", ticker):
+                    datasets[ticker] = hot_dataset.prepare(ticker, datasets[ticker])
+                prepared.add(ticker)
+
+    workers = workers or os.cpu_count() or 1
+    by_ticker = {}
+    if workers > 1 and len(tickers) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tickers))) as pool:
+                # Cada worker devuelve también sus métricas para sumarlas a las del ciclo
+                futures = {pool.submit(collect, analyze_ticker, t, datasets[t], incremental, t in prepared): t
+                           for t in tickers}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    ticker = futures[future]
+                    try:
+                        by_ticker[ticker], worker_metrics = future.result()
+                        metrics.merge(worker_metrics)
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        logging.error(f"Error procesando {ticker} en worker: {e}")
+                        by_ticker[ticker] = None
+                    logging.debug(f"Resultado recibido para {ticker} ({done}/{len(tickers)}).")
+        except BrokenProcessPool as e:
+            logging.error(f"Pool de procesos caído ({e}). Continuando en modo serial.")
+
+    # Modo serial (o tickers pendientes si el pool falló)
+    for ticker in tickers:
+        if ticker not in by_ticker:
+            by_ticker[ticker] = analyze_ticker(ticker, datasets[ticker], incremental, ticker in prepared)
+
+    return [by_ticker[t] for t in tickers if by_ticker[t]]
+
+
+def load_daily_datasets(tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Daily series of `tickers` from the cache, downloading only the missing bars (batch or async)."""
+    if CONFIG.FETCH_MODE == "async":
+        return load_data_async_batch(tickers, interval="1d")
+    return load_data_batch(tickers, period="3y", interval="1d")
+
+
+def analyze_tickers(tickers: List[str], workers: Optional[int] = None) -> List[Dict]:
+    """
+    Download and analysis of a subset of the universe without writing reports (CLI commands).
+    Goes through the same checkpoints and indicator state as the daily cycle.
+    """
+    datasets = load_daily_datasets(tickers)
+    return run_analysis(datasets, workers or CONFIG.PIPELINE_WORKERS, tickers=tickers)
+
+
+def run_cycle(daily: bool = True, intervals: Optional[List[str]] = None, stages=None) -> List[Dict]:
+    """
+    Runs one scan cycle (download, analysis and reports) and writes its metrics.
+    `daily` runs the daily scan; `intervals` are the intraday intervals to scan
+    (CONFIG.INTRADAY_INTERVALS by default). `stages` replaces the daily scan (shard and
+    coordinator roles). Returns the daily backtest results.
+    """
+    intervals = CONFIG.INTRADAY_INTERVALS if intervals is None else intervals
+    stages = stages or _run_cycle_stages
+    metrics.reset()
+    cycle_start = time.perf_counter()
+    results, signals_today = [], []
+    with profile_cycle():
+        if daily:
+            results, signals_today = stages()
+        for interval in intervals:
+            try:
+                with metrics.stage(f"intraday_{interval}"):
+                    signals_today = signals_today + _run_intraday_stages(interval)
+            except Exception as e:
+                logging.error(f"Error en el escaneo intradía {interval}: {e}")
+    
+    metrics.set("nerv_cycle_duration_seconds", time.perf_counter() - cycle_start)
+    metrics.set("nerv_cycle_tickers_analyzed", len(results))
+    metrics.set("nerv_cycle_signals_found", len(signals_today))
+    metrics.set("nerv_cycle_last_run_timestamp_seconds", time.time())
+    metrics.log_summary()
+    try:
+        metrics.write_prometheus()
+    except Exception as e:
+        logging.error(f"Error escribiendo métricas: {e}")
+    return results
+
+
+def _run_cycle_stages():
+    """Download, analysis and reports of one cycle. Returns (results, today's signals)."""
+    logging.info("--- Iniciando ciclo de escaneo NERV ---")
+    
+    # Descarga por lotes (una petición multi-ticker por bloque) o asíncrona con rate limit
+    with metrics.stage("load_data"):
+        datasets = load_daily_datasets(CONFIG.TICKERS)
+    
+    with metrics.stage("analysis"):
+        results = run_analysis(datasets, CONFIG.PIPELINE_WORKERS)
+    
+    robustness = _run_robustness_stage(datasets) if results else None
+    if results:
+        _run_portfolio_stage(datasets)
+    return results, _write_daily_reports(results, robustness)
+
+
+def _run_robustness_stage(datasets: Dict[str, pd.DataFrame]) -> Optional[List[Dict]]:
+    """Monte Carlo robustness summaries when CONFIG.ROBUSTNESS_ENABLED, else None."""
+    if not CONFIG.ROBUSTNESS_ENABLED:
+        return None
+    with metrics.stage("robustness"):
+        try:
+            return run_robustness(datasets)
+        except Exception as e:
+            logging.error(f"Error en el análisis de robustez: {e}")
+            return None
+
+
+def _run_portfolio_stage(datasets: Dict[str, pd.DataFrame]):
+    """Shared-capital portfolio simulation and its dated report when CONFIG.PORTFOLIO_ENABLED."""
+    if not CONFIG.PORTFOLIO_ENABLED:
+        return
+    with metrics.stage("portfolio"):
+        try:
+            summary = run_portfolio(datasets)
+            today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+            base_report, ext_report = os.path.splitext(CONFIG.PORTFOLIO_REPORT_PATH)
+            write_atomic(f"{base_report}_{today_str}{ext_report}",
+                         format_portfolio_report(summary, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        except Exception as e:
+            logging.error(f"Error en la simulación de portafolio: {e}")
+
+
+def _write_daily_reports(results: List[Dict], robustness: Optional[List[Dict]] = None) -> List[Dict]:
+    """Backtest report, signals report and signal log of the daily scan. Returns today's signals."""
+    signals_today = []
+    if results:
+        # Generar nombres con fecha para el historial
+        today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+        
+        # Informe de Backtest con fecha (Auditoría visual)
+        base_report, ext_report = os.path.splitext(CONFIG.REPORT_PATH)
+        dated_report_path = f"{base_report}_{today_str}{ext_report}"
+        with metrics.stage("report_markdown"):
+            generate_markdown_report(results, dated_report_path, robustness)
+        
+        # Informe de Señales con fecha (Acción diaria)
+        base_signal, ext_signal = os.path.splitext(CONFIG.SIGNAL_REPORT_PATH)
+        dated_signal_path = f"{base_signal}_{today_str}{ext_signal}"
+        with metrics.stage("report_signals"):
+            signals_today = generate_signals_report(results, dated_signal_path)
+        
+        # Log Histórico JSON (Para integración Web)
+        with metrics.stage("signals_log"):
+            append_signals_to_json(signals_today, CONFIG.SIGNALS_JSON_LOG)
+        
+        # Índices en memoria del servicio de consultas (la web no relee los archivos)
+        if CONFIG.QUERY_SERVICE_ENABLED:
+            with metrics.stage("query_index"):
+                query_index.refresh(results, signals_today,
+                                    generated_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        
+        logging.info("Simulación y reporteo terminados exitosamente.")
+        logging.info(f"Reportes guardados: {os.path.basename(dated_report_path)} y {os.path.basename(dated_signal_path)}")
+    else:
+        logging.warning("No se generaron resultados de backtest.")
+    return signals_today
+
+
+def _run_shard_stages(index: int, count: int):
+    """
+    Daily scan of one shard: download and analysis of its slice of the universe. The results
+    are published for the coordinator instead of writing reports. Returns (results, []).
+    """
+    cycle = cycle_id()
+    logging.info(f"--- Iniciando ciclo {cycle} del shard {index + 1}/{count} ---")
+    try:
+        with metrics.stage("load_data"):
+            datasets = load_daily_datasets(CONFIG.TICKERS)
+        with metrics.stage("analysis"):
+            results = run_analysis(datasets, CONFIG.PIPELINE_WORKERS)
+        robustness = _run_robustness_stage(datasets) if results else None
+    except Exception as e:
+        write_partial(cycle, index, count, CONFIG.TICKERS, [], error=str(e))
+        raise
+    with metrics.stage("shard_publish"):
+        write_partial(cycle, index, count, CONFIG.TICKERS, results, robustness=robustness, last_bar=latest_daily_bar())
+    logging.info(f"Shard {index + 1}/{count}: {len(results)} resultados publicados.")
+    return results, []
+
+
+def _run_coordinator_stages(count: int, timeout: Optional[float] = None):
+    """
+    Merges the shards' partial results of this cycle (waiting for lagging shards up to
+    CONFIG.SHARD_TIMEOUT_SECONDS) and writes the usual reports and signal log.
+    """
+    cycle = cycle_id()
+    logging.info(f"--- Coordinando ciclo {cycle} ({count} shards) ---")
+    with metrics.stage("shard_wait"):
+        partials = wait_for_partials(cycle, count, timeout=timeout)
+    # El coordinador no descarga: la barra más reciente es la que guardaron los shards
+    for partial in partials.values():
+        if partial.get('last_bar') is not None:
+            record_daily_bar(partial['last_bar'])
+    results, robustness, status = merge_partials(cycle, count, partials, CONFIG.TICKERS)
+    metrics.set("nerv_shards_total", count)
+    for key, shards in status.items():
+        metrics.set(f"nerv_shards_{key}", len(shards))
+    return results, _write_daily_reports(results, robustness)
+
+
+def _local_shard_process(index: int, count: int):
+    """Entry point of one shard process in the local stand-in (--local-shards)."""
+    configure_shard(index, count)
+    # Una excepción termina el proceso con código 1 y el padre lo reintenta
+    run_cycle(daily=True, intervals=[], stages=functools.partial(_run_shard_stages, index, count))
+
+
+def _run_local_shard_stages(count: int):
+    """Local stand-in for the sharded deployment: one process per shard, then the merge."""
+    with metrics.stage("shards"):
+        exit_codes = run_local_shards(_local_shard_process, count)
+    failed = [index for index, code in exit_codes.items() if code != 0]
+    if failed:
+        logging.warning(f"Shards con error: {failed}")
+    # Todos los procesos terminaron: no hay nada más que esperar
+    return _run_coordinator_stages(count, timeout=0)
+
+
+def _run_intraday_stages(interval: str) -> List[Dict]:
+    """
+    Intraday scan for one interval: refreshes the partitioned cache bar by bar, analyzes the
+    most recent CONFIG.INTRADAY_ANALYSIS_BARS bars and writes interval-suffixed reports.
+    Returns the signals of the latest bar.
+    """
+    logging.info(f"--- Escaneo intradía {interval} ---")
+    datasets = load_data_intraday(CONFIG.TICKERS, interval)
+    # Ventana móvil: los indicadores y el backtest se recalculan sobre las barras cargadas
+    results = run_analysis(datasets, CONFIG.PIPELINE_WORKERS, incremental=False)
+    if not results:
+        logging.warning(f"No se generaron resultados intradía {interval}.")
+        return []
+    
+    today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+    base_report, ext_report = os.path.splitext(CONFIG.REPORT_PATH)
+    generate_markdown_report(results, f"{base_report}_{today_str}_{interval}{ext_report}")
+    base_signal, ext_signal = os.path.splitext(CONFIG.SIGNAL_REPORT_PATH)
+    return generate_signals_report(results, f"{base_signal}_{today_str}_{interval}{ext_signal}")
+
+
+def run_fixed_interval_loop(once: bool = False, cycle=run_cycle):
+    """Previous behaviour: one full cycle every hour, regardless of market hours."""
+    while True:
+        try:
+            cycle()
+
+        except Exception as e:
+            logging.error(f"Error crítico en el ciclo principal: {e}")
+            
+        finally:
+            if once:
+                return
+            # EL ESCUDO ANTI-BANEO (Sentinel Mode) - ESTO SIEMPRE SE EJECUTA
+            logging.info("Modo centinela activado. Próximo escaneo en 1 hora...")
+            time.sleep(3600)
+
+
+def cycle_for(shard_index: Optional[int] = None, shard_count: Optional[int] = None, coordinator: bool = False,
+              local_shards: Optional[int] = None):
+    """
+    Cycle callable and intraday intervals for the deployment role: a shard worker (configures
+    CONFIG for its slice of the universe), the coordinator, the local shard stand-in or a
+    plain single-process scan. Returns (cycle, intervals).
+    """
+    if shard_index is not None:
+        configure_shard(shard_index, shard_count)
+        # Los intervalos intradía no se reparten: los escanea el coordinador
+        return functools.partial(run_cycle, intervals=[],
+                                 stages=functools.partial(_run_shard_stages, shard_index, shard_count)), []
+    if coordinator:
+        return functools.partial(run_cycle, stages=functools.partial(_run_coordinator_stages, shard_count)), None
+    if local_shards:
+        return functools.partial(run_cycle, stages=functools.partial(_run_local_shard_stages, local_shards)), None
+    return run_cycle, None
+
+
+def run_daemon(cycle=run_cycle, intervals: Optional[List[str]] = None, once: bool = False, force: bool = False,
+               serve_queries: bool = True):
+    """
+    Runs `cycle` whenever a new close or bar is due (market calendar), or every hour with
+    CONFIG.SCHEDULER_ENABLED off. `once` runs what is due and returns (cron mode); `force`
+    runs the first cycle even if nothing is due. `serve_queries` starts the query service.
+    """
+    if serve_queries and CONFIG.QUERY_SERVICE_ENABLED and not once:
+        # Backtests del último ciclo desde los checkpoints: el servicio responde antes del próximo cierre
+        results = checkpoint_results() if CONFIG.BACKTEST_CHECKPOINTS else []
+        query_index.warm(results, select_signals(results)[1])
+        start_query_service(query_index)
+
+    if not CONFIG.SCHEDULER_ENABLED:
+        run_fixed_interval_loop(once=once, cycle=cycle)
+        return
+
+    scheduler = Scheduler(intervals=intervals)
+    if once:
+        scheduler.run_pending(cycle, force=force)
+        return
+
+    while True:
+        try:
+            scheduler.run_pending(cycle, force=force)
+            force = False
+
+        except Exception as e:
+            logging.error(f"Error crítico en el ciclo principal: {e}")
+            
+        finally:
+            # EL ESCUDO ANTI-BANEO (Sentinel Mode) - ESTO SIEMPRE SE EJECUTA
+            wake = scheduler.next_wake()
+            logging.info(f"Modo centinela activado. Próximo escaneo: {wake:%Y-%m-%d %H:%M} UTC...")
+            scheduler.sleep_until(wake)
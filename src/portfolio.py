@@ -0,0 +1,367 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.cache_store import cache_key, get_cache_store
+from src.ledger import (ACTION_BUY, ACTION_HOLD, ACTION_SELL, LEDGER_DTYPE, REASON_COMPRA_ALCISTA_N1,
+                        REASON_COMPRA_ALCISTA_N2, REASON_COMPRA_ALCISTA_N3, REASON_COMPRA_BAJISTA,
+                        REASON_PULLBACK_ALCISTA, REASON_VENTA_ALCISTA, REASON_VENTA_BAJISTA, TradeLedger)
+from src.native_indicators import fused_indicators_batch
+from src.report_render import write_atomic
+from src.strategy import (P_COMPRA_1, P_COMPRA_2, P_COMPRA_STEP, P_CRUCE_BAJISTA, P_PULLBACK, P_RENTABILIDAD_MINIMA,
+                          P_VENTA_ALCISTA, P_VENTA_BAJISTA, _column, pack_params, strategy_params)
+
+# Orden de las compras del mismo día cuando compiten por el efectivo
+RANKINGS = ("rsi", "ticker")
+
+# Base del monto de cada compra: valor actual de la cuenta o capital inicial
+SIZINGS = ("equity", "initial")
+
+
+def align_universe(datasets: Dict[str, pd.DataFrame]) -> Dict:
+    """
+    Prepara las series de todos los tickers sobre un eje de fechas común, como un flujo de
+    barras ordenado por fecha (y por orden del universo dentro de cada fecha): las barras de
+    cada día son un tramo contiguo `bounds[d]:bounds[d + 1]`. No hay relleno, así que la memoria
+    es la de las barras reales aunque los tickers tengan historiales de distinto largo.
+    Los indicadores se calculan con el kernel fusionado (mismos valores que el ciclo diario).
+    """
+    tickers = [t for t, df in datasets.items()
+               if df is not None and not df.empty and 'Close' in df.columns]
+    closes = [_column(datasets[t], 'Close') for t in tickers]
+    dates = [datasets[t].index.values.astype('datetime64[s]') for t in tickers]
+    indicators = fused_indicators_batch(closes, CONFIG.RSI_PARAMS['period'],
+                                        [CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']])
+    medium, long = f"SMA_{CONFIG.SMA_PERIODS['medium']}", f"SMA_{CONFIG.SMA_PERIODS['long']}"
+
+    axis = np.unique(np.concatenate(dates)) if dates else np.empty(0, dtype='datetime64[s]')
+    position = np.concatenate([np.searchsorted(axis, d) for d in dates]) if dates else np.empty(0, dtype=np.int64)
+    ticker = np.concatenate([np.full(len(c), i, dtype=np.int64) for i, c in enumerate(closes)]) \
+        if closes else np.empty(0, dtype=np.int64)
+    order = np.lexsort((ticker, position))
+
+    def stream(arrays):
+        return np.concatenate(arrays)[order] if arrays else np.empty(0)
+
+    # RSI de la barra anterior del mismo ticker (cruce bajista), no de la fecha anterior del eje
+    prev_rsi = [np.concatenate(([np.nan], ind['RSI'][:-1])) for ind in indicators]
+    return {
+        'tickers': tickers,
+        'dates': axis,
+        'bounds': np.searchsorted(position[order], np.arange(len(axis) + 1)),
+        'ticker': ticker[order],
+        'close': stream(closes),
+        'rsi': stream([ind['RSI'] for ind in indicators]),
+        'prev_rsi': stream(prev_rsi),
+        'sma50': stream([ind[medium] for ind in indicators]),
+        'sma200': stream([ind[long] for ind in indicators]),
+    }
+
+
+def simulate_portfolio(aligned: Dict, p: np.ndarray, capital: float, position_pct: float,
+                       max_position_pct: float = 1.0, max_exposure_pct: float = 1.0, sizing: str = "equity",
+                       ranking: str = "rsi", min_order: float = 0.0) -> Dict:
+    """
+    Reglas de src.strategy._simulate sobre todo el universo con una sola cuenta. Una pasada por
+    fecha; cada paso evalúa a la vez (vectorizado) los tickers con barra ese día. Las ventas se
+    ejecutan primero y liberan efectivo; las compras se llenan en el orden de `ranking` ("rsi":
+    el RSI más bajo primero; "ticker": orden del universo) hasta agotar el efectivo o los límites
+    (`max_position_pct` por ticker y `max_exposure_pct` del total, sobre el valor de la cuenta;
+    1.0 = sin más límite que el efectivo). La señal de compra actualiza la referencia de RSI del
+    ticker aunque no haya fondos, igual que el kernel por ticker.
+    """
+    if sizing not in SIZINGS:
+        raise ValueError(f"Tamaño de posición desconocido: {sizing} (opciones: {', '.join(SIZINGS)})")
+    if ranking not in RANKINGS:
+        raise ValueError(f"Ranking desconocido: {ranking} (opciones: {', '.join(RANKINGS)})")
+
+    n = len(aligned['tickers'])
+    bounds = aligned['bounds']
+    tick_all, close_all = aligned['ticker'], aligned['close']
+    rsi_all, prev_all = aligned['rsi'], aligned['prev_rsi']
+    sma50_all, sma200_all = aligned['sma50'], aligned['sma200']
+    n_days = len(aligned['dates'])
+
+    cash = float(capital)
+    shares = np.zeros(n)
+    position_cost = np.zeros(n)
+    last_price = np.zeros(n)
+    last_action = np.full(n, ACTION_HOLD, dtype=np.int8)
+    has_last_buy = np.zeros(n, dtype=bool)
+    last_buy_rsi = np.zeros(n)
+    realized = np.zeros(n)
+    buys = np.zeros(n, dtype=np.int64)
+    sells = np.zeros(n, dtype=np.int64)
+    unfunded = 0
+    equity_curve = np.empty(n_days)
+    exposure_curve = np.empty(n_days)
+    events = []
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for d in range(n_days):
+            lo, hi = bounds[d], bounds[d + 1]
+            t = tick_all[lo:hi]
+            price = close_all[lo:hi]
+            r = rsi_all[lo:hi]
+            s50 = sma50_all[lo:hi]
+            s200 = sma200_all[lo:hi]
+            last_price[t] = price
+
+            sh = shares[t]
+            cost = position_cost[t]
+            hlb = has_last_buy[t]
+            lbr = last_buy_rsi[t]
+            # Comparaciones con NaN dan False: las barras sin indicadores no generan señales
+            valid = ~(np.isnan(r) | np.isnan(s50) | np.isnan(s200))
+            holding = sh > 0
+            utilidad = np.where(holding & (cost > 0), (sh * price - cost) / cost, 0.0)
+            bull = valid & (s50 > s200)
+            bear = valid & ~(s50 > s200)
+
+            # Tendencia alcista
+            sell_zone = bull & (r >= p[P_VENTA_ALCISTA]) & holding
+            buy_zone = bull & ~sell_zone & (r <= p[P_COMPRA_1])
+            nivel_2 = hlb & (lbr >= p[P_COMPRA_1]) & (r <= p[P_COMPRA_2])
+            nivel_3 = hlb & ~nivel_2 & (lbr <= p[P_COMPRA_2]) & (r <= lbr - p[P_COMPRA_STEP]) & (price > s200)
+            comprar = buy_zone & (~hlb | (nivel_2 & (price > s200)) | nivel_3)
+            pullback = bull & ~sell_zone & ~(r <= p[P_COMPRA_1]) & (r < p[P_PULLBACK]) \
+                & (last_action[t] == ACTION_SELL)
+
+            # Tendencia bajista
+            sell_zone_bear = bear & (r >= p[P_VENTA_BAJISTA]) & holding
+            cruce = bear & ~sell_zone_bear & ~holding & (prev_all[lo:hi] <= p[P_CRUCE_BAJISTA]) \
+                & (r > p[P_CRUCE_BAJISTA])
+
+            sell = (sell_zone | sell_zone_bear) & (utilidad >= p[P_RENTABILIDAD_MINIMA])
+            decided_buy = comprar | pullback
+            if decided_buy.any():
+                reference = t[decided_buy]
+                has_last_buy[reference] = True
+                last_buy_rsi[reference] = r[decided_buy]
+
+            # Ventas: liquidan la posición completa y liberan efectivo para las compras del día
+            if sell.any():
+                ts = t[sell]
+                monto = sh[sell] * price[sell]
+                realized[ts] += monto - cost[sell]
+                cash += float(monto.sum())
+                shares[ts] = 0.0
+                position_cost[ts] = 0.0
+                last_action[ts] = ACTION_SELL
+                has_last_buy[ts] = False
+                sells[ts] += 1
+                reason = np.where(sell_zone[sell], REASON_VENTA_ALCISTA, REASON_VENTA_BAJISTA)
+                events.append((np.flatnonzero(sell) + lo, ACTION_SELL, monto, reason, utilidad[sell]))
+
+            # Compras: se llenan en orden de ranking con el efectivo y los límites disponibles
+            buy = (decided_buy | cruce) & ~sell
+            if buy.any():
+                candidates = np.flatnonzero(buy)
+                if ranking == "rsi":
+                    candidates = candidates[np.lexsort((t[candidates], r[candidates]))]
+                else:
+                    candidates = candidates[np.argsort(t[candidates], kind='stable')]
+                tc = t[candidates]
+                pc = price[candidates]
+                equity = cash + float(shares @ last_price)
+                size = position_pct * (equity if sizing == "equity" else capital)
+                request = np.full(len(candidates), size)
+                if max_position_pct < 1.0:
+                    request = np.minimum(request, np.maximum(max_position_pct * equity - shares[tc] * pc, 0.0))
+                available = cash
+                if max_exposure_pct < 1.0:
+                    available = min(available, max(max_exposure_pct * equity - (equity - cash), 0.0))
+                # Llenado secuencial por ranking: cada compra toma lo que dejaron las anteriores
+                fill = np.clip(available - (np.cumsum(request) - request), 0.0, request)
+                executed = (fill > 0) & (fill >= min_order)
+                unfunded += int((~executed).sum())
+                if executed.any():
+                    idx = candidates[executed]
+                    te = tc[executed]
+                    monto = fill[executed]
+                    shares[te] += monto / pc[executed]
+                    position_cost[te] += monto
+                    cash -= float(monto.sum())
+                    last_action[te] = ACTION_BUY
+                    buys[te] += 1
+                    reason = np.where(comprar[idx], 0, np.where(pullback[idx], REASON_PULLBACK_ALCISTA,
+                                                                 REASON_COMPRA_BAJISTA))
+                    level = np.where(~hlb[idx], REASON_COMPRA_ALCISTA_N1,
+                                     np.where(nivel_2[idx] & (price[idx] > s200[idx]), REASON_COMPRA_ALCISTA_N2,
+                                              REASON_COMPRA_ALCISTA_N3))
+                    reason = np.where(reason == 0, level, reason)
+                    ref = np.where(reason == REASON_COMPRA_ALCISTA_N3, lbr[idx], 0.0)
+                    events.append((idx + lo, ACTION_BUY, monto, reason, ref))
+
+            invested = float(shares @ last_price)
+            equity_curve[d] = cash + invested
+            exposure_curve[d] = invested
+
+    if events:
+        bar = np.concatenate([e[0] for e in events])
+        order = np.argsort(bar, kind='stable')
+        records = np.empty(len(bar), dtype=LEDGER_DTYPE)
+        records['date'] = aligned['dates'][np.searchsorted(bounds, bar, side='right') - 1]
+        records['action'] = np.concatenate([np.full(len(e[0]), e[1]) for e in events])
+        records['amount'] = np.concatenate([e[2] for e in events])
+        records['price'] = close_all[bar]
+        records['reason'] = np.concatenate([e[3] for e in events])
+        records['rsi'] = rsi_all[bar]
+        records['ref'] = np.concatenate([e[4] for e in events])
+        records, event_tickers = records[order], tick_all[bar][order]
+    else:
+        records, event_tickers = np.empty(0, dtype=LEDGER_DTYPE), np.empty(0, dtype=np.int64)
+
+    return {
+        'cash': cash,
+        'shares': shares,
+        'last_price': last_price,
+        'position_cost': position_cost,
+        'realized': realized,
+        'buys': buys,
+        'sells': sells,
+        'unfunded': unfunded,
+        'equity': equity_curve,
+        'exposure': exposure_curve,
+        'records': records,
+        'event_tickers': event_tickers,
+    }
+
+
+def run_portfolio(datasets: Dict[str, pd.DataFrame], capital: Optional[float] = None,
+                  position_pct: Optional[float] = None, max_position_pct: Optional[float] = None,
+                  max_exposure_pct: Optional[float] = None, sizing: Optional[str] = None,
+                  ranking: Optional[str] = None, min_order: Optional[float] = None) -> Dict:
+    """
+    Simula el universo de `datasets` como un solo portafolio (CONFIG.PORTFOLIO_* por defecto)
+    y retorna el resumen: valor final, drawdown y exposición, posiciones por ticker y el
+    ledger de operaciones en orden cronológico.
+    """
+    capital = CONFIG.PORTFOLIO_CAPITAL_INICIAL if capital is None else capital
+    position_pct = CONFIG.PORTFOLIO_POSITION_PCT if position_pct is None else position_pct
+    max_position_pct = CONFIG.PORTFOLIO_MAX_POSITION_PCT if max_position_pct is None else max_position_pct
+    max_exposure_pct = CONFIG.PORTFOLIO_MAX_EXPOSURE_PCT if max_exposure_pct is None else max_exposure_pct
+    sizing = sizing or CONFIG.PORTFOLIO_SIZING
+    ranking = ranking or CONFIG.PORTFOLIO_RANKING
+    min_order = CONFIG.PORTFOLIO_MIN_ORDER if min_order is None else min_order
+
+    t0 = time.perf_counter()
+    aligned = align_universe(datasets)
+    params = strategy_params()
+    out = simulate_portfolio(aligned, pack_params(params), capital, position_pct, max_position_pct,
+                             max_exposure_pct, sizing, ranking, min_order)
+    tickers = aligned['tickers']
+    equity = out['equity']
+    final_value = float(equity[-1]) if len(equity) else float(capital)
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = float(np.max((peak - equity) / peak)) * 100 if len(equity) else 0.0
+    exposure = out['exposure'] / np.where(equity > 0, equity, np.nan) * 100 if len(equity) else equity
+    position_value = out['shares'] * out['last_price']
+    logging.info(f"Portafolio: {len(tickers)} tickers x {len(aligned['dates'])} fechas, {len(out['records'])} "
+                 f"operaciones en {time.perf_counter() - t0:.2f}s.")
+
+    return {
+        'Capital Inicial': float(capital),
+        'Valor Final': final_value,
+        'Rendimiento (%)': (final_value - capital) / capital * 100 if capital else 0.0,
+        'Drawdown Máximo (%)': drawdown,
+        'Exposición Máxima (%)': float(np.nanmax(exposure)) if len(exposure) else 0.0,
+        'Exposición Final (%)': float(exposure[-1]) if len(exposure) else 0.0,
+        'Efectivo Final': out['cash'],
+        'Compras': int(out['buys'].sum()),
+        'Ventas': int(out['sells'].sum()),
+        'Compras sin Fondos': out['unfunded'],
+        'Tickers': len(tickers),
+        'Desde': str(aligned['dates'][0])[:10] if len(aligned['dates']) else None,
+        'Hasta': str(aligned['dates'][-1])[:10] if len(aligned['dates']) else None,
+        'Ranking': ranking,
+        'Posiciones': [{
+            'Ticker': ticker,
+            'Compras': int(out['buys'][i]),
+            'Ventas': int(out['sells'][i]),
+            'Resultado Realizado': float(out['realized'][i]),
+            'Valor en Posición': float(position_value[i]),
+            'Resultado Total': float(out['realized'][i] + position_value[i] - out['position_cost'][i]),
+        } for i, ticker in enumerate(tickers)],
+        'History': TradeLedger(out['records'], params),
+        'History Tickers': [tickers[i] for i in out['event_tickers']],
+    }
+
+
+def format_portfolio_report(summary: Dict, generated_at: str) -> str:
+    """Reporte Markdown del portafolio: resumen, contribución por ticker y últimas operaciones."""
+    rend = summary['Rendimiento (%)']
+    rend_str = f"{rend:+.2f}%"
+    if rend > 0: rend_str = f"🟢 **{rend_str}**"
+    elif rend < 0: rend_str = f"🔴 **{rend_str}**"
+    lines = [
+        "# Proyecto NERV - Simulación de Portafolio (Capital Compartido)\n\n",
+        f"**Fecha de generación:** {generated_at}\n\n",
+        f"*{summary['Tickers']} activos del {summary['Desde']} al {summary['Hasta']} con una sola cuenta. "
+        f"Compras del mismo día ordenadas por {summary['Ranking']}.*\n\n",
+        "## 📊 Resumen\n",
+        "| Métrica | Valor |\n",
+        "|---------|-------|\n",
+        f"| **Capital Inicial** | ${summary['Capital Inicial']:,.2f} |\n",
+        f"| **Valor Final** | ${summary['Valor Final']:,.2f} |\n",
+        f"| **Rendimiento** | {rend_str} |\n",
+        f"| **Drawdown Máximo** | {summary['Drawdown Máximo (%)']:.2f}% |\n",
+        f"| **Exposición Máxima / Final** | {summary['Exposición Máxima (%)']:.1f}% / "
+        f"{summary['Exposición Final (%)']:.1f}% |\n",
+        f"| **Efectivo Final** | ${summary['Efectivo Final']:,.2f} |\n",
+        f"| **Compras / Ventas** | {summary['Compras']} / {summary['Ventas']} |\n",
+        f"| **Compras sin Fondos** | {summary['Compras sin Fondos']} |\n\n",
+        "--- \n\n",
+        "## 📈 Contribución por Activo\n",
+        "| Ticker | Compras | Ventas | Resultado Realizado | En Posición | Resultado Total |\n",
+        "|--------|---------|--------|---------------------|-------------|-----------------|\n",
+    ]
+    positions = sorted((pos for pos in summary['Posiciones'] if pos['Compras']),
+                       key=lambda pos: (-pos['Resultado Total'], pos['Ticker']))
+    for pos in positions:
+        lines.append(f"| **{pos['Ticker']}** | {pos['Compras']} | {pos['Ventas']} | ${pos['Resultado Realizado']:,.2f} | "
+                     f"${pos['Valor en Posición']:,.2f} | ${pos['Resultado Total']:,.2f} |\n")
+
+    limit = CONFIG.PORTFOLIO_REPORT_TRADES
+    history = summary['History']
+    start = max(0, len(history) - limit)
+    lines.append(f"\n---\n\n## 📝 Últimas Operaciones ({len(history) - start} de {len(history)})\n\n")
+    lines.append("| Fecha | Ticker | Acción | Monto | Precio | Motivo |\n")
+    lines.append("|-------|--------|--------|-------|--------|--------|\n")
+    for ticker, (date, action, amount, price, reason) in zip(summary['History Tickers'][start:],
+                                                             history[start:].to_rows()):
+        lines.append(f"| {date} | **{ticker}** | **{action}** | ${amount:,.2f} | ${price:,.2f} | {reason} |\n")
+    lines.append("\n\n*Proyecto NERV - Simulación de Portafolio.*\n")
+    return "".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de portafolio con capital compartido sobre el caché local.")
+    parser.add_argument("tickers", nargs="*", help="Tickers (todos los de CONFIG.TICKERS con caché por defecto)")
+    parser.add_argument("--capital", type=float, default=None)
+    parser.add_argument("--ranking", choices=RANKINGS, default=None)
+    parser.add_argument("--sizing", choices=SIZINGS, default=None)
+    parser.add_argument("--output", default=CONFIG.PORTFOLIO_REPORT_PATH)
+    args = parser.parse_args()
+
+    store = get_cache_store()
+    datasets = {t: store.read(cache_key(t)) for t in (args.tickers or CONFIG.TICKERS) if store.exists(cache_key(t))}
+    if not datasets:
+        logging.warning("No hay datos en caché para simular el portafolio.")
+        return
+    summary = run_portfolio(datasets, capital=args.capital, ranking=args.ranking, sizing=args.sizing)
+    write_atomic(args.output, format_portfolio_report(summary, time.strftime('%Y-%m-%d %H:%M:%S')))
+    logging.info(f"Portafolio: {summary['Rendimiento (%)']:+.2f}% (drawdown máximo "
+                 f"{summary['Drawdown Máximo (%)']:.2f}%). Reporte en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
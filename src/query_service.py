@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.signal_store import SignalStore
+
+# Campos del resumen por ticker que se publican (el historial va en su propio endpoint)
+SUMMARY_FIELDS = ('Ticker', 'Operaciones Creadas', 'Capital Final', 'Capital en Posición', 'Rendimiento (%)', 'Estado')
+
+# Órdenes precalculados de /backtests (?sort=...)
+SORT_KEYS = {
+    'ticker': lambda row: row['Ticker'],
+    'rendimiento': lambda row: row['Rendimiento (%)'],
+    'capital': lambda row: row['Capital Final'],
+    'operaciones': lambda row: row['Operaciones Creadas'],
+}
+
+
+def global_aggregates(results: List[Dict]) -> Dict:
+    """Agregados globales del ciclo (los mismos del resumen ejecutivo del reporte Markdown)."""
+    total_tickers = len(results)
+    total_invertido = total_tickers * CONFIG.BACKTEST_CAPITAL_INICIAL
+    capital_final_total = sum(res.get('Capital Final', 0.0) for res in results)
+    capital_heldeado_total = sum(res.get('Capital en Posición', 0.0) for res in results)
+    rendimiento_global = ((capital_final_total - total_invertido) / total_invertido) * 100 if total_invertido > 0 else 0
+    ganadores = sum(1 for res in results if res.get('Rendimiento (%)', 0) > 0)
+    perdedores = sum(1 for res in results if res.get('Rendimiento (%)', 0) < 0)
+    return {
+        'Total Activos Analizados': total_tickers,
+        'Inversión Inicial Total': total_invertido,
+        'Valor Final de Cartera': capital_final_total,
+        'Capital Actual Heldeado': capital_heldeado_total,
+        'Rendimiento Global (%)': rendimiento_global,
+        'Win Rate (%)': (ganadores / total_tickers * 100) if total_tickers > 0 else 0,
+        'Activos Ganadores': ganadores,
+        'Activos Perdedores': perdedores,
+    }
+
+
+class _Snapshot:
+    """
+    Índices inmutables de un ciclo. Se reemplazan completos en cada refresco, así las
+    peticiones concurrentes nunca ven un estado a medias y no necesitan locks.
+    """
+
+    def __init__(self, results: List[Dict], latest_signals: List[Dict], signal_log: List[Dict],
+                 generated_at: Optional[str], version: int):
+        self.version = version
+        self.generated_at = generated_at
+        self.summary = global_aggregates(results)
+        self.backtests = [{field: res.get(field) for field in SUMMARY_FIELDS} for res in results]
+        self.by_ticker = {row['Ticker']: i for i, row in enumerate(self.backtests)}
+        self.histories = {res['Ticker']: res.get('History') or [] for res in results}
+        self.orders = {key: sorted(range(len(self.backtests)), key=lambda i: fn(self.backtests[i]))
+                       for key, fn in SORT_KEYS.items()}
+        self.latest_signals = latest_signals
+        # Log de señales del más reciente al más antiguo, completo y por ticker
+        self.signal_log = list(reversed(signal_log))
+        self.signals_by_ticker: Dict[str, List[Dict]] = {}
+        for entry in self.signal_log:
+            self.signals_by_ticker.setdefault(entry['Ticker'], []).append(entry)
+        self.etag = self._digest()
+        # Respuestas ya serializadas de este snapshot: (ruta, query) -> cuerpo
+        self.responses: Dict[str, bytes] = {}
+
+    def _digest(self) -> str:
+        """Huella del contenido: si un ciclo no cambia nada, los ETag siguen siendo válidos."""
+        h = hashlib.blake2b(digest_size=12)
+        h.update(json.dumps([self.summary, self.backtests, self.latest_signals, self.signal_log],
+                            sort_keys=True, default=str).encode())
+        for ticker, history in self.histories.items():
+            h.update(ticker.encode())
+            records = getattr(history, 'records', None)
+            h.update(records.tobytes() if records is not None else json.dumps(history, default=str).encode())
+        return h.hexdigest()
+
+
+class QueryIndex:
+    """Índices en memoria que sirve el servicio de consultas; el daemon los refresca al final de cada ciclo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.snapshot = _Snapshot([], [], [], None, 0)
+
+    def refresh(self, results: List[Dict], latest_signals: List[Dict], signal_log: Optional[List[Dict]] = None,
+                generated_at: Optional[str] = None):
+        """
+        Reconstruye los índices con los resultados del ciclo. `signal_log` por defecto se lee
+        una vez del log SQLite (las últimas CONFIG.QUERY_SIGNAL_LOG_LIMIT señales).
+        """
+        if signal_log is None:
+            signal_log = self.read_signal_log()
+        with self._lock:
+            snapshot = _Snapshot(results, latest_signals, signal_log, generated_at, self.snapshot.version + 1)
+            self.snapshot = snapshot
+        logging.info(f"Índices de consulta actualizados (versión {snapshot.version}, {len(results)} tickers, "
+                     f"{len(snapshot.signal_log)} señales).")
+
+    def warm(self, results: List[Dict], latest_signals: List[Dict]):
+        """
+        Carga inicial al arrancar el daemon con lo ya calculado en disco (resultados reconstruidos
+        desde los checkpoints y el log de señales), sin esperar al primer ciclo.
+        """
+        self.refresh(results, latest_signals)
+
+    @staticmethod
+    def read_signal_log() -> List[Dict]:
+        if not os.path.exists(CONFIG.SIGNALS_DB_PATH):
+            return []
+        try:
+            with SignalStore(CONFIG.SIGNALS_DB_PATH) as store:
+                return store.query(limit=CONFIG.QUERY_SIGNAL_LOG_LIMIT)
+        except Exception as e:
+            logging.error(f"Error leyendo el log de señales para los índices de consulta: {e}")
+            return []
+
+
+def _page(items: List, params: Dict[str, str]) -> Dict:
+    """Corte de una lista según ?offset=&limit= (limit acotado por CONFIG.QUERY_MAX_PAGE_SIZE)."""
+    offset = max(0, int(params.get('offset', 0)))
+    limit = min(max(1, int(params.get('limit', CONFIG.QUERY_PAGE_SIZE))), CONFIG.QUERY_MAX_PAGE_SIZE)
+    page = items[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(items) else None
+    return {'total': len(items), 'offset': offset, 'limit': limit, 'next_offset': next_offset, 'items': page}
+
+
+def _route(snapshot: _Snapshot, path: str, params: Dict[str, str]) -> Tuple[int, Dict]:
+    """Respuesta (status, cuerpo) de una consulta sobre el snapshot."""
+    parts = [p for p in path.split('/') if p]
+    meta = {'version': snapshot.version, 'generated_at': snapshot.generated_at}
+
+    if parts == ['health']:
+        return 200, dict(meta, status='ok', tickers=len(snapshot.backtests))
+    if parts == ['summary']:
+        return 200, dict(meta, summary=snapshot.summary)
+    if parts == ['signals', 'latest']:
+        return 200, dict(meta, signals=snapshot.latest_signals)
+    if parts == ['signals']:
+        ticker = params.get('ticker')
+        entries = snapshot.signals_by_ticker.get(ticker, []) if ticker else snapshot.signal_log
+        return 200, dict(meta, **_page(entries, params))
+    if parts == ['backtests']:
+        sort = params.get('sort')
+        if sort and sort not in snapshot.orders:
+            return 400, {'error': f"sort inválido: {sort} (opciones: {', '.join(SORT_KEYS)})"}
+        order = snapshot.orders[sort] if sort else range(len(snapshot.backtests))
+        if params.get('order') == 'desc':
+            order = list(reversed(order))
+        page = _page(order, params)
+        page['items'] = [snapshot.backtests[i] for i in page['items']]
+        return 200, dict(meta, **page)
+    if len(parts) in (2, 3) and parts[0] == 'tickers':
+        ticker = parts[1]
+        if ticker not in snapshot.by_ticker:
+            return 404, {'error': f"ticker sin resultados: {ticker}"}
+        if len(parts) == 2:
+            return 200, dict(meta, backtest=snapshot.backtests[snapshot.by_ticker[ticker]])
+        if parts[2] == 'trades':
+            history = snapshot.histories[ticker]
+            page = _page(range(len(history)), params)
+            if page['items']:
+                first, last = page['items'][0], page['items'][-1] + 1
+                events = history[first:last]
+                page['items'] = events.to_dicts() if hasattr(events, 'to_dicts') else list(events)
+            else:
+                page['items'] = []
+            return 200, dict(meta, ticker=ticker, **page)
+    return 404, {'error': f"ruta desconocida: {path}"}
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    server_version = "NERVQuery/1.0"
+    # Conexiones persistentes: los paneles que consultan seguido no reabren el socket
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo van en escrituras separadas: sin Nagle no esperan el ACK diferido
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        snapshot = self.server.index.snapshot
+        key = url.path + '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        # ETag débil: depende del contenido, no de la versión ni de la hora del ciclo
+        etag = f'W/"{snapshot.etag}-{zlib.crc32(key.encode()):08x}"'
+
+        # Respuesta condicional: el panel ya tiene esta versión, no se genera nada
+        if etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        body = snapshot.responses.get(key)
+        status = 200
+        if body is None:
+            try:
+                status, payload = _route(snapshot, url.path, params)
+            except ValueError as e:
+                status, payload = 400, {'error': f"parámetro inválido: {e}"}
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            if status == 200:
+                if len(snapshot.responses) >= CONFIG.QUERY_RESPONSE_CACHE_SIZE:
+                    snapshot.responses.clear()
+                snapshot.responses[key] = body
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"query_service: {format % args}")
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, index: QueryIndex):
+        super().__init__(address, _QueryHandler)
+        self.index = index
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_query_service(index: QueryIndex, host: Optional[str] = None, port: Optional[int] = None) -> QueryServer:
+    """Levanta el servicio en un hilo de fondo del proceso (el daemon) y retorna el servidor."""
+    host = host or CONFIG.QUERY_SERVICE_HOST
+    port = CONFIG.QUERY_SERVICE_PORT if port is None else port
+    server = QueryServer((host, port), index)
+    threading.Thread(target=server.serve_forever, name="nerv-query-service", daemon=True).start()
+    logging.info(f"Servicio de consultas escuchando en {server.base_url}")
+    return server
+
+
+# Índices del proceso (el daemon los refresca al final de cada ciclo)
+query_index = QueryIndex()
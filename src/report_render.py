@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.metrics import metrics
+from src.robustness import format_robustness_section
+
+# Campos del resultado que aparecen en la fila de la tabla comparativa
+SUMMARY_FIELDS = ('Ticker', 'Operaciones Creadas', 'Capital Final', 'Rendimiento (%)', 'Estado')
+
+# Encabezado de la tabla de operaciones de cada ticker
+_HISTORY_HEADER = "| Fecha | Acción | Monto | Precio | Motivo |\n|-------|---------|-------|--------|--------|\n"
+
+
+def _pct(value: float, bold: bool = False) -> str:
+    """Rendimiento con signo y semáforo (🟢/🔴), como en el resumen y la tabla comparativa."""
+    text = f"{value:+.2f}%"
+    if bold and value != 0:
+        text = f"**{text}**"
+    if value > 0:
+        return f"🟢 {text}"
+    if value < 0:
+        return f"🔴 {text}"
+    return text
+
+
+def render_summary_row(res: Dict) -> str:
+    """Fila del ticker en la Tabla Comparativa de Activos."""
+    ticker = res.get('Ticker', 'N/A')
+    ops = res.get('Operaciones Creadas', 0)
+    cap = res.get('Capital Final', 0.0)
+    rend = res.get('Rendimiento (%)', 0.0)
+    estado = res.get('Estado', 'N/A')
+    return f"| **{ticker}** | {ops} | ${cap:,.2f} | {_pct(rend)} | *{estado}* |\n"
+
+
+def render_history_section(ticker: str, history) -> str:
+    """Detalle de Operaciones de un ticker ('' si no operó)."""
+    if not history:
+        return ""
+    # TradeLedger entrega las filas leyendo cada columna una vez; las listas de dicts se recorren
+    rows = history.to_rows() if hasattr(history, 'to_rows') else \
+        [(e['date'], e['action'], e['amount'], e['price'], e['reason']) for e in history]
+    lines = [f"### 🔍 {ticker}\n", _HISTORY_HEADER]
+    lines.extend(f"| {date} | **{action}** | ${amount:,.2f} | ${price:,.2f} | {reason} |\n"
+                 for date, action, amount, price, reason in rows)
+    lines.append("\n")
+    return "".join(lines)
+
+
+class SectionCache:
+    """
+    Secciones ya renderizadas de cada ticker (fila comparativa y detalle de operaciones),
+    indexadas por la huella de su resultado: entre ciclos solo se renderizan los tickers cuyo
+    resultado cambió. Desalojo LRU cuando el texto guardado supera CONFIG.REPORT_CACHE_MAX_MB.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(CONFIG.REPORT_CACHE_MAX_MB * 1024 * 1024)
+        self._entries: 'OrderedDict[str, Tuple[str, str]]' = OrderedDict()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    @staticmethod
+    def digest(res: Dict) -> str:
+        """Huella de todo lo que aparece en las secciones del ticker (fila, operaciones y parámetros)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(tuple(res.get(field) for field in SUMMARY_FIELDS)).encode())
+        history = res.get('History') or []
+        records = getattr(history, 'records', None)
+        if records is not None:
+            h.update(records.tobytes())
+            h.update(repr(sorted(history.params.items())).encode())
+        else:
+            h.update(repr([sorted(dict(event).items()) for event in history]).encode())
+        return h.hexdigest()
+
+    def render(self, res: Dict) -> Tuple[str, str]:
+        """(fila comparativa, detalle de operaciones) del ticker, desde el caché si no cambió."""
+        if self.max_bytes <= 0:
+            return render_summary_row(res), render_history_section(res.get('Ticker', 'N/A'), res.get('History', []))
+        key = self.digest(res)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            metrics.inc("nerv_report_sections_cached")
+            return entry
+        entry = (render_summary_row(res), render_history_section(res.get('Ticker', 'N/A'), res.get('History', [])))
+        metrics.inc("nerv_report_sections_rendered")
+        self._entries[key] = entry
+        self.nbytes += len(entry[0]) + len(entry[1])
+        while self.nbytes > self.max_bytes and self._entries:
+            _, (row, section) = self._entries.popitem(last=False)
+            self.nbytes -= len(row) + len(section)
+        return entry
+
+
+def render_backtest_report(results: List[Dict], generated_at: str, robustness: Optional[List[Dict]] = None,
+                           cache: Optional[SectionCache] = None) -> str:
+    """Texto completo del informe de backtesting (mismo formato que el reporte histórico)."""
+    cache = cache or report_sections
+
+    # Cálculos Globales
+    total_tickers = len(results)
+    total_invertido = total_tickers * CONFIG.BACKTEST_CAPITAL_INICIAL
+    capital_final_total = sum(res.get('Capital Final', 0.0) for res in results)
+    capital_heldeado_total = sum(res.get('Capital en Posición', 0.0) for res in results)
+    rendimiento_global = ((capital_final_total - total_invertido) / total_invertido) * 100 if total_invertido > 0 else 0
+
+    tickers_ganadores = sum(1 for res in results if res.get('Rendimiento (%)', 0) > 0)
+    tickers_perdedores = sum(1 for res in results if res.get('Rendimiento (%)', 0) < 0)
+    win_rate = (tickers_ganadores / total_tickers * 100) if total_tickers > 0 else 0
+
+    sections = [cache.render(res) for res in results]
+
+    parts = [
+        "# Proyecto NERV - Informe de Backtesting Global\n\n",
+        f"**Fecha de generación:** {generated_at}\n\n",
+        "## 📊 Resumen Ejecutivo Global\n",
+        "| Métrica | Valor |\n",
+        "|---------|-------|\n",
+        f"| **Total Activos Analizados** | {total_tickers} |\n",
+        f"| **Inversión Inicial Total** | ${total_invertido:,.2f} |\n",
+        f"| **Valor Final de Cartera** | ${capital_final_total:,.2f} |\n",
+        f"| **Capital Actual Heldeado** | **${capital_heldeado_total:,.2f}** |\n",
+        f"| **Rendimiento Global** | {_pct(rendimiento_global, bold=True)} |\n",
+        f"| **Win Rate (Activos)** | {win_rate:.1f}% ({tickers_ganadores} ✅ / {tickers_perdedores} ❌) |\n\n",
+        "--- \n\n",
+        "## 📈 Tabla Comparativa de Activos\n",
+        "| Ticker | Ops | Capital Final | Rendimiento | Estado |\n",
+        "|--------|-----|---------------|-------------|--------|\n",
+    ]
+    parts.extend(row for row, _ in sections)
+    parts.append("\n---\n\n")
+    if robustness:
+        historical = {res.get('Ticker'): res.get('Rendimiento (%)') for res in results}
+        parts.append(format_robustness_section(robustness, historical))
+    parts.append("## 📝 Detalle de Operaciones\n\n")
+    parts.extend(section for _, section in sections)
+    parts.append("\n\n*Proyecto NERV - Motor de Backtesting Detallado.*\n")
+    return "".join(parts)
+
+
+def write_atomic(path: str, text: str):
+    """Escribe el archivo completo de una vez y lo publica con rename: nunca se lee a medias."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", buffering=1024 * 1024) as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Secciones renderizadas del proceso, compartidas entre ciclos del daemon
+report_sections = SectionCache()
@@ -0,0 +1,300 @@
+import argparse
+import logging
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.cache_store import get_cache_store
+from src.ledger import ACTION_BUY, ACTION_HOLD, ACTION_SELL
+from src.native_indicators import fused_indicators_2d
+from src.strategy import (P_CAPITAL_INICIAL, P_COMPRA_1, P_COMPRA_2, P_COMPRA_STEP, P_CRUCE_BAJISTA, P_PULLBACK,
+                          P_RENTABILIDAD_MINIMA, P_TAMANO_POSICION, P_VENTA_ALCISTA, P_VENTA_BAJISTA, pack_params,
+                          strategy_params)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+METHODS = ("bootstrap", "gbm")
+
+# Percentiles reportados de cada distribución
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _log_returns(close: np.ndarray) -> np.ndarray:
+    close = close[np.isfinite(close) & (close > 0)]
+    return np.diff(np.log(close))
+
+
+def generate_paths(close: np.ndarray, n_paths: int, method: str = "bootstrap", block_size: int = 20,
+                   rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Genera `n_paths` trayectorias de precio (filas) del mismo largo que `close`, partiendo del
+    primer cierre histórico:
+    - bootstrap: re-muestreo por bloques de `block_size` retornos logarítmicos consecutivos
+      (conserva la autocorrelación de corto plazo y las colas de la serie real).
+    - gbm: movimiento browniano geométrico con la media y volatilidad de los retornos históricos.
+    """
+    rng = rng or np.random.default_rng()
+    returns = _log_returns(close)
+    m = len(returns)
+    if m < 2:
+        raise ValueError("Se necesitan al menos 3 cierres válidos para generar trayectorias")
+
+    if method == "bootstrap":
+        block = max(1, min(block_size, m))
+        n_blocks = -(-m // block)
+        starts = rng.integers(0, m - block + 1, size=(n_paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block)).reshape(n_paths, n_blocks * block)[:, :m]
+        sampled = returns[idx]
+    elif method == "gbm":
+        sampled = rng.normal(returns.mean(), returns.std(ddof=1), size=(n_paths, m))
+    else:
+        raise ValueError(f"Método de trayectorias desconocido: {method}")
+
+    paths = np.empty((n_paths, m + 1), dtype=np.float64)
+    paths[:, 0] = 0.0
+    np.cumsum(sampled, axis=1, out=paths[:, 1:])
+    return close[np.isfinite(close) & (close > 0)][0] * np.exp(paths)
+
+
+def path_indicators(paths: np.ndarray, dtype=np.float64) -> tuple:
+    """
+    RSI y SMAs de todas las trayectorias en una llamada al kernel fusionado de
+    src.native_indicators (mismos valores que el cálculo diario).
+    Retorna arrays (trayectorias x barras): rsi, sma_medium, sma_long.
+    """
+    rsi, smas = fused_indicators_2d(paths, CONFIG.RSI_PARAMS['period'],
+                                    [CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']], dtype=dtype)
+    return rsi, smas[0], smas[1]
+
+
+def simulate_paths(close: np.ndarray, rsi: np.ndarray, sma50: np.ndarray, sma200: np.ndarray,
+                   p: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    La máquina de estados de src.strategy._simulate vectorizada por trayectorias: cada barra
+    avanza todas las trayectorias a la vez (arrays de estado de largo `n_paths`).
+    Retorna por trayectoria el valor final de la cartera, las operaciones cerradas y el
+    drawdown máximo de la curva de capital (fracción).
+    """
+    n_paths, n_bars = close.shape
+    capital = np.full(n_paths, p[P_CAPITAL_INICIAL])
+    shares = np.zeros(n_paths)
+    position_cost = np.zeros(n_paths)
+    last_action = np.full(n_paths, ACTION_HOLD, dtype=np.int8)
+    has_last_buy = np.zeros(n_paths, dtype=bool)
+    last_buy_rsi = np.zeros(n_paths)
+    total_trades = np.zeros(n_paths, dtype=np.int64)
+    peak = capital.copy()
+    max_drawdown = np.zeros(n_paths)
+    monto_base = p[P_CAPITAL_INICIAL] * p[P_TAMANO_POSICION]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i in range(1, n_bars):
+            r = rsi[:, i]
+            s50 = sma50[:, i]
+            s200 = sma200[:, i]
+            price = close[:, i]
+            # Comparaciones con NaN dan False: las barras sin indicadores no generan señales
+            valid = ~(np.isnan(r) | np.isnan(s50) | np.isnan(s200))
+
+            holding = shares > 0
+            utilidad = np.where(holding & (position_cost > 0), (shares * price - position_cost) / position_cost, 0.0)
+            bull = valid & (s50 > s200)
+            bear = valid & ~(s50 > s200)
+
+            # Tendencia alcista
+            sell_zone = bull & (r >= p[P_VENTA_ALCISTA]) & holding
+            buy_zone = bull & ~sell_zone & (r <= p[P_COMPRA_1])
+            nivel_2 = has_last_buy & (last_buy_rsi >= p[P_COMPRA_1]) & (r <= p[P_COMPRA_2])
+            comprar = buy_zone & (
+                ~has_last_buy
+                | (nivel_2 & (price > s200))
+                | (has_last_buy & ~nivel_2 & (last_buy_rsi <= p[P_COMPRA_2])
+                   & (r <= last_buy_rsi - p[P_COMPRA_STEP]) & (price > s200)))
+            pullback = bull & ~sell_zone & ~(r <= p[P_COMPRA_1]) & (r < p[P_PULLBACK]) & (last_action == ACTION_SELL)
+
+            # Tendencia bajista
+            sell_zone_bear = bear & (r >= p[P_VENTA_BAJISTA]) & holding
+            cruce = bear & ~sell_zone_bear & ~holding & (rsi[:, i - 1] <= p[P_CRUCE_BAJISTA]) & (r > p[P_CRUCE_BAJISTA])
+
+            sell = (sell_zone | sell_zone_bear) & (utilidad >= p[P_RENTABILIDAD_MINIMA])
+            decided_buy = comprar | pullback
+            # Igual que el kernel: la compra decidida actualiza la referencia aunque no haya capital
+            has_last_buy |= decided_buy
+            last_buy_rsi = np.where(decided_buy, r, last_buy_rsi)
+
+            buy = (decided_buy | cruce) & (capital > 0)
+            if buy.any():
+                monto = np.minimum(monto_base, capital)
+                shares = np.where(buy, shares + monto / price, shares)
+                capital = np.where(buy, capital - monto, capital)
+                position_cost = np.where(buy, position_cost + monto, position_cost)
+                last_action[buy] = ACTION_BUY
+            if sell.any():
+                capital = np.where(sell, capital + shares * price, capital)
+                shares = np.where(sell, 0.0, shares)
+                position_cost = np.where(sell, 0.0, position_cost)
+                last_action[sell] = ACTION_SELL
+                has_last_buy &= ~sell
+                total_trades += sell
+
+            equity = capital + shares * price
+            np.maximum(peak, equity, out=peak)
+            np.maximum(max_drawdown, (peak - equity) / peak, out=max_drawdown)
+
+    return {
+        'final_value': capital + shares * close[:, -1],
+        'trades': total_trades,
+        'max_drawdown': max_drawdown,
+    }
+
+
+def _chunk_size(n_bars: int, itemsize: int = 8) -> int:
+    """Trayectorias por bloque para que cada bloque (precios + 3 indicadores + temporales) quepa en el presupuesto."""
+    per_path = n_bars * (4 * 8 + 3 * itemsize)
+    return max(1, int(CONFIG.ROBUSTNESS_CHUNK_MB * 1024 * 1024) // per_path)
+
+
+def _ticker_seed(ticker: str, seed: int) -> int:
+    return (zlib.crc32(ticker.encode()) + seed * 1_000_003) % (2 ** 32)
+
+
+def _describe(values: np.ndarray) -> Dict[str, float]:
+    stats = {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    stats["mean"] = float(values.mean())
+    return stats
+
+
+def run_ticker_robustness(ticker: str, close: np.ndarray, n_paths: int, method: str = "bootstrap",
+                          block_size: int = 20, seed: int = 0) -> Dict:
+    """Simula `n_paths` trayectorias de un ticker en bloques y resume las distribuciones."""
+    params = strategy_params()
+    p = pack_params(params)
+    close = np.asarray(close, dtype=np.float64)
+    close = close[np.isfinite(close) & (close > 0)]
+    rng = np.random.default_rng(_ticker_seed(ticker, seed))
+
+    dtype = np.float32 if CONFIG.ROBUSTNESS_FLOAT32 else np.float64
+    chunk = _chunk_size(len(close), np.dtype(dtype).itemsize)
+    returns, drawdowns, trades = [], [], []
+    for start in range(0, n_paths, chunk):
+        paths = generate_paths(close, min(chunk, n_paths - start), method, block_size, rng)
+        rsi, sma50, sma200 = path_indicators(paths, dtype)
+        out = simulate_paths(paths, rsi, sma50, sma200, p)
+        returns.append((out['final_value'] - params['capital_inicial']) / params['capital_inicial'] * 100)
+        drawdowns.append(out['max_drawdown'] * 100)
+        trades.append(out['trades'])
+
+    returns = np.concatenate(returns)
+    drawdowns = np.concatenate(drawdowns)
+    trades = np.concatenate(trades)
+    return {
+        'Ticker': ticker,
+        'Trayectorias': n_paths,
+        'Método': method,
+        'Rendimiento (%)': _describe(returns),
+        'Drawdown Máximo (%)': _describe(drawdowns),
+        'Prob. Pérdida (%)': float((returns < 0).mean() * 100),
+        'Operaciones Medias': float(trades.mean()),
+    }
+
+
+def _robustness_task(ticker: str, close: np.ndarray, n_paths: int, method: str, block_size: int, seed: int):
+    return run_ticker_robustness(ticker, close, n_paths, method, block_size, seed)
+
+
+def run_robustness(datasets: Dict[str, pd.DataFrame], n_paths: Optional[int] = None, method: Optional[str] = None,
+                   block_size: Optional[int] = None, workers: Optional[int] = None, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Corre el análisis de robustez sobre todos los tickers (un ticker por tarea del pool).
+    Retorna los resúmenes en el orden de `datasets`.
+    """
+    n_paths = n_paths or CONFIG.ROBUSTNESS_PATHS
+    method = method or CONFIG.ROBUSTNESS_METHOD
+    block_size = block_size or CONFIG.ROBUSTNESS_BLOCK_SIZE
+    seed = CONFIG.ROBUSTNESS_SEED if seed is None else seed
+    workers = workers or CONFIG.ROBUSTNESS_WORKERS or os.cpu_count() or 1
+    closes = {t: df['Close'].to_numpy(dtype=np.float64) for t, df in datasets.items()
+              if df is not None and not df.empty and len(df) > CONFIG.SMA_PERIODS['long']}
+
+    t0 = time.perf_counter()
+    results = {}
+    if workers == 1 or len(closes) == 1:
+        for ticker, close in closes.items():
+            results[ticker] = run_ticker_robustness(ticker, close, n_paths, method, block_size, seed)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(closes))) as pool:
+            futures = {pool.submit(_robustness_task, t, c, n_paths, method, block_size, seed): t
+                       for t, c in closes.items()}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    logging.error(f"Error en robustez de {futures[future]}: {e}")
+
+    logging.info(f"Robustez ({method}): {n_paths} trayectorias x {len(results)} tickers en {time.perf_counter() - t0:.1f}s.")
+    return [results[t] for t in closes if t in results]
+
+
+def format_robustness_section(stats: List[Dict], historical: Optional[Dict[str, float]] = None) -> str:
+    """Sección Markdown con las distribuciones de rendimiento y drawdown por ticker."""
+    if not stats:
+        return ""
+    historical = historical or {}
+    n_paths = stats[0]['Trayectorias']
+    method = stats[0]['Método']
+    lines = [
+        "## 🎲 Robustez (Monte Carlo)\n",
+        f"*{n_paths:,} trayectorias simuladas por activo ({method}). "
+        "Percentiles P5 / P50 / P95 del rendimiento y del drawdown máximo.*\n\n",
+    ]
+    all_returns_p50 = np.array([s['Rendimiento (%)']['p50'] for s in stats])
+    lines.append(f"**Mediana global del rendimiento:** {np.median(all_returns_p50):+.2f}% — "
+                 f"**Prob. de pérdida media:** {np.mean([s['Prob. Pérdida (%)'] for s in stats]):.1f}%\n\n")
+    lines.append("| Ticker | Histórico | Rend. P5 | Rend. P50 | Rend. P95 | Prob. Pérdida | DD P50 | DD P95 | Ops Medias |\n")
+    lines.append("|--------|-----------|----------|-----------|-----------|---------------|--------|--------|------------|\n")
+    for s in stats:
+        ret = s['Rendimiento (%)']
+        dd = s['Drawdown Máximo (%)']
+        hist = historical.get(s['Ticker'])
+        hist_str = f"{hist:+.2f}%" if hist is not None else "N/A"
+        lines.append(f"| **{s['Ticker']}** | {hist_str} | {ret['p5']:+.2f}% | {ret['p50']:+.2f}% | {ret['p95']:+.2f}% | "
+                     f"{s['Prob. Pérdida (%)']:.1f}% | {dd['p50']:.1f}% | {dd['p95']:.1f}% | {s['Operaciones Medias']:.1f} |\n")
+    lines.append("\n---\n\n")
+    return "".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis de robustez Monte Carlo de la estrategia NERV sobre el caché local.")
+    parser.add_argument("--paths", type=int, default=CONFIG.ROBUSTNESS_PATHS)
+    parser.add_argument("--method", choices=METHODS, default=CONFIG.ROBUSTNESS_METHOD)
+    parser.add_argument("--block-size", type=int, default=CONFIG.ROBUSTNESS_BLOCK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=CONFIG.ROBUSTNESS_SEED)
+    parser.add_argument("--tickers", nargs="*", default=None)
+    parser.add_argument("--output", default=CONFIG.ROBUSTNESS_REPORT_PATH)
+    args = parser.parse_args()
+
+    store = get_cache_store()
+    datasets = {t: store.read(t) for t in (args.tickers or CONFIG.TICKERS) if store.exists(t)}
+    stats = run_robustness(datasets, args.paths, args.method, args.block_size, args.workers, args.seed)
+    if not stats:
+        logging.warning("No hay datos en caché para el análisis de robustez.")
+        return
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        f.write("# Proyecto NERV - Informe de Robustez\n\n")
+        f.write(format_robustness_section(stats))
+    logging.info(f"Informe de robustez guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
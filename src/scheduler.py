@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+from src.data_loader import _bar_delta, latest_daily_bar
+from src.market_calendar import MarketCalendar, load_calendar
+
+
+def _utc_now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz="UTC").tz_localize(None)
+
+
+class Scheduler:
+    """
+    Planificador de ciclos según el calendario de mercado. Un ciclo diario vence cuando hay
+    un cierre de sesión nuevo (más CONFIG.SCHEDULER_CLOSE_DELAY_MINUTES para que Yahoo publique
+    la barra final) y cada intervalo intradía vence al cerrar cada barra de la sesión.
+    Lo ya procesado se guarda en CONFIG.SCHEDULER_STATE_PATH, así un reinicio o una ejecución
+    por cron no repite trabajo; fuera de horario de mercado no se hace ninguna descarga.
+    """
+
+    def __init__(self, calendar: Optional[MarketCalendar] = None, state_path: Optional[str] = None,
+                 intervals: Optional[List[str]] = None, clock: Callable[[], pd.Timestamp] = _utc_now):
+        self.calendar = calendar or load_calendar()
+        self.state_path = state_path or CONFIG.SCHEDULER_STATE_PATH
+        self.intervals = CONFIG.INTRADAY_INTERVALS if intervals is None else intervals
+        self.clock = clock
+        self.close_delay = pd.Timedelta(minutes=CONFIG.SCHEDULER_CLOSE_DELAY_MINUTES)
+        self.bar_delay = pd.Timedelta(seconds=CONFIG.SCHEDULER_BAR_DELAY_SECONDS)
+        self.retry_at: Optional[pd.Timestamp] = None
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"daily": None, "intraday": {}}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _latest_daily(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Último cierre cuya barra diaria ya debería estar publicada."""
+        return self.calendar.last_close(now - self.close_delay)
+
+    def _latest_bar(self, interval: str, now: pd.Timestamp) -> pd.Timestamp:
+        """Fin de la última barra intradía cerrada (y publicada) hasta `now`."""
+        effective = now - self.bar_delay
+        session = self.calendar.current_session(effective)
+        if session is None:
+            return self.calendar.last_close(effective)
+        delta = _bar_delta(interval)
+        bars = (effective - session[0]) // delta
+        if bars == 0:
+            # La primera barra de la sesión aún no cierra
+            return self.calendar.last_close(session[0])
+        return session[0] + bars * delta
+
+    def _next_bar(self, interval: str, now: pd.Timestamp) -> pd.Timestamp:
+        effective = now - self.bar_delay
+        opens, closes = self.calendar.next_session(effective)
+        delta = _bar_delta(interval)
+        if effective < opens:
+            boundary = opens + delta
+        else:
+            boundary = opens + ((effective - opens) // delta + 1) * delta
+        return min(boundary, closes) + self.bar_delay
+
+    def due(self, now: Optional[pd.Timestamp] = None) -> Tuple[bool, List[str]]:
+        """(¿hay un cierre diario nuevo?, intervalos intradía con barras nuevas)."""
+        now = now or self.clock()
+        last_daily = self.state.get("daily")
+        daily_due = last_daily is None or self._latest_daily(now) > pd.Timestamp(last_daily)
+        intraday = self.state.get("intraday", {})
+        intervals = [i for i in self.intervals
+                     if intraday.get(i) is None or self._latest_bar(i, now) > pd.Timestamp(intraday[i])]
+        return daily_due, intervals
+
+    def daily_stored(self, now: pd.Timestamp) -> bool:
+        """¿El caché ya tiene la barra del último cierre vencido? (según lo que cargó el ciclo)"""
+        bar = latest_daily_bar()
+        return bar is not None and bar >= pd.Timestamp(self.calendar.last_session_day(now - self.close_delay))
+
+    def mark_done(self, daily: bool, intervals: List[str], now: pd.Timestamp):
+        if daily:
+            self.state["daily"] = self._latest_daily(now).isoformat()
+        for interval in intervals:
+            self.state.setdefault("intraday", {})[interval] = self._latest_bar(interval, now).isoformat()
+        self._save_state()
+
+    def next_wake(self, now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+        """Próximo momento en que vence trabajo (acotado por CONFIG.SCHEDULER_MAX_SLEEP_SECONDS)."""
+        now = now or self.clock()
+        candidates = [self.calendar.next_session(now - self.close_delay)[1] + self.close_delay]
+        candidates += [self._next_bar(i, now) for i in self.intervals]
+        if self.retry_at is not None:
+            candidates.append(self.retry_at)
+        wake = min(candidates)
+        return min(max(wake, now), now + pd.Timedelta(seconds=CONFIG.SCHEDULER_MAX_SLEEP_SECONDS))
+
+    def run_pending(self, cycle: Callable[..., object], force: bool = False) -> bool:
+        """
+        Ejecuta `cycle(daily=..., intervals=...)` si hay trabajo vencido. Retorna False si el
+        ciclo se omitió porque no hay cierres ni barras nuevas. El cierre diario se da por
+        procesado solo si su barra quedó en el caché; si Yahoo aún no la publica, se reintenta
+        en CONFIG.SCHEDULER_RETRY_SECONDS.
+        """
+        now = self.clock()
+        daily, intervals = self.due(now)
+        if force:
+            daily, intervals = True, list(self.intervals)
+        if not daily and not intervals:
+            logging.info("Sin cierres ni barras nuevas desde el último ciclo. Ciclo omitido.")
+            return False
+        self.retry_at = None
+        try:
+            cycle(daily=daily, intervals=intervals)
+        except Exception:
+            self.retry_at = now + pd.Timedelta(seconds=CONFIG.SCHEDULER_RETRY_SECONDS)
+            raise
+        if daily and not self.daily_stored(now):
+            logging.warning(f"La barra del cierre {self._latest_daily(now)} UTC aún no está en el caché; "
+                            f"se reintenta en {CONFIG.SCHEDULER_RETRY_SECONDS}s.")
+            self.retry_at = now + pd.Timedelta(seconds=CONFIG.SCHEDULER_RETRY_SECONDS)
+            daily = False
+        self.mark_done(daily, intervals, now)
+        return True
+
+    def sleep_until(self, wake: pd.Timestamp):
+        seconds = (wake - self.clock()).total_seconds()
+        if seconds > 0:
+            time.sleep(seconds)
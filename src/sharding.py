@@ -0,0 +1,220 @@
+import datetime
+import glob
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+
+def shard_of(ticker: str, count: int) -> int:
+    """Shard asignado a un ticker: hash estable (crc32), no depende del orden de CONFIG.TICKERS."""
+    return zlib.crc32(ticker.encode()) % count
+
+
+def shard_tickers(tickers: List[str], index: int, count: int) -> List[str]:
+    """Tickers del shard `index` de `count`, en el orden original del universo."""
+    return [t for t in tickers if shard_of(t, count) == index]
+
+
+def shard_root(index: int, count: int) -> str:
+    return os.path.join(CONFIG.SHARD_DIR, f"shard_{index:02d}_of_{count:02d}")
+
+
+def configure_shard(index: int, count: int):
+    """
+    Deja CONFIG apuntando al trozo del universo y al caché propio del shard (datos, indicadores,
+    checkpoints, estado del planificador y métricas). Se llama una vez al arrancar el proceso.
+    """
+    if not 0 <= index < count:
+        raise ValueError(f"Shard inválido: {index} de {count}")
+    root = shard_root(index, count)
+    CONFIG.TICKERS = shard_tickers(CONFIG.TICKERS, index, count)
+    CONFIG.CACHE_DIR = os.path.join(root, "cache")
+    CONFIG.INDICATOR_CACHE_DIR = os.path.join(root, "cache", "indicators")
+    CONFIG.BACKTEST_CHECKPOINT_DIR = os.path.join(root, "cache", "checkpoints")
+    CONFIG.INTRADAY_CACHE_DIR = os.path.join(root, "cache", "intraday")
+    CONFIG.SCHEDULER_STATE_PATH = os.path.join(root, "scheduler_state.json")
+    base_metrics, ext_metrics = os.path.splitext(CONFIG.METRICS_PATH)
+    CONFIG.METRICS_PATH = f"{base_metrics}_shard_{index:02d}{ext_metrics}"
+    logging.info(f"Shard {index + 1}/{count}: {len(CONFIG.TICKERS)} tickers, caché en {root}")
+
+
+def cycle_id() -> str:
+    """Identificador del ciclo compartido por shards y coordinador (la fecha local, como los reportes)."""
+    return os.environ.get("NERV_CYCLE_ID") or datetime.datetime.now().strftime('%Y-%m-%d')
+
+
+def _partial_path(cycle: str, index: int, count: int) -> str:
+    return os.path.join(CONFIG.SHARD_DIR, "results", f"{count:02d}", cycle, f"shard_{index:02d}.pkl")
+
+
+def write_partial(cycle: str, index: int, count: int, tickers: List[str], results: List[Dict],
+                  robustness: Optional[List[Dict]] = None, error: Optional[str] = None,
+                  last_bar: Optional[datetime.datetime] = None):
+    """
+    Publica el resultado parcial del shard (escritura atómica: el coordinador nunca lee un
+    archivo a medias). Con `error` se publica el fallo para que el coordinador no espere.
+    `last_bar` es la barra diaria más reciente del caché del shard (para el planificador del
+    coordinador).
+    """
+    path = _partial_path(cycle, index, count)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = {
+        'shard': index,
+        'count': count,
+        'cycle': cycle,
+        'status': 'failed' if error else 'ok',
+        'error': error,
+        'tickers': tickers,
+        'results': results,
+        'robustness': robustness or [],
+        'last_bar': last_bar,
+        'finished_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(partial, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    _prune_cycles(count)
+
+
+def read_partial(cycle: str, index: int, count: int) -> Optional[Dict]:
+    try:
+        with open(_partial_path(cycle, index, count), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"Resultado parcial ilegible del shard {index} ({cycle}): {e}")
+        return None
+
+
+def _cycles(count: int) -> List[str]:
+    """Ciclos con resultados publicados, del más reciente al más antiguo."""
+    base = os.path.join(CONFIG.SHARD_DIR, "results", f"{count:02d}")
+    return sorted((os.path.basename(p) for p in glob.glob(os.path.join(base, "*")) if os.path.isdir(p)),
+                  reverse=True)
+
+
+def _prune_cycles(count: int):
+    base = os.path.join(CONFIG.SHARD_DIR, "results", f"{count:02d}")
+    for cycle in _cycles(count)[CONFIG.SHARD_KEEP_CYCLES:]:
+        shutil.rmtree(os.path.join(base, cycle), ignore_errors=True)
+
+
+def _last_good_partial(cycle: str, index: int, count: int) -> Optional[Dict]:
+    """Último resultado correcto del shard en un ciclo anterior (respaldo si el actual falla o no llega)."""
+    for previous in _cycles(count):
+        if previous >= cycle:
+            continue
+        partial = read_partial(previous, index, count)
+        if partial is not None and partial['status'] == 'ok':
+            return partial
+    return None
+
+
+def wait_for_partials(cycle: str, count: int, timeout: Optional[float] = None,
+                      poll: Optional[float] = None) -> Dict[int, Dict]:
+    """
+    Espera hasta `timeout` segundos a que cada shard publique su resultado del ciclo (correcto
+    o fallido). Retorna los parciales disponibles al terminar la espera, por índice de shard.
+    """
+    timeout = CONFIG.SHARD_TIMEOUT_SECONDS if timeout is None else timeout
+    poll = CONFIG.SHARD_POLL_SECONDS if poll is None else poll
+    deadline = time.monotonic() + timeout
+    partials: Dict[int, Dict] = {}
+    while True:
+        for index in range(count):
+            if index not in partials:
+                partial = read_partial(cycle, index, count)
+                if partial is not None:
+                    partials[index] = partial
+        if len(partials) == count or time.monotonic() >= deadline:
+            return partials
+        time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+
+
+def merge_partials(cycle: str, count: int, partials: Dict[int, Dict],
+                   tickers: List[str]) -> Tuple[List[Dict], Optional[List[Dict]], Dict[str, List[int]]]:
+    """
+    Une los resultados de los shards en el orden de `tickers` (el mismo orden que un ciclo sin
+    shards). Un shard fallido o que no llegó a tiempo se reemplaza por su último resultado
+    correcto, si existe; sus señales no se repiten porque el reporte de señales solo toma la
+    fecha más reciente. Retorna (resultados, resúmenes de robustez o None,
+    {'failed', 'missing', 'stale'} -> shards).
+    """
+    status = {'failed': [], 'missing': [], 'stale': []}
+    by_ticker, robustness = {}, {}
+    for index in range(count):
+        partial = partials.get(index)
+        if partial is None or partial['status'] != 'ok':
+            if partial is None:
+                status['missing'].append(index)
+                logging.warning(f"El shard {index} no publicó resultados del ciclo {cycle}.")
+            else:
+                status['failed'].append(index)
+                logging.warning(f"El shard {index} falló en el ciclo {cycle}: {partial['error']}")
+            partial = _last_good_partial(cycle, index, count)
+            if partial is None:
+                continue
+            status['stale'].append(index)
+            logging.warning(f"Se usan los resultados del shard {index} del ciclo {partial['cycle']}.")
+        for res in partial['results']:
+            by_ticker[res['Ticker']] = res
+        for stats in partial.get('robustness', []):
+            robustness[stats['Ticker']] = stats
+
+    lost = [t for t in tickers if t not in by_ticker]
+    if lost:
+        logging.warning(f"{len(lost)} tickers sin resultados en el ciclo {cycle}: {', '.join(lost[:20])}")
+    merged_robustness = [robustness[t] for t in tickers if t in robustness]
+    return [by_ticker[t] for t in tickers if t in by_ticker], merged_robustness or None, status
+
+
+def run_local_shards(target: Callable[[int, int], None], count: int, timeout: Optional[float] = None,
+                     retries: Optional[int] = None) -> Dict[int, int]:
+    """
+    Sustituto local de los contenedores: corre `target(index, count)` en un proceso por shard.
+    Los shards que superan `timeout` se terminan; los que fallan se reintentan hasta `retries`
+    veces dentro del mismo plazo. Retorna el código de salida final de cada shard.
+    """
+    timeout = CONFIG.SHARD_TIMEOUT_SECONDS if timeout is None else timeout
+    retries = CONFIG.SHARD_RETRIES if retries is None else retries
+    deadline = time.monotonic() + timeout
+    attempts = {index: 0 for index in range(count)}
+    exit_codes: Dict[int, int] = {}
+
+    def start(index: int) -> multiprocessing.Process:
+        attempts[index] += 1
+        process = multiprocessing.Process(target=target, args=(index, count), name=f"nerv-shard-{index}")
+        process.start()
+        return process
+
+    running = {index: start(index) for index in range(count)}
+    while running:
+        for index, process in list(running.items()):
+            process.join(timeout=0.2)
+            if process.exitcode is None:
+                continue
+            del running[index]
+            if process.exitcode != 0 and attempts[index] <= retries and time.monotonic() < deadline:
+                logging.warning(f"Shard {index} terminó con código {process.exitcode}. Reintentando...")
+                running[index] = start(index)
+            else:
+                exit_codes[index] = process.exitcode
+        if running and time.monotonic() >= deadline:
+            for index, process in running.items():
+                logging.error(f"Shard {index} superó {timeout:.0f}s. Se termina el proceso.")
+                process.terminate()
+                process.join()
+                exit_codes[index] = process.exitcode
+            running = {}
+    return exit_codes
@@ -0,0 +1,156 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import CONFIG
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    accion TEXT NOT NULL,
+    precio REAL,
+    motivo TEXT,
+    processed_at TEXT,
+    UNIQUE (ticker, fecha, accion)
+);
+CREATE INDEX IF NOT EXISTS idx_signals_fecha ON signals (fecha);
+"""
+
+_COLUMNS = "ticker, fecha, accion, precio, motivo, processed_at"
+
+
+def _to_legacy(row: tuple) -> Dict:
+    """Fila de la tabla -> entrada con el formato del log JSON histórico."""
+    ticker, fecha, accion, precio, motivo, processed_at = row
+    return {
+        'Ticker': ticker,
+        'Acción': accion,
+        'Precio': precio,
+        'Motivo': motivo,
+        'Fecha': fecha,
+        'processed_at': processed_at,
+    }
+
+
+class SignalStore:
+    """
+    Log histórico de señales en SQLite, indexado por (Ticker, Fecha, Acción).
+    El deduplicado lo resuelve el índice único (INSERT OR IGNORE) sin recorrer el historial,
+    el historial no se trunca y las consultas por fecha/ticker usan índices.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or CONFIG.SIGNALS_DB_PATH
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.is_new = not os.path.exists(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, signals: List[Dict], processed_at: Optional[str] = None) -> int:
+        """Agrega señales ignorando duplicados exactos. Retorna cuántas eran nuevas."""
+        rows = [(s['Ticker'], s['Fecha'], s['Acción'], s.get('Precio'), s.get('Motivo'),
+                 s.get('processed_at', processed_at)) for s in signals]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(f"INSERT OR IGNORE INTO signals ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def query(self, ticker: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """Señales filtradas por ticker y rango de fechas (inclusive), en orden de registro."""
+        clauses, args = [], []
+        if ticker:
+            clauses.append("ticker = ?")
+            args.append(ticker)
+        if start:
+            clauses.append("fecha >= ?")
+            args.append(start)
+        if end:
+            clauses.append("fecha <= ?")
+            args.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if limit:
+            # Las últimas `limit` señales, devueltas en orden de registro
+            args.append(limit)
+            sql = (f"SELECT {_COLUMNS} FROM (SELECT id, {_COLUMNS} FROM signals {where} "
+                   f"ORDER BY id DESC LIMIT ?) ORDER BY id")
+        else:
+            sql = f"SELECT {_COLUMNS} FROM signals {where} ORDER BY id"
+        return [_to_legacy(row) for row in self.conn.execute(sql, args)]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+
+    def compact(self, before: str) -> int:
+        """Compactación opcional: elimina las señales con Fecha anterior a `before` (YYYY-MM-DD)."""
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM signals WHERE fecha < ?", (before,)).rowcount
+        self.conn.execute("VACUUM")
+        logging.info(f"Compactación del log de señales: {deleted} entradas anteriores a {before} eliminadas.")
+        return deleted
+
+    def import_legacy_json(self, json_path: str) -> int:
+        """Migración única desde el log JSON histórico (conserva el orden y processed_at)."""
+        try:
+            with open(json_path, 'r') as f:
+                history = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+        imported = self.add(history)
+        logging.info(f"Importadas {imported} señales históricas desde {json_path}")
+        return imported
+
+    def export_legacy_json(self, json_path: str, limit: Optional[int] = None):
+        """Escribe el log JSON con el formato histórico para la integración web."""
+        history = self.query(limit=limit)
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(history, f, indent=4)
+        os.replace(tmp_path, json_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Administración del log histórico de señales NERV.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Exporta el JSON histórico para la web")
+    export.add_argument("--path", default=CONFIG.SIGNALS_JSON_LOG)
+    export.add_argument("--limit", type=int, default=CONFIG.SIGNALS_JSON_EXPORT_LIMIT)
+    compact = sub.add_parser("compact", help="Elimina señales anteriores a una fecha")
+    compact.add_argument("before", help="YYYY-MM-DD")
+    query = sub.add_parser("query", help="Consulta señales por ticker y/o rango de fechas")
+    query.add_argument("--ticker")
+    query.add_argument("--start")
+    query.add_argument("--end")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    with SignalStore() as store:
+        if args.command == "export":
+            store.export_legacy_json(args.path, limit=args.limit)
+        elif args.command == "compact":
+            store.compact(args.before)
+        else:
+            print(json.dumps(store.query(args.ticker, args.start, args.end, args.limit), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
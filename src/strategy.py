@@ -1,13 +1,336 @@
+import hashlib
+import logging
+import numpy as np
 import pandas as pd
 import sys
 import os
+from typing import Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import CONFIG
+from src.checkpoints import account_summary, load_checkpoint, params_digest, save_checkpoint, strategy_params
+from src.ledger import (ACTION_BUY, ACTION_HOLD, ACTION_SELL, REASON_COMPRA_ALCISTA_N1, REASON_COMPRA_ALCISTA_N2,
+                        REASON_COMPRA_ALCISTA_N3, REASON_COMPRA_BAJISTA, REASON_PULLBACK_ALCISTA,
+                        REASON_VENTA_ALCISTA, REASON_VENTA_BAJISTA, RSI_CRUCE_BAJISTA, TradeLedger)
 
-def run_backtest(df: pd.DataFrame, ticker: str) -> dict:
+try:
+    from numba import njit
+except ImportError:  # numba es opcional: sin él el kernel corre en Python puro sobre listas
+    njit = None
+
+# Posiciones del vector de parámetros del kernel
+P_COMPRA_1, P_COMPRA_2, P_COMPRA_STEP, P_VENTA_ALCISTA, P_PULLBACK, P_VENTA_BAJISTA, \
+    P_RENTABILIDAD_MINIMA, P_CRUCE_BAJISTA, P_CAPITAL_INICIAL, P_TAMANO_POSICION = range(10)
+
+# Posiciones del vector de estado del kernel
+S_CAPITAL, S_SHARES, S_POSITION_COST, S_LAST_ACTION, S_HAS_LAST_BUY, S_LAST_BUY_RSI, S_TOTAL_TRADES = range(7)
+
+
+def pack_params(params: dict) -> np.ndarray:
+    """Convierte el dict de parámetros al vector float64 que consume el kernel."""
+    packed = np.empty(10, dtype=np.float64)
+    packed[P_COMPRA_1] = params['alcista_compra_1']
+    packed[P_COMPRA_2] = params['alcista_compra_2']
+    packed[P_COMPRA_STEP] = params['alcista_compra_step']
+    packed[P_VENTA_ALCISTA] = params['alcista_venta']
+    packed[P_PULLBACK] = params['alcista_pullback_compra']
+    packed[P_VENTA_BAJISTA] = params['bajista_venta']
+    packed[P_RENTABILIDAD_MINIMA] = params['rentabilidad_minima']
+    packed[P_CRUCE_BAJISTA] = RSI_CRUCE_BAJISTA
+    packed[P_CAPITAL_INICIAL] = params['capital_inicial']
+    packed[P_TAMANO_POSICION] = params['tamano_posicion']
+    return packed
+
+
+def initial_state(capital: float) -> np.ndarray:
+    """Estado de cuenta al inicio de la simulación."""
+    state = np.zeros(7, dtype=np.float64)
+    state[S_CAPITAL] = capital
+    state[S_LAST_ACTION] = ACTION_HOLD
+    return state
+
+
+def _simulate(close, rsi, sma50, sma200, p, state, start,
+              ev_idx, ev_action, ev_amount, ev_price, ev_reason, ev_rsi, ev_ref):
+    """
+    Máquina de estados de la estrategia sobre arrays (misma lógica que run_backtest_reference).
+    Actualiza `state` en su lugar, escribe los eventos en los arrays ev_* y retorna cuántos hubo.
+    `ev_ref` guarda el valor auxiliar del motivo: utilidad latente en ventas y el RSI de la
+    compra anterior en la compra de nivel 3.
+    Funciona tanto con listas (Python puro) como con arrays NumPy (compilado con numba).
+    """
+    capital = float(state[0])
+    shares = float(state[1])
+    position_cost = float(state[2])
+    last_action = float(state[3])
+    has_last_buy = state[4] > 0
+    last_buy_rsi = float(state[5])
+    total_trades = float(state[6])
+
+    compra_1 = p[0]
+    compra_2 = p[1]
+    compra_step = p[2]
+    venta_alcista = p[3]
+    pullback = p[4]
+    venta_bajista = p[5]
+    rentabilidad_minima = p[6]
+    cruce_bajista = p[7]
+    monto_base = p[8] * p[9]
+
+    n_events = 0
+    if start < 1:
+        start = 1
+    for i in range(start, len(close)):
+        r = rsi[i]
+        s50 = sma50[i]
+        s200 = sma200[i]
+        # Ignorar si hay nulos iniciales de las medias (NaN != NaN)
+        if r != r or s50 != s50 or s200 != s200:
+            continue
+        price = close[i]
+
+        utilidad = 0.0
+        if shares > 0 and position_cost > 0:
+            utilidad = (shares * price - position_cost) / position_cost
+
+        signal = ACTION_HOLD
+        reason = 0
+        ref = 0.0
+
+        if s50 > s200:
+            if r >= venta_alcista and shares > 0:
+                if utilidad >= rentabilidad_minima:
+                    signal = ACTION_SELL
+                    reason = REASON_VENTA_ALCISTA
+                    ref = utilidad
+            elif r <= compra_1:
+                comprar = False
+                if not has_last_buy:
+                    comprar = True
+                    reason = REASON_COMPRA_ALCISTA_N1
+                elif last_buy_rsi >= compra_1 and r <= compra_2:
+                    if price > s200:
+                        comprar = True
+                        reason = REASON_COMPRA_ALCISTA_N2
+                elif last_buy_rsi <= compra_2:
+                    if r <= (last_buy_rsi - compra_step):
+                        if price > s200:
+                            comprar = True
+                            reason = REASON_COMPRA_ALCISTA_N3
+                            ref = last_buy_rsi
+                if comprar:
+                    signal = ACTION_BUY
+                    has_last_buy = True
+                    last_buy_rsi = r
+            elif r < pullback and last_action == ACTION_SELL:
+                signal = ACTION_BUY
+                reason = REASON_PULLBACK_ALCISTA
+                has_last_buy = True
+                last_buy_rsi = r
+        else:
+            if r >= venta_bajista and shares > 0:
+                if utilidad >= rentabilidad_minima:
+                    signal = ACTION_SELL
+                    reason = REASON_VENTA_BAJISTA
+                    ref = utilidad
+            elif shares == 0 and rsi[i - 1] <= cruce_bajista and r > cruce_bajista:
+                signal = ACTION_BUY
+                reason = REASON_COMPRA_BAJISTA
+
+        if signal == ACTION_BUY and capital > 0:
+            monto = monto_base
+            if monto > capital:
+                monto = capital
+            shares += monto / price
+            capital -= monto
+            position_cost += monto
+            last_action = ACTION_BUY
+        elif signal == ACTION_SELL and shares > 0:
+            monto = shares * price
+            capital += monto
+            shares = 0.0
+            position_cost = 0.0
+            last_action = ACTION_SELL
+            has_last_buy = False
+            total_trades += 1
+        else:
+            continue
+
+        ev_idx[n_events] = i
+        ev_action[n_events] = signal
+        ev_amount[n_events] = monto
+        ev_price[n_events] = price
+        ev_reason[n_events] = reason
+        ev_rsi[n_events] = r
+        ev_ref[n_events] = ref
+        n_events += 1
+
+    state[0] = capital
+    state[1] = shares
+    state[2] = position_cost
+    state[3] = last_action
+    state[4] = 1.0 if has_last_buy else 0.0
+    state[5] = last_buy_rsi
+    state[6] = total_trades
+    return n_events
+
+
+_simulate_jit = njit(cache=True)(_simulate) if njit is not None else None
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Extrae una columna como array float64 contiguo (toma la primera si viene duplicada)."""
+    col = df[name]
+    if isinstance(col, pd.DataFrame):
+        col = col.iloc[:, 0]
+    return np.ascontiguousarray(col.to_numpy(dtype=np.float64))
+
+
+def event_buffers(n: int) -> tuple:
+    """Arrays de salida del kernel para una serie de `n` barras (reutilizables entre corridas)."""
+    return (np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.float64),
+            np.zeros(n, dtype=np.float64), np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.float64),
+            np.zeros(n, dtype=np.float64))
+
+
+def simulate_arrays(close: np.ndarray, rsi: np.ndarray, sma50: np.ndarray, sma200: np.ndarray,
+                    packed_params: np.ndarray, state: np.ndarray, start: int = 1,
+                    buffers: Optional[tuple] = None) -> dict:
+    """
+    Ejecuta el kernel sobre arrays ya extraídos. Usa la versión compilada con numba si
+    está disponible y CONFIG.BACKTEST_JIT lo permite; si no, recorre listas de Python.
+    Retorna los eventos como arrays (idx, action, amount, price, reason, rsi, ref).
+    """
+    if buffers is None:
+        buffers = event_buffers(len(close))
+    ev_idx, ev_action, ev_amount, ev_price, ev_reason, ev_rsi, ev_ref = buffers
+
+    if _simulate_jit is not None and CONFIG.BACKTEST_JIT:
+        count = _simulate_jit(close, rsi, sma50, sma200, packed_params, state, start,
+                              ev_idx, ev_action, ev_amount, ev_price, ev_reason, ev_rsi, ev_ref)
+    else:
+        # Las listas de floats de Python son bastante más rápidas de indexar que un ndarray
+        count = _simulate(close.tolist(), rsi.tolist(), sma50.tolist(), sma200.tolist(),
+                          packed_params.tolist(), state, start,
+                          ev_idx, ev_action, ev_amount, ev_price, ev_reason, ev_rsi, ev_ref)
+
+    return {
+        'idx': ev_idx[:count],
+        'action': ev_action[:count],
+        'amount': ev_amount[:count],
+        'price': ev_price[:count],
+        'reason': ev_reason[:count],
+        'rsi': ev_rsi[:count],
+        'ref': ev_ref[:count],
+    }
+
+
+def _ledger_from_events(df: pd.DataFrame, events: dict, params: dict) -> TradeLedger:
+    """Ledger compacto de las operaciones ejecutadas; los textos se generan solo al leerlos."""
+    return TradeLedger.from_events(df.index.values[events['idx']], events, params)
+
+
+def _summary(ticker: str, params: dict, state: np.ndarray, last_price: float, history: TradeLedger) -> dict:
+    """Resumen final del backtest a partir del estado de la cuenta."""
+    return account_summary(ticker, params, float(state[S_CAPITAL]), float(state[S_SHARES]),
+                           int(state[S_TOTAL_TRADES]), last_price, history)
+
+
+def _has_backtest_columns(df: pd.DataFrame) -> bool:
+    return not df.empty and 'RSI' in df.columns and 'SMA_200' in df.columns and 'Close' in df.columns
+
+
+def run_backtest(df: pd.DataFrame, ticker: str, params: Optional[dict] = None) -> dict:
     """
     Simula la estrategia de inversión día por día calculando compras, ventas, retornos y el estado final.
+    Corre la máquina de estados sobre arrays NumPy contiguos (Close, RSI, SMA_50, SMA_200)
+    y solo construye fechas y textos para las operaciones ejecutadas.
+    `params` permite sobrescribir los umbrales de CONFIG (mismas claves que strategy_params()).
+    """
+    if not _has_backtest_columns(df):
+        return {}
+
+    params = {**strategy_params(), **(params or {})}
+    state = initial_state(params['capital_inicial'])
+    close = _column(df, 'Close')
+    events = simulate_arrays(close, _column(df, 'RSI'), _column(df, 'SMA_50'), _column(df, 'SMA_200'),
+                             pack_params(params), state)
+
+    # Cierre del loop - Resumen Final
+    return _summary(ticker, params, state, float(close[-1]), _ledger_from_events(df, events, params))
+
+
+# --- Checkpoints -------------------------------------------------------------
+# Lectura y escritura en src/checkpoints.py; aquí se valida que sigan sirviendo para los datos.
+
+def _data_digest(arrays: tuple, rows: int) -> str:
+    """Huella de los datos ya simulados (Close, RSI, SMA_50, SMA_200 hasta la fila `rows`)."""
+    h = hashlib.blake2b(digest_size=16)
+    for values in arrays:
+        h.update(values[:rows].tobytes())
+    return h.hexdigest()
+
+
+def _checkpoint_valid(checkpoint: Optional[dict], df: pd.DataFrame, arrays: tuple, digest: str) -> bool:
+    """Un checkpoint sirve solo si los parámetros y los datos ya simulados no cambiaron."""
+    if not checkpoint or checkpoint.get('params_digest') != digest or 'ledger' not in checkpoint:
+        return False
+    rows = checkpoint.get('rows', 0)
+    if rows <= 0 or rows > len(df):
+        return False
+    if df.index[rows - 1].isoformat() != checkpoint.get('last_date'):
+        return False
+    return checkpoint.get('data_digest') == _data_digest(arrays, rows)
+
+
+def run_backtest_incremental(df: pd.DataFrame, ticker: str) -> dict:
+    """
+    Igual que run_backtest, pero retoma la simulación desde el checkpoint del ticker y solo
+    procesa las barras nuevas. El checkpoint se descarta automáticamente si cambian los
+    parámetros de la estrategia o los datos ya procesados.
+    """
+    if not _has_backtest_columns(df):
+        return {}
+
+    params = strategy_params()
+    arrays = (_column(df, 'Close'), _column(df, 'RSI'), _column(df, 'SMA_50'), _column(df, 'SMA_200'))
+    digest = params_digest(params)
+
+    checkpoint = load_checkpoint(ticker)
+    if _checkpoint_valid(checkpoint, df, arrays, digest):
+        state = np.asarray(checkpoint['state'], dtype=np.float64)
+        history = TradeLedger.from_json(checkpoint['ledger'], params)
+        start = checkpoint['rows']
+    else:
+        if checkpoint is not None:
+            logging.info(f"Checkpoint de {ticker} invalidado (parámetros o datos cambiaron). Simulando desde el inicio.")
+        state = initial_state(params['capital_inicial'])
+        history = TradeLedger(params=params)
+        start = 1
+
+    if start < len(df) or checkpoint is None:
+        events = simulate_arrays(*arrays, pack_params(params), state, start=start)
+        history = history.concat(_ledger_from_events(df, events, params))
+        try:
+            save_checkpoint(ticker, {
+                'params_digest': digest,
+                'rows': len(df),
+                'last_date': df.index[-1].isoformat(),
+                'data_digest': _data_digest(arrays, len(df)),
+                'last_close': float(arrays[0][-1]),
+                'state': state.tolist(),
+                'ledger': history.to_json(),
+            })
+        except Exception as e:
+            logging.error(f"Error guardando checkpoint de {ticker}: {e}")
+
+    return _summary(ticker, params, state, float(arrays[0][-1]), history)
+
+
+def run_backtest_reference(df: pd.DataFrame, ticker: str) -> dict:
+    """
+    Implementación original fila por fila (df.iloc). Se conserva como referencia para
+    verificar la paridad del kernel de arrays (ver tests/test_strategy.py).
     """
     if df.empty or 'RSI' not in df.columns or 'SMA_200' not in df.columns or 'Close' not in df.columns:
         return {}
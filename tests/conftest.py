@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONFIG
+
+
+@pytest.fixture
+def isolated_config(tmp_path, monkeypatch):
+    """Apunta los cachés de CONFIG a un directorio temporal, sin caché en memoria ni pausas."""
+    monkeypatch.setattr(CONFIG, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(CONFIG, "INDICATOR_CACHE_DIR", str(tmp_path / "cache" / "indicators"))
+    monkeypatch.setattr(CONFIG, "BACKTEST_CHECKPOINT_DIR", str(tmp_path / "cache" / "checkpoints"))
+    monkeypatch.setattr(CONFIG, "HOT_CACHE_ENABLED", False)
+    monkeypatch.setattr(CONFIG, "DOWNLOAD_CHUNK_PAUSE_SECONDS", 0)
+    return tmp_path
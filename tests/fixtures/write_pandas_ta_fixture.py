@@ -0,0 +1,61 @@
+"""
+Regenera tests/fixtures/pandas_ta_indicators.npz con la salida de pandas_ta (RSI, SMAs, EMA
+y ATR) para series sintéticas fijas. tests/test_indicators.py compara contra este fixture el
+motor nativo sin necesidad de tener pandas_ta instalado.
+
+Uso: python -m tests.fixtures.write_pandas_ta_fixture  (requiere pandas_ta)
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import CONFIG
+from benchmarks.synthetic import make_ohlcv
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pandas_ta_indicators.npz")
+
+# Largos de las series del fixture: más cortas y más largas que las ventanas de las medias
+FIXTURE_ROWS = (40, 210, 750, 1000)
+
+
+def pandas_ta_reference(ta, df) -> dict:
+    """RSI y SMAs de pandas_ta con los parámetros de CONFIG (NaN donde ta retorna None)."""
+    close = df['Close']
+    lengths = [CONFIG.SMA_PERIODS['short'], CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']]
+    out = {'RSI': ta.rsi(close, length=CONFIG.RSI_PARAMS['period'])}
+    for length in lengths:
+        out[f"SMA_{length}"] = ta.sma(close, length=length)
+    return {k: np.full(len(df), np.nan) if v is None else v.to_numpy(dtype=np.float64) for k, v in out.items()}
+
+
+def write_fixture(ta, path: str = FIXTURE_PATH):
+    """Guarda la salida de pandas_ta para las series de FIXTURE_ROWS."""
+    frames = [make_ohlcv(rows, seed=1000 + i) for i, rows in enumerate(FIXTURE_ROWS)]
+    length = CONFIG.RSI_PARAMS['period']
+    columns = {'close': [], 'high': [], 'low': [], 'EMA': [], 'ATR': []}
+    for df in frames:
+        for col, values in pandas_ta_reference(ta, df).items():
+            columns.setdefault(col, []).append(values)
+        columns['close'].append(df['Close'].to_numpy(dtype=np.float64))
+        columns['high'].append(df['High'].to_numpy(dtype=np.float64))
+        columns['low'].append(df['Low'].to_numpy(dtype=np.float64))
+        columns['EMA'].append(ta.ema(df['Close'], length=length).to_numpy(dtype=np.float64))
+        columns['ATR'].append(ta.atr(df['High'], df['Low'], df['Close'], length=length).to_numpy(dtype=np.float64))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, version=np.array(ta.version), rsi_length=length,
+                        sma_lengths=np.array([CONFIG.SMA_PERIODS[k] for k in ('short', 'medium', 'long')]),
+                        offsets=np.cumsum([0] + [len(df) for df in frames]),
+                        **{col: np.concatenate(values) for col, values in columns.items()})
+
+
+def main():
+    import pandas_ta as ta
+
+    write_fixture(ta)
+    print(f"Fixture de pandas_ta {ta.version} guardado en {FIXTURE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
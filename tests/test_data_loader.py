@@ -0,0 +1,120 @@
+"""load_data_batch offline: un downloader falso en lugar de yfinance (sin red)."""
+from typing import List, Set
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import CONFIG
+from benchmarks.stubs import SyntheticDownloader
+from src import data_loader
+from src.cache_store import get_cache_store
+
+CHUNK_SIZE = 3
+MAX_RETRIES = 2
+BACKOFF_SECONDS = 1.0
+
+
+class RecordingDownloader(SyntheticDownloader):
+    """SyntheticDownloader que registra cada petición y falla en los bloques indicados."""
+
+    def __init__(self, end: str, always_fail: Set[str] = frozenset(), fail_once: Set[str] = frozenset()):
+        super().__init__(years=3, end=end)
+        self.requests = []
+        self.always_fail = set(always_fail)
+        self.fail_once = set(fail_once)
+
+    def __call__(self, tickers: List[str], start=None, **kwargs) -> pd.DataFrame:
+        symbols = list(tickers)
+        self.requests.append((tuple(symbols), start))
+        if self.always_fail & set(symbols):
+            raise ConnectionError("bloque caído")
+        if self.fail_once & set(symbols):
+            self.fail_once -= set(symbols)
+            raise ConnectionError("error transitorio")
+        return super().__call__(symbols, start=start, **kwargs)
+
+
+@pytest.fixture
+def batch_config(isolated_config, monkeypatch):
+    monkeypatch.setattr(CONFIG, "DOWNLOAD_CHUNK_SIZE", CHUNK_SIZE)
+    monkeypatch.setattr(CONFIG, "DOWNLOAD_MAX_RETRIES", MAX_RETRIES)
+    monkeypatch.setattr(CONFIG, "DOWNLOAD_BACKOFF_SECONDS", BACKOFF_SECONDS)
+    # Las esperas del backoff se registran en lugar de dormir
+    waits = []
+    monkeypatch.setattr(data_loader.time, "sleep", waits.append)
+    return waits
+
+
+@pytest.fixture
+def last_session() -> str:
+    """Última sesión cerrada: las series sintéticas terminan ahí para que "al día" sea determinista."""
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    return str(data_loader._market_calendar().last_session_day(now))
+
+
+def _cached_closes(ticker: str) -> pd.Series:
+    return get_cache_store().read(ticker)['Close']
+
+
+def test_cold_cache_is_chunked_and_split_per_ticker(batch_config, last_session):
+    tickers = [f"C{i}" for i in range(7)]
+    downloader = RecordingDownloader(last_session)
+    result = data_loader.load_data_batch(tickers, downloader=downloader)
+
+    assert [len(symbols) for symbols, _ in downloader.requests] == [3, 3, 1]
+    assert len({start for _, start in downloader.requests}) == 1
+    start = pd.Timestamp(downloader.requests[0][1])
+    for ticker in tickers:
+        full = downloader.frame(ticker)
+        expected = full[full.index >= start]['Close']
+        cached = _cached_closes(ticker)
+        assert cached.index.equals(expected.index)
+        assert np.array_equal(cached.to_numpy(), expected.to_numpy())
+        assert np.array_equal(result[ticker]['Close'].to_numpy(), expected.to_numpy())
+
+
+def test_tickers_are_grouped_by_last_cached_date(batch_config, last_session):
+    lag = {"G0": 5, "G1": 5, "G2": 5, "G3": 5, "G4": 12, "G5": 0}
+    downloader = RecordingDownloader(last_session)
+    store = get_cache_store()
+    for ticker, rows in lag.items():
+        full = downloader.frame(ticker)
+        store.write(ticker, full.iloc[:len(full) - rows] if rows else full)
+
+    data_loader.load_data_batch(list(lag), downloader=downloader)
+
+    requested = {}
+    for symbols, start in downloader.requests:
+        assert len(symbols) <= CHUNK_SIZE
+        requested.setdefault(start, []).extend(symbols)
+    expected = {}
+    for ticker, rows in lag.items():
+        if rows:
+            last = downloader.frame(ticker).index[-rows - 1]
+            expected.setdefault((last + pd.Timedelta(days=1)).strftime('%Y-%m-%d'), []).append(ticker)
+    assert {start: sorted(symbols) for start, symbols in requested.items()} == expected
+    # G0..G3 en dos bloques, G4 en otro; G5 ya tiene la última sesión cerrada
+    assert len(downloader.requests) == 3
+    for ticker in lag:
+        assert np.array_equal(_cached_closes(ticker).to_numpy(), downloader.frame(ticker)['Close'].to_numpy())
+
+
+def test_failing_chunk_backs_off_and_is_skipped(batch_config, last_session):
+    tickers = [f"B{i}" for i in range(9)]
+    downloader = RecordingDownloader(last_session, always_fail={"B3"}, fail_once={"B6"})
+    result = data_loader.load_data_batch(tickers, downloader=downloader)
+
+    attempts = {}
+    for symbols, _ in downloader.requests:
+        attempts[symbols[0]] = attempts.get(symbols[0], 0) + 1
+    assert attempts == {"B0": 1, "B3": MAX_RETRIES + 1, "B6": 2}
+    backoff = [wait for wait in batch_config if wait]
+    assert backoff == [BACKOFF_SECONDS * 2 ** i for i in range(MAX_RETRIES)] + [BACKOFF_SECONDS]
+
+    store = get_cache_store()
+    for ticker in tickers:
+        if ticker in ("B3", "B4", "B5"):
+            assert not store.exists(ticker) and result[ticker].empty
+        else:
+            assert store.exists(ticker)
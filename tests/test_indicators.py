@@ -0,0 +1,138 @@
+"""Paridad de los indicadores nativos con pandas_ta y del motor incremental con el cálculo completo."""
+import numpy as np
+import pytest
+
+import CONFIG
+from benchmarks.synthetic import make_ohlcv
+from src.cache_store import get_cache_store
+from src.hot_cache import HotDataset
+from src.indicators import INDICATOR_COLUMNS, apply_indicators, apply_indicators_incremental
+from src.native_indicators import atr, ema, fused_indicators, fused_indicators_2d, fused_indicators_batch
+from tests.fixtures.write_pandas_ta_fixture import FIXTURE_PATH, FIXTURE_ROWS, pandas_ta_reference
+
+# Tolerancia de las SMAs frente a ta.sma (suma por producto punto en vez de rolling)
+SMA_RTOL = 1e-12
+# EMA y ATR: mismas recursiones que pandas_ta, con otro orden de las operaciones
+EMA_ATR_TOL = 1e-9
+
+
+def _assert_matches(col: str, values: np.ndarray, reference: np.ndarray):
+    """El RSI debe coincidir bit a bit; las SMAs hasta el redondeo."""
+    if col == 'RSI':
+        np.testing.assert_array_equal(values, reference, err_msg=col)
+    else:
+        np.testing.assert_allclose(values, reference, rtol=SMA_RTOL, atol=0.0, equal_nan=True, err_msg=col)
+
+
+@pytest.fixture(scope="module")
+def fixture():
+    with np.load(FIXTURE_PATH) as data:
+        return {name: data[name] for name in data.files}
+
+
+@pytest.mark.parametrize("series", range(len(FIXTURE_ROWS)))
+def test_native_matches_pandas_ta_fixture(fixture, series):
+    part = slice(fixture['offsets'][series], fixture['offsets'][series + 1])
+    close = fixture['close'][part]
+    length = int(fixture['rsi_length'])
+    native = fused_indicators(close, length, [int(n) for n in fixture['sma_lengths']])
+    for col, values in native.items():
+        _assert_matches(col, values, fixture[col][part])
+    np.testing.assert_allclose(ema(close, length), fixture['EMA'][part],
+                               rtol=EMA_ATR_TOL, atol=EMA_ATR_TOL, equal_nan=True)
+    np.testing.assert_allclose(atr(fixture['high'][part], fixture['low'][part], close, length), fixture['ATR'][part],
+                               rtol=EMA_ATR_TOL, atol=EMA_ATR_TOL, equal_nan=True)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_native_matches_installed_pandas_ta(seed):
+    ta = pytest.importorskip("pandas_ta")
+    df = make_ohlcv(750, seed=seed)
+    close = df['Close'].to_numpy(dtype=np.float64)
+    native = fused_indicators(close)
+    for col, values in pandas_ta_reference(ta, df).items():
+        _assert_matches(col, native[col], values)
+    length = CONFIG.RSI_PARAMS['period']
+    np.testing.assert_allclose(ema(close, length), ta.ema(df['Close'], length=length).to_numpy(dtype=np.float64),
+                               rtol=EMA_ATR_TOL, atol=EMA_ATR_TOL, equal_nan=True)
+    expected_atr = ta.atr(df['High'], df['Low'], df['Close'], length=length).to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(atr(df['High'], df['Low'], close, length), expected_atr,
+                               rtol=EMA_ATR_TOL, atol=EMA_ATR_TOL, equal_nan=True)
+
+
+def test_batch_and_2d_match_single_series():
+    closes = [make_ohlcv(rows, seed=seed)['Close'].to_numpy(dtype=np.float64)
+              for seed, rows in enumerate((150, 400, 750, 750))]
+    for close, values in zip(closes, fused_indicators_batch(closes)):
+        single = fused_indicators(close)
+        for col in single:
+            np.testing.assert_array_equal(values[col], single[col], err_msg=col)
+    rows = min(len(c) for c in closes)
+    rsi_2d, sma_2d = fused_indicators_2d(np.stack([c[:rows] for c in closes]))
+    lengths = [CONFIG.SMA_PERIODS['short'], CONFIG.SMA_PERIODS['medium'], CONFIG.SMA_PERIODS['long']]
+    for i, close in enumerate(closes):
+        single = fused_indicators(close[:rows])
+        np.testing.assert_array_equal(rsi_2d[i], single['RSI'])
+        for j, length in enumerate(lengths):
+            np.testing.assert_array_equal(sma_2d[j, i], single[f"SMA_{length}"])
+
+
+# Cortes de un mismo historial: cada ciclo agrega barras (una sola, varias o cientos)
+GROWTH = (260, 261, 262, 300, 750)
+
+
+def _assert_same_indicators(df, expected):
+    """Bit a bit: los checkpoints del backtest guardan la huella exacta de estas columnas."""
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_array_equal(df[col].to_numpy(dtype=np.float64),
+                                      expected[col].to_numpy(dtype=np.float64), err_msg=col)
+
+
+@pytest.mark.parametrize("jit", [True, False], ids=["jit", "python"])
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_matches_full_recompute(isolated_config, monkeypatch, jit, seed):
+    monkeypatch.setattr(CONFIG, "INDICATORS_JIT", jit)
+    raw = make_ohlcv(GROWTH[-1], seed=seed)
+    for rows in GROWTH:
+        df = apply_indicators_incremental(raw.iloc[:rows].copy(), "SYN")
+        _assert_same_indicators(df, apply_indicators(raw.iloc[:rows].copy()))
+
+
+def test_incremental_recomputes_rewritten_history(isolated_config):
+    raw = make_ohlcv(500, seed=7)
+    apply_indicators_incremental(raw.iloc[:400].copy(), "SYN")
+    rewritten = raw.copy()
+    rewritten.iloc[100, rewritten.columns.get_loc('Close')] *= 1.01
+    _assert_same_indicators(apply_indicators_incremental(rewritten.copy(), "SYN"), apply_indicators(rewritten.copy()))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_hot_cache_extension_matches_full_recompute(isolated_config, seed):
+    raw = make_ohlcv(GROWTH[-1], seed=seed)
+    store = get_cache_store()
+    hot = HotDataset()
+    for rows in GROWTH:
+        df = raw.iloc[:rows]
+        store.write("SYN", df)
+        hot.put(store, "SYN", df)
+        if rows > GROWTH[0]:
+            # Solo filas agregadas: la entrada conserva los indicadores y prepare los extiende
+            assert hot._entries["SYN"].indicators is not None
+        _assert_same_indicators(hot.prepare("SYN", hot.get(store, "SYN")), apply_indicators(df.copy()))
+    # Un reinicio retoma desde el estado que prepare dejó en disco
+    _assert_same_indicators(apply_indicators_incremental(raw.copy(), "SYN"), apply_indicators(raw.copy()))
+
+
+def test_hot_cache_recomputes_when_closes_are_rewritten(isolated_config):
+    raw = make_ohlcv(500, seed=11)
+    store = get_cache_store()
+    hot = HotDataset()
+    store.write("SYN", raw.iloc[:400])
+    hot.put(store, "SYN", raw.iloc[:400])
+    hot.prepare("SYN", hot.get(store, "SYN"))
+    # Mismas fechas, un cierre ya procesado corregido: el estado en memoria deja de servir
+    rewritten = raw.copy()
+    rewritten.iloc[50, rewritten.columns.get_loc('Close')] *= 0.99
+    store.write("SYN", rewritten)
+    hot.put(store, "SYN", rewritten)
+    _assert_same_indicators(hot.prepare("SYN", hot.get(store, "SYN")), apply_indicators(rewritten.copy()))
@@ -0,0 +1,44 @@
+"""Paridad del kernel de arrays de run_backtest contra la implementación fila por fila."""
+import pytest
+
+import CONFIG
+from benchmarks.synthetic import make_ohlcv
+from src.indicators import apply_indicators
+from src.strategy import run_backtest, run_backtest_incremental, run_backtest_reference
+
+CASES = [(seed, rows) for seed in range(8) for rows in (250, 1500)]
+# Semillas cuyas series de 1500 barras cierran varias operaciones
+TRADING_SEEDS = [3, 5, 6]
+
+
+def _frame(seed: int, rows: int):
+    return apply_indicators(make_ohlcv(rows, seed=seed))
+
+
+@pytest.mark.parametrize("jit", [True, False], ids=["jit", "python"])
+@pytest.mark.parametrize("seed,rows", CASES)
+def test_kernel_matches_reference(monkeypatch, jit, seed, rows):
+    monkeypatch.setattr(CONFIG, "BACKTEST_JIT", jit)
+    df = _frame(seed, rows)
+    assert run_backtest(df, f"SYN{seed:03d}") == run_backtest_reference(df, f"SYN{seed:03d}")
+
+
+@pytest.mark.parametrize("seed", TRADING_SEEDS)
+def test_incremental_checkpoints_match_full_run(isolated_config, seed):
+    df = _frame(seed, 1500)
+    ticker = f"SYN{seed:03d}"
+    expected = run_backtest(df, ticker)
+    assert expected['Operaciones Creadas'] > 0
+    # Cada ciclo agrega barras nuevas y retoma desde el checkpoint del anterior
+    for rows in (300, 301, 700, 1100, 1500):
+        result = run_backtest_incremental(df.iloc[:rows], ticker)
+    assert result == expected
+    # Sin barras nuevas se sirve el checkpoint tal cual
+    assert run_backtest_incremental(df, ticker) == expected
+
+
+def test_checkpoint_is_discarded_when_params_change(isolated_config, monkeypatch):
+    df = _frame(5, 1500)
+    run_backtest_incremental(df.iloc[:1000], "SYN005")
+    monkeypatch.setattr(CONFIG, "BACKTEST_CAPITAL_INICIAL", CONFIG.BACKTEST_CAPITAL_INICIAL * 2)
+    assert run_backtest_incremental(df, "SYN005") == run_backtest(df, "SYN005")